@@ -0,0 +1,49 @@
+import os
+import sys
+
+from sqlalchemy import select
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from backend.database.models import AuctionEntry, Horse, engine as default_engine
+from backend.services.horse_ingest import history_entries
+
+
+def create_auction_entries(engine=None) -> int:
+    """auction_entriesテーブルを作成し、horsesの履歴カラムから出品履歴を移行する
+
+    出品履歴がまだない馬だけを移行するため、何度実行してもよい。
+
+    Returns:
+        int: 追加した出品履歴の件数
+    """
+    engine = engine or default_engine
+    horses = Horse.__table__
+    entries = AuctionEntry.__table__
+    # テーブルとインデックスを作成（既にあれば何もしない）
+    entries.create(bind=engine, checkfirst=True)
+
+    with engine.begin() as conn:
+        migrated = {row[0] for row in conn.execute(select(entries.c.horse_id).distinct())}
+        rows = []
+        for horse in conn.execute(select(horses)).mappings():
+            if horse['id'] in migrated:
+                continue
+            for entry in history_entries(dict(horse)):
+                entry['horse_id'] = horse['id']
+                rows.append(entry)
+        if rows:
+            conn.execute(entries.insert(), rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    print("Starting database migration...")
+    try:
+        count = create_auction_entries()
+        print(f"✅ Migrated {count} rows into 'auction_entries' table")
+        print("Migration completed successfully!")
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise
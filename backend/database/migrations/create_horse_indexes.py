@@ -0,0 +1,50 @@
+import os
+import sys
+
+from sqlalchemy import text
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from backend.database.models import Horse, engine as default_engine
+
+
+def create_horse_indexes(engine=None) -> list:
+    """horsesテーブルにモデルで定義したインデックス（正規化した馬名の式インデックスを含む）を作成する
+
+    既にあるインデックスは作成しないため、何度実行してもよい。
+    作成後に ANALYZE を実行し、クエリプランナーが統計を使えるようにする。
+
+    Returns:
+        list: 作成したインデックスの名前
+    """
+    engine = engine or default_engine
+    # 式インデックスはリフレクションで取得できないため、sqlite_master から名前を取得する
+    with engine.connect() as conn:
+        existing = {row[0] for row in conn.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+            {'table': Horse.__tablename__})}
+    created = []
+    for index in sorted(Horse.__table__.indexes, key=lambda index: index.name):
+        if index.name in existing:
+            continue
+        index.create(bind=engine)
+        created.append(index.name)
+    if created:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"ANALYZE {Horse.__tablename__}")
+    return created
+
+
+if __name__ == "__main__":
+    print("Starting database migration...")
+    try:
+        names = create_horse_indexes()
+        for name in names:
+            print(f"✅ Created index '{name}' on 'horses' table")
+        if not names:
+            print("ℹ️ All indexes already exist on 'horses' table")
+        print("Migration completed successfully!")
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise
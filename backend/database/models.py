@@ -1,14 +1,36 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, create_engine
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, Float, Text, DateTime, UniqueConstraint, column, func, literal_column
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import relationship, sessionmaker
 from datetime import datetime
 import os
 
+from .sqlite_profile import SqliteProfile, create_engines
+
 Base = declarative_base()
 
+def normalize_name(name: str) -> str:
+    """馬名の正規化（半角・全角スペースを除く）。normalized_name() と同じ結果になる"""
+    return (name or '').replace(' ', '').replace('\u3000', '')
+
+def normalized_name(column):
+    """馬名を正規化するSQL式（インデックスと検索で同じ式を使うため、文字はバインド変数にしない）"""
+    return func.replace(func.replace(column, literal_column("' '"), literal_column("''")),
+                        literal_column("'\u3000'"), literal_column("''"))
+
 # sex, seller, sold_price, commentを履歴（配列/JSON文字列）で保存
 class Horse(Base):
     __tablename__ = 'horses'
+    __table_args__ = (
+        Index('ix_horses_name', 'name'),
+        # 正規化した馬名での検索用（式インデックス）
+        Index('ix_horses_name_key', normalized_name(column('name'))),
+        Index('ix_horses_created_at', 'created_at'),
+        Index('ix_horses_updated_at', 'updated_at'),
+        Index('ix_horses_sire', 'sire'),
+        Index('ix_horses_dam_sire', 'dam_sire'),
+        Index('ix_horses_total_prize', 'total_prize_start', 'total_prize_latest'),
+        Index('ix_horses_total_prize_latest', 'total_prize_latest'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), nullable=False)  # 馬名（カタカナのみ）
@@ -32,16 +54,53 @@ class Horse(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # 出品履歴（1回の出品につき1行）。日付・価格での検索や集計はこちらを使う
+    auction_entries = relationship('AuctionEntry', back_populates='horse', order_by='AuctionEntry.auction_date',
+                                   cascade='all, delete-orphan')
+
+# 出品履歴（horsesの履歴カラムを正規化したもの）
+class AuctionEntry(Base):
+    __tablename__ = 'auction_entries'
+    __table_args__ = (
+        UniqueConstraint('horse_id', 'auction_date', name='uq_auction_entries_horse_date'),
+        Index('ix_auction_entries_auction_date', 'auction_date'),
+        Index('ix_auction_entries_sold_price', 'sold_price'),
+        Index('ix_auction_entries_seller', 'seller'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    horse_id = Column(Integer, ForeignKey('horses.id', ondelete='CASCADE'), nullable=False)
+    auction_date = Column(String(10), nullable=False)  # 開催日（YYYY-MM-DD）
+    age = Column(Integer)  # 出品時の年齢
+    sex = Column(String(10))  # 出品時の性別
+    seller = Column(String(100))  # 販売申込者
+    sold_price = Column(Integer)  # 落札価格（主取り・不明はNULL）
+    unsold = Column(Boolean, default=False)  # 主取り
+    comment = Column(Text)  # 出品時のコメント
+
+    horse = relationship('Horse', back_populates='auction_entries')
+
 # データベース設定
 # プロジェクトルートの絶対パスを取得
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DB_PATH = os.path.join(BASE_DIR, 'data', 'horses.db')
 DATABASE_URL = f"sqlite:///{DB_PATH}"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# 書き込み用（取り込みジョブ・更新API、1接続）と参照用（API の検索、query_only の接続プール）
+# 接続ごとの PRAGMA（WAL など）は sqlite_profile を参照
+engine, read_engine = create_engines(DATABASE_URL, SqliteProfile.from_env())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 def get_db():
     db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db():
+    """参照専用のセッション（書き込みを行うとエラーになる）"""
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
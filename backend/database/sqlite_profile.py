@@ -0,0 +1,129 @@
+"""
+SQLiteの接続設定（チューニングプロファイル）と読み書き別のエンジン
+- 接続ごとに PRAGMA を設定する（engine の connect イベント）
+    journal_mode=WAL      : 書き込み中も読み込みがブロックされない
+    synchronous=NORMAL    : WAL では NORMAL でもコミット済みのデータは壊れない
+    mmap_size / cache_size: 読み込みをメモリマップ・ページキャッシュで行う
+    temp_store=MEMORY     : 並べ替えなどの一時データをメモリに置く
+    busy_timeout          : ロック待ちですぐに "database is locked" にしない
+- API の参照用には query_only の接続プール、取り込みジョブの書き込み用には1接続だけのエンジンを作る
+  （SQLite の書き込みは同時に1つだけなので、書き込み側はプールで順番待ちをする）
+- 設定は環境変数で変えられる（SQLITE_TUNING=0 で PRAGMA を設定しない）
+    SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE,
+    SQLITE_TEMP_STORE, SQLITE_BUSY_TIMEOUT_MS, SQLITE_READ_POOL_SIZE
+
+使用例:
+  profile = SqliteProfile.from_env()
+  write_engine, read_engine = create_engines(DATABASE_URL, profile)
+"""
+import os
+from typing import List, Optional, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_READ_POOL_SIZE = 5
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"警告: {name} が整数ではないため既定値 {default} を使います: {value}")
+        return default
+
+
+class SqliteProfile:
+    """接続ごとに設定する PRAGMA の値
+
+    Args:
+        journal_mode: ジャーナルモード（WAL / DELETE など）
+        synchronous: 同期モード（NORMAL / FULL など）
+        mmap_size: メモリマップするサイズ（バイト、0で無効）
+        cache_size: ページキャッシュ（負の値はKiB単位）
+        temp_store: 一時データの置き場所（MEMORY / FILE / DEFAULT）
+        busy_timeout_ms: ロック待ちの上限（ミリ秒）
+        enabled: False の場合は PRAGMA を設定しない（SQLite の既定値のまま）
+    """
+
+    def __init__(self, journal_mode: str = 'WAL', synchronous: str = 'NORMAL',
+                 mmap_size: int = 256 * 1024 * 1024, cache_size: int = -64 * 1024,
+                 temp_store: str = 'MEMORY', busy_timeout_ms: int = 5000, enabled: bool = True):
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self.temp_store = temp_store
+        self.busy_timeout_ms = busy_timeout_ms
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls) -> 'SqliteProfile':
+        """環境変数から作成する（未設定の項目は既定値）"""
+        default = cls()
+        return cls(
+            journal_mode=os.getenv('SQLITE_JOURNAL_MODE') or default.journal_mode,
+            synchronous=os.getenv('SQLITE_SYNCHRONOUS') or default.synchronous,
+            mmap_size=_env_int('SQLITE_MMAP_SIZE', default.mmap_size),
+            cache_size=_env_int('SQLITE_CACHE_SIZE', default.cache_size),
+            temp_store=os.getenv('SQLITE_TEMP_STORE') or default.temp_store,
+            busy_timeout_ms=_env_int('SQLITE_BUSY_TIMEOUT_MS', default.busy_timeout_ms),
+            enabled=os.getenv('SQLITE_TUNING', '1').lower() not in ('0', 'false', 'off', 'no'),
+        )
+
+    def pragmas(self, read_only: bool = False) -> List[str]:
+        """接続時に実行する PRAGMA 文を返す"""
+        statements = []
+        if self.enabled:
+            statements += [
+                f"PRAGMA journal_mode={self.journal_mode}",
+                f"PRAGMA synchronous={self.synchronous}",
+                f"PRAGMA mmap_size={int(self.mmap_size)}",
+                f"PRAGMA cache_size={int(self.cache_size)}",
+                f"PRAGMA temp_store={self.temp_store}",
+            ]
+        # ロック待ちは PRAGMA を無効にしても設定する（ドライバーの既定値と同じ扱い）
+        statements.append(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        if read_only:
+            statements.append("PRAGMA query_only=ON")
+        return statements
+
+    def apply(self, engine: Engine, read_only: bool = False) -> Engine:
+        """engine の新しい接続に PRAGMA を設定するイベントを登録する"""
+        statements = self.pragmas(read_only)
+
+        @event.listens_for(engine, 'connect')
+        def _set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for statement in statements:
+                    cursor.execute(statement)
+            finally:
+                cursor.close()
+
+        return engine
+
+
+def create_engines(url: str, profile: Optional[SqliteProfile] = None,
+                   read_pool_size: Optional[int] = None) -> Tuple[Engine, Engine]:
+    """書き込み用（1接続）と参照用（query_only の接続プール）のエンジンを作る
+
+    Returns:
+        Tuple[Engine, Engine]: (書き込み用, 参照用)
+    """
+    profile = profile or SqliteProfile.from_env()
+    if read_pool_size is None:
+        read_pool_size = _env_int('SQLITE_READ_POOL_SIZE', DEFAULT_READ_POOL_SIZE)
+    connect_args = {'check_same_thread': False}
+    # 書き込みは1接続だけにし、同時に書き込もうとした処理は接続の返却を待つ
+    write_engine = create_engine(url, connect_args=connect_args, poolclass=QueuePool,
+                                 pool_size=1, max_overflow=0)
+    read_engine = create_engine(url, connect_args=connect_args, poolclass=QueuePool,
+                                pool_size=max(1, read_pool_size), max_overflow=0)
+    profile.apply(write_engine)
+    profile.apply(read_engine, read_only=True)
+    return write_engine, read_engine
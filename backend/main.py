@@ -1,15 +1,19 @@
 from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from typing import List, Optional, Union
 from datetime import datetime
 
-from backend.database.models import get_db, Horse
+from backend.database.models import get_db, get_read_db, Horse
+from backend.services.horse_json_cache import dumps
+from backend.services.horse_listing import InvalidQuery, parse_fields
 from backend.services.horse_service import HorseService
 from backend.scheduler.auction_scheduler import scheduler
 from pydantic import BaseModel
-from fastapi.encoders import jsonable_encoder
-import json
+
+# 次のページのカーソルを返すレスポンスヘッダー
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
 app = FastAPI(title="サラブレッドオークション データベース", version="1.0.0")
 
@@ -20,6 +24,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Pydanticモデル
@@ -88,56 +93,51 @@ async def get_horses(
     skip: int = 0,
     limit: int = 100,
     auction_date: Optional[str] = None,
-    db: Session = Depends(get_db)
+    name: Optional[str] = None,
+    cursor: Optional[str] = None,
+    order_by: str = 'id',
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    """馬データを取得（履歴カラムは配列で返す）"""
-    if auction_date:
-        horses = horse_service.get_horses_by_auction_date(db, auction_date)
-    else:
-        horses = horse_service.get_horses(db, skip=skip, limit=limit)
-    def parse_json_field(val):
-        try:
-            if val is None:
-                return []
-            return json.loads(val)
-        except Exception:
-            return [val] if val else []
-    result = []
-    for horse in horses:
-        result.append({
-            **jsonable_encoder(horse),
-            "sex": parse_json_field(horse.sex),
-            "age": parse_json_field(horse.age),
-            "sold_price": parse_json_field(horse.sold_price),
-            "auction_date": parse_json_field(horse.auction_date),
-            "seller": parse_json_field(horse.seller),
-            "comment": parse_json_field(horse.comment),
-        })
-    return result
+    """馬データを取得（履歴カラムは配列で返す）
+
+    - cursor: 前のページのレスポンスヘッダー X-Next-Cursor の値（最後のページではヘッダーを返さない）
+    - order_by: id（昇順）または updated_at（新しい順）
+    - fields: 返す項目をカンマ区切りで指定（例: fields=id,name,sold_price）
+    - skip: 既存のクライアント用（cursor を指定した場合は使わない）
+    """
+    offset = 0 if cursor else skip
+    try:
+        if fields:
+            horses, next_cursor = horse_service.list_horses(
+                db, limit=limit, cursor=cursor, order_by=order_by, fields=parse_fields(fields),
+                auction_date=auction_date, name=name, offset=offset)
+            body = dumps(horses)
+        else:
+            # 全項目の場合は、キャッシュした1頭分のJSONをつなげて返す
+            body, next_cursor = horse_service.list_horses_json(
+                db, limit=limit, cursor=cursor, order_by=order_by,
+                auction_date=auction_date, name=name, offset=offset)
+    except InvalidQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # 作ったJSONをそのまま返す（ORM オブジェクトの変換とレスポンスモデルの検証を行わない）
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(body, media_type="application/json", headers=headers)
 
 @app.get("/horses/{horse_id}", response_model=HorseResponse)
-async def get_horse(horse_id: int, db: Session = Depends(get_db)):
+async def get_horse(horse_id: int, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
     """特定の馬データを取得（履歴カラムは配列で返す）"""
-    horse = horse_service.get_horse_by_id(db, horse_id)
-    if not horse:
+    try:
+        if fields:
+            horse = horse_service.get_horse_fields(db, horse_id, parse_fields(fields))
+            body = dumps(horse) if horse else None
+        else:
+            body = horse_service.get_horse_json(db, horse_id)
+    except InvalidQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if body is None:
         raise HTTPException(status_code=404, detail="馬が見つかりません")
-    # 履歴カラムを配列で返す
-    def parse_json_field(val):
-        try:
-            if val is None:
-                return []
-            return json.loads(val)
-        except Exception:
-            return [val] if val else []
-    return {
-        **jsonable_encoder(horse),
-        "sex": parse_json_field(horse.sex),
-        "age": parse_json_field(horse.age),
-        "sold_price": parse_json_field(horse.sold_price),
-        "auction_date": parse_json_field(horse.auction_date),
-        "seller": parse_json_field(horse.seller),
-        "comment": parse_json_field(horse.comment),
-    }
+    return Response(body, media_type="application/json")
 
 @app.post("/horses/", response_model=HorseResponse)
 async def create_horse(horse_data: HorseCreate, db: Session = Depends(get_db)):
@@ -194,15 +194,22 @@ async def update_prize_money(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"賞金更新に失敗: {str(e)}")
 
 @app.get("/statistics/", response_model=StatisticsResponse)
-async def get_statistics(db: Session = Depends(get_db)):
+async def get_statistics(db: Session = Depends(get_read_db)):
     """統計情報を取得"""
     return horse_service.get_statistics(db)
 
 @app.get("/auction-dates/")
-async def get_auction_dates(db: Session = Depends(get_db)):
+async def get_auction_dates(db: Session = Depends(get_read_db)):
     """開催日の一覧を取得"""
-    dates = db.query(Horse.auction_date).distinct().all()
-    return [date[0] for date in dates if date[0]]
+    return horse_service.get_auction_dates(db)
+
+@app.get("/cache/metrics")
+async def get_cache_metrics():
+    """キャッシュのヒット率などを取得"""
+    return {
+        "results": horse_service.result_cache.metrics(),
+        "horse_json": horse_service.json_cache.metrics(),
+    }
 
 @app.post("/scheduler/start")
 async def start_scheduler():
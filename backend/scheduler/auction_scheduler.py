@@ -3,7 +3,7 @@ import time
 import threading
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from backend.database.models import get_db, SessionLocal
+from backend.database.models import get_db, ReadSessionLocal, SessionLocal
 from backend.services.horse_service import HorseService
 import logging
 
@@ -45,8 +45,8 @@ class AuctionScheduler:
         if not auction_date:
             return False
             
-        # データベースに既にデータがあるかチェック
-        db = SessionLocal()
+        # データベースに既にデータがあるかチェック（参照のみなので書き込み用の接続は使わない）
+        db = ReadSessionLocal()
         try:
             existing_horses = self.horse_service.get_horses_by_auction_date(db, auction_date)
             return len(existing_horses) == 0
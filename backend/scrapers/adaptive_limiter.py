@@ -0,0 +1,147 @@
+"""
+asyncio用の適応型レートリミッター
+- 同時実行数とリクエスト開始間隔の両方を制限する
+- 429/5xx・通信エラーを受けたら同時実行数を半分にし、開始間隔を広げる（Retry-After があればそれに従う）
+- 応答時間が目標以内のリクエストが続いたら同時実行数を1つ増やし、開始間隔を縮める（AIMD）
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+DEFAULT_INITIAL = 2
+DEFAULT_MAXIMUM = 6
+DEFAULT_MIN_INTERVAL = 0.5
+DEFAULT_MAX_INTERVAL = 30.0
+DEFAULT_TARGET_LATENCY = 2.0
+
+
+class AdaptiveLimiter:
+    """同時実行数と開始間隔を応答に合わせて調整するリミッター
+
+    Args:
+        initial: 同時実行数の初期値
+        minimum: 同時実行数の下限
+        maximum: 同時実行数の上限
+        min_interval: リクエスト開始間隔の下限（秒）
+        max_interval: リクエスト開始間隔の上限（秒）
+        target_latency: 正常とみなす応答時間（秒）
+    """
+
+    def __init__(self, initial: int = DEFAULT_INITIAL, minimum: int = 1, maximum: int = DEFAULT_MAXIMUM,
+                 min_interval: float = DEFAULT_MIN_INTERVAL, max_interval: float = DEFAULT_MAX_INTERVAL,
+                 target_latency: float = DEFAULT_TARGET_LATENCY):
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError("1 <= minimum <= initial <= maximum となるように指定してください")
+        if not 0 <= min_interval <= max_interval:
+            raise ValueError("0 <= min_interval <= max_interval となるように指定してください")
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._healthy = 0
+        self._next_start = 0.0
+        self._condition: Optional[asyncio.Condition] = None
+        self._counters = {'requests': 0, 'throttled': 0, 'slow': 0, 'increases': 0, 'decreases': 0}
+
+    @classmethod
+    def from_env(cls) -> 'AdaptiveLimiter':
+        """環境変数（SCRAPER_JBIS_CONCURRENCY, SCRAPER_JBIS_MIN_INTERVAL）から作成"""
+        maximum = int(os.getenv('SCRAPER_JBIS_CONCURRENCY', DEFAULT_MAXIMUM))
+        return cls(
+            initial=min(DEFAULT_INITIAL, maximum),
+            maximum=maximum,
+            min_interval=float(os.getenv('SCRAPER_JBIS_MIN_INTERVAL', DEFAULT_MIN_INTERVAL)),
+        )
+
+    def _loop_time(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    @asynccontextmanager
+    async def slot(self):
+        """リクエスト枠を確保する（async with で使用）"""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        condition = self._condition
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self._counters['requests'] += 1
+            now = self._loop_time()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        try:
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+        finally:
+            async with condition:
+                self.in_flight -= 1
+                condition.notify_all()
+
+    def record_success(self, latency: float) -> None:
+        """正常な応答を記録する（応答時間が目標以内なら徐々に速くする）"""
+        if latency > self.target_latency:
+            # 応答が遅い場合は同時実行数を1つ減らす
+            self._healthy = 0
+            self._counters['slow'] += 1
+            self._set_limit(self.limit - 1)
+            return
+        self._healthy += 1
+        if self._healthy >= self.limit:
+            self._healthy = 0
+            self._set_limit(self.limit + 1)
+            self.interval = max(self.min_interval, self.interval * 0.8)
+
+    def record_throttle(self, retry_after: Optional[float] = None) -> None:
+        """429/5xx・通信エラーを記録する（同時実行数を半分にし、開始間隔を広げる）"""
+        self._healthy = 0
+        self._counters['throttled'] += 1
+        self._set_limit(self.limit // 2)
+        self.interval = min(self.max_interval, max(self.interval * 2, self.min_interval or 0.1))
+        pause = retry_after if retry_after is not None else self.interval
+        try:
+            self._next_start = max(self._next_start, self._loop_time() + min(pause, self.max_interval))
+        except RuntimeError:
+            # イベントループ外から呼ばれた場合は開始時刻を調整しない
+            pass
+
+    def _set_limit(self, limit: int) -> None:
+        limit = max(self.minimum, min(self.maximum, limit))
+        increased = limit > self.limit
+        if increased:
+            self._counters['increases'] += 1
+        elif limit < self.limit:
+            self._counters['decreases'] += 1
+        self.limit = limit
+        if increased and self._condition is not None:
+            # 上限が増えた場合は待機中のタスクを起こす
+            try:
+                asyncio.get_running_loop().create_task(self._notify())
+            except RuntimeError:
+                pass
+
+    async def _notify(self) -> None:
+        async with self._condition:
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, float]:
+        """リクエスト数・調整回数と現在の同時実行数・開始間隔を返す"""
+        return dict(self._counters, limit=self.limit, interval=round(self.interval, 3),
+                    peak_in_flight=self.peak_in_flight)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After ヘッダー（秒数）を解釈する（日付形式などは None）"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
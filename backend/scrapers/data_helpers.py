@@ -7,6 +7,8 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional, Union
 import uuid
 
+from backend.scrapers.record_index import RecordIndex
+
 def load_json_file(file_path: str) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
     """JSONファイルを読み込む
     
@@ -38,18 +40,43 @@ def save_json_file(file_path: str, data: Any) -> None:
     # ディレクトリが存在しない場合は作成
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
     
-    with open(file_path, 'w', encoding='utf-8') as f:
+    # 一時ファイルに書き出してから置き換え、書き込み途中のファイルを読まれないようにする
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, file_path)
+
+def horse_name_age_key(horse: Dict[str, Any]) -> List[tuple]:
+    """馬の検索キー（名前, 年齢）"""
+    return [(horse.get('name'), horse.get('age'))]
+
+def auction_history_key(entry: Dict[str, Any]) -> List[tuple]:
+    """オークション履歴の検索キー（馬ID, オークション日）"""
+    return [(entry.get('horse_id'), entry.get('auction_date'))]
+
+def build_horse_index(horses: List[Dict[str, Any]]) -> RecordIndex:
+    """find_horse_by_name_and_age 用の索引を作成する"""
+    return RecordIndex(horses, horse_name_age_key)
+
+def build_auction_history_index(history: List[Dict[str, Any]]) -> RecordIndex:
+    """find_auction_history 用の索引を作成する"""
+    return RecordIndex(history, auction_history_key)
 
-def find_horse_by_name_and_age(horses: List[Dict[str, Any]], name: str, age: int) -> Optional[Dict[str, Any]]:
-    """名前と年齢で馬を検索"""
+def find_horse_by_name_and_age(horses: List[Dict[str, Any]], name: str, age: int,
+                               index: Optional[RecordIndex] = None) -> Optional[Dict[str, Any]]:
+    """名前と年齢で馬を検索（index を指定した場合は索引を引く）"""
+    if index is not None:
+        return index.find((name, age))
     for horse in horses:
         if horse.get('name') == name and horse.get('age') == age:
             return horse
     return None
 
-def find_auction_history(history: List[Dict[str, Any]], horse_id: str, auction_date: str) -> Optional[Dict[str, Any]]:
-    """馬IDとオークション日で履歴を検索"""
+def find_auction_history(history: List[Dict[str, Any]], horse_id: str, auction_date: str,
+                         index: Optional[RecordIndex] = None) -> Optional[Dict[str, Any]]:
+    """馬IDとオークション日で履歴を検索（index を指定した場合は索引を引く）"""
+    if index is not None:
+        return index.find((horse_id, auction_date))
     for entry in history:
         if entry.get('horse_id') == horse_id and entry.get('auction_date') == auction_date:
             return entry
@@ -63,22 +90,8 @@ def merge_disease_tags(existing_tags: List[str], new_tags: List[str]) -> List[st
         return existing_tags
     return list(set(existing_tags + new_tags))
 
-def save_horse(horse_data: Dict[str, Any], data_dir: str = 'static-frontend/public/data') -> str:
-    """馬情報を保存し、馬IDを返す
-    
-    Args:
-        horse_data: 保存する馬情報の辞書
-        data_dir: データディレクトリのパス
-        
-    Returns:
-        str: 馬の一意識別子（UUID）
-        
-    Raises:
-        ValueError: 必須フィールドが不足している場合
-    """
-    horses_file = os.path.join(data_dir, 'horses.json')
-    data = load_json_file(horses_file)
-    
+def normalize_horses_data(data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """horses.jsonの内容を新しい形式 {'metadata': ..., 'horses': [...]} に揃える"""
     # 古い形式の場合は新しい形式に変換
     if isinstance(data, list):
         data = {
@@ -89,7 +102,20 @@ def save_horse(horse_data: Dict[str, Any], data_dir: str = 'static-frontend/publ
             },
             "horses": data
         }
+    return data
+
+def merge_horse(data: Dict[str, Any], horse_data: Dict[str, Any],
+                index: Optional[RecordIndex] = None) -> Dict[str, Any]:
+    """馬情報をhorses.jsonのデータ（メモリ上）に反映し、追加・更新した馬のレコードを返す
     
+    Args:
+        data: normalize_horses_data() で揃えたhorses.jsonのデータ（更新される）
+        horse_data: 保存する馬情報の辞書
+        index: data['horses'] の build_horse_index() 索引（指定した場合は追加した馬も反映する）
+        
+    Returns:
+        Dict[str, Any]: 追加または更新された馬のレコード（'id' を含む）
+    """
     horses = data.get('horses', [])
     
     # 必須フィールドのバリデーション
@@ -101,18 +127,15 @@ def save_horse(horse_data: Dict[str, Any], data_dir: str = 'static-frontend/publ
     
     # 既存の馬を検索
     existing_horse = find_horse_by_name_and_age(
-        horses, horse_data['name'], horse_data['age']
+        horses, horse_data['name'], horse_data['age'], index
     )
     
     now = datetime.now().isoformat()
-    horse_id = None
     
     if existing_horse:
         # 既存の馬情報を更新
         if 'id' not in existing_horse:
             existing_horse['id'] = str(uuid.uuid4())
-            
-        horse_id = existing_horse['id']
         
         # 更新するフィールドをマージ
         update_fields = {
@@ -140,6 +163,7 @@ def save_horse(horse_data: Dict[str, Any], data_dir: str = 'static-frontend/publ
         
         # 既存の馬情報を更新
         existing_horse.update(update_fields)
+        record = existing_horse
     else:
         # 新規の馬を追加
         horse_id = str(uuid.uuid4())
@@ -169,6 +193,9 @@ def save_horse(horse_data: Dict[str, Any], data_dir: str = 'static-frontend/publ
             'updated_at': now
         }
         horses.append(new_horse)
+        record = new_horse
+        if index is not None:
+            index.sync()
     
     # メタデータを更新
     data['metadata'] = {
@@ -176,27 +203,47 @@ def save_horse(horse_data: Dict[str, Any], data_dir: str = 'static-frontend/publ
         'total_horses': len(horses),
         'version': data.get('metadata', {}).get('version', '1.1.0')  # バージョンを更新
     }
+    return record
+
+def save_horse(horse_data: Dict[str, Any], data_dir: str = 'static-frontend/public/data') -> str:
+    """馬情報を保存し、馬IDを返す
+    
+    1頭ごとにhorses.json全体を読み書きするため、まとめて保存する場合は
+    backend.scrapers.horse_store.HorseDataStore を使用すること。
+    
+    Args:
+        horse_data: 保存する馬情報の辞書
+        data_dir: データディレクトリのパス
+        
+    Returns:
+        str: 馬の一意識別子（UUID）
+        
+    Raises:
+        ValueError: 必須フィールドが不足している場合
+    """
+    horses_file = os.path.join(data_dir, 'horses.json')
+    data = normalize_horses_data(load_json_file(horses_file))
+    record = merge_horse(data, horse_data)
     
     # ファイルに保存
     save_json_file(horses_file, data)
-    return horse_id
+    return record['id']
 
-def save_auction_history(history_data: Dict[str, Any], data_dir: str = 'static-frontend/public/data') -> bool:
-    """オークション履歴を保存し、成功可否を返す
+def merge_auction_history(history: List[Dict[str, Any]], history_data: Dict[str, Any],
+                          index: Optional[RecordIndex] = None) -> Dict[str, Any]:
+    """オークション履歴をauction_history.jsonのデータ（メモリ上）に反映し、追加・更新した履歴を返す
     
     Args:
+        history: auction_history.jsonの履歴リスト（更新される）
         history_data: 保存するオークション履歴データ
-        data_dir: データディレクトリのパス
+        index: history の build_auction_history_index() 索引（指定した場合は追加した履歴も反映する）
         
     Returns:
-        bool: 保存が成功したかどうか
+        Dict[str, Any]: 追加または更新された履歴エントリ
         
     Raises:
         ValueError: 必須フィールドが不足している場合
     """
-    history_file = os.path.join(data_dir, 'auction_history.json')
-    history = load_json_file(history_file)
-    
     # 必須フィールドのバリデーション
     required_fields = ['horse_id', 'auction_date']
     missing_fields = [field for field in required_fields if field not in history_data]
@@ -205,7 +252,7 @@ def save_auction_history(history_data: Dict[str, Any], data_dir: str = 'static-f
     
     # 重複チェック
     existing_entry = find_auction_history(
-        history, history_data['horse_id'], history_data['auction_date']
+        history, history_data['horse_id'], history_data['auction_date'], index
     )
     
     now = datetime.now().isoformat()
@@ -221,13 +268,37 @@ def save_auction_history(history_data: Dict[str, Any], data_dir: str = 'static-f
             'is_unsold': history_data.get('is_unsold', existing_entry.get('is_unsold', False)),
             'comment': history_data.get('comment', existing_entry.get('comment', ''))
         })
-    else:
-        # 新しい履歴を追加
-        history_data.update({
-            'id': str(uuid.uuid4()),
-            'created_at': now
-        })
-        history.append(history_data)
+        return existing_entry
+    
+    # 新しい履歴を追加
+    history_data.update({
+        'id': str(uuid.uuid4()),
+        'created_at': now
+    })
+    history.append(history_data)
+    if index is not None:
+        index.sync()
+    return history_data
+
+def save_auction_history(history_data: Dict[str, Any], data_dir: str = 'static-frontend/public/data') -> bool:
+    """オークション履歴を保存し、成功可否を返す
+    
+    1件ごとにauction_history.json全体を読み書きするため、まとめて保存する場合は
+    backend.scrapers.horse_store.HorseDataStore を使用すること。
+    
+    Args:
+        history_data: 保存するオークション履歴データ
+        data_dir: データディレクトリのパス
+        
+    Returns:
+        bool: 保存が成功したかどうか
+        
+    Raises:
+        ValueError: 必須フィールドが不足している場合
+    """
+    history_file = os.path.join(data_dir, 'auction_history.json')
+    history = load_json_file(history_file)
+    merge_auction_history(history, history_data)
     
     # ファイルに保存
     save_json_file(history_file, history)
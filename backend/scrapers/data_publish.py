@@ -0,0 +1,188 @@
+"""
+静的フロントエンド向けJSONの公開処理
+- 各スクリプトが indent=2 で書き出した JSON を、空白なしの形式（minified）に書き換える
+- 同じ内容を gzip / brotli で圧縮した .gz / .br ファイルを隣に作る（配信側で事前圧縮版を使える）
+  brotli は任意の依存（未インストールの場合は .br を作らず、古い .br は削除する）
+- 任意で、履歴などの辞書の配列を列形式にした <名前>.columnar.json も作る
+    [{"a": 1, "b": 2}, {"a": 3, "b": 4}] -> {"$columns": ["a", "b"], "$rows": [[1, 2], [3, 4]]}
+  列形式にするのは、全要素が同じキーを持つ辞書の配列だけ（from_columnar() で元に戻せる）
+- 開発用に、インデント付きのコピーを別のディレクトリ（既定: data/pretty）に書き出せる
+- 公開前後のファイルサイズを比較するレポートを返す
+
+使用例:
+  reports = publish_data(DEFAULT_DATA_DIR, columnar=True)
+  print(format_report(reports))
+"""
+import gzip
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import brotli
+except ImportError:  # brotliは任意の依存
+    brotli = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DATA_DIR = os.path.join(PROJECT_ROOT, 'static-frontend', 'public', 'data')
+DEFAULT_PRETTY_DIR = os.path.join(PROJECT_ROOT, 'data', 'pretty')
+
+# フロントエンドが読み込むファイル
+PUBLISH_FILES = ('horses_history.json', 'horses.json', 'auction_history.json')
+
+COLUMNAR_SUFFIX = '.columnar.json'
+COLUMNS_KEY = '$columns'
+ROWS_KEY = '$rows'
+
+
+def dumps_minified(data: Any) -> bytes:
+    """空白なしのJSONを返す"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_pretty(data: Any) -> bytes:
+    """各スクリプトと同じインデント付きのJSONを返す"""
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def gzip_bytes(content: bytes) -> bytes:
+    """gzip で圧縮する（内容が同じなら同じバイト列になるよう、時刻は埋め込まない）"""
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def brotli_bytes(content: bytes) -> Optional[bytes]:
+    """brotli で圧縮する（brotli がインストールされていない場合は None）"""
+    if brotli is None:
+        return None
+    return brotli.compress(content, quality=11)
+
+
+def _is_table(value: Any) -> bool:
+    if not isinstance(value, list) or not value or not all(isinstance(item, dict) for item in value):
+        return False
+    keys = set(value[0])
+    return all(set(item) == keys for item in value[1:])
+
+
+def to_columnar(value: Any) -> Any:
+    """全要素が同じキーを持つ辞書の配列を列形式に変換する（入れ子の配列も変換する）"""
+    if _is_table(value):
+        columns = list(value[0])
+        return {COLUMNS_KEY: columns, ROWS_KEY: [[to_columnar(item[c]) for c in columns] for item in value]}
+    if isinstance(value, list):
+        return [to_columnar(item) for item in value]
+    if isinstance(value, dict):
+        return {k: to_columnar(v) for k, v in value.items()}
+    return value
+
+
+def from_columnar(value: Any) -> Any:
+    """to_columnar() で変換した値を元に戻す"""
+    if isinstance(value, dict):
+        if set(value) == {COLUMNS_KEY, ROWS_KEY}:
+            columns = value[COLUMNS_KEY]
+            return [{c: from_columnar(v) for c, v in zip(columns, row)} for row in value[ROWS_KEY]]
+        return {k: from_columnar(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [from_columnar(item) for item in value]
+    return value
+
+
+def _write_bytes(path: str, content: bytes) -> None:
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _write_compressed(path: str, content: bytes) -> Dict[str, Optional[int]]:
+    """path.gz / path.br を書き出し、それぞれのサイズを返す"""
+    gz = gzip_bytes(content)
+    _write_bytes(path + '.gz', gz)
+    br = brotli_bytes(content)
+    if br is not None:
+        _write_bytes(path + '.br', br)
+    elif os.path.exists(path + '.br'):
+        # 古い内容の .br が配信されないように削除する
+        os.remove(path + '.br')
+    return {'gzip': len(gz), 'brotli': len(br) if br is not None else None}
+
+
+def publish_file(path: str, columnar: bool = False, pretty_dir: Optional[str] = None) -> Dict[str, Any]:
+    """1ファイルを公開用に書き換える
+
+    Args:
+        path: 公開するJSONファイル（空白なしの形式に置き換える）
+        columnar: True の場合は列形式の <名前>.columnar.json も作る
+        pretty_dir: 指定した場合は、このディレクトリにインデント付きのコピーを書き出す
+
+    Returns:
+        Dict: サイズのレポート（before / minified / gzip / brotli、列形式の場合は columnar_* も含む）
+    """
+    with open(path, 'rb') as f:
+        original = f.read()
+    data = json.loads(original.decode('utf-8'))
+
+    minified = dumps_minified(data)
+    if minified != original:
+        _write_bytes(path, minified)
+    report = {'file': os.path.basename(path), 'before': len(original), 'minified': len(minified)}
+    report.update(_write_compressed(path, minified))
+
+    if columnar:
+        columnar_path = path[:-len('.json')] + COLUMNAR_SUFFIX if path.endswith('.json') else path + COLUMNAR_SUFFIX
+        encoded = dumps_minified(to_columnar(data))
+        _write_bytes(columnar_path, encoded)
+        sizes = _write_compressed(columnar_path, encoded)
+        report.update({'columnar': len(encoded), 'columnar_gzip': sizes['gzip'], 'columnar_brotli': sizes['brotli']})
+
+    if pretty_dir:
+        os.makedirs(pretty_dir, exist_ok=True)
+        _write_bytes(os.path.join(pretty_dir, os.path.basename(path)), dumps_pretty(data))
+    return report
+
+
+def publish_data(data_dir: str = DEFAULT_DATA_DIR, names: Iterable[str] = PUBLISH_FILES,
+                 columnar: bool = False, pretty_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """data_dir のファイルをまとめて公開用に書き換える（存在しないファイルは飛ばす）"""
+    reports = []
+    for name in names:
+        path = os.path.join(data_dir, name)
+        if not os.path.exists(path):
+            print(f"スキップ（ファイルがありません）: {path}")
+            continue
+        reports.append(publish_file(path, columnar=columnar, pretty_dir=pretty_dir))
+    return reports
+
+
+def _size(value: Optional[int]) -> str:
+    if value is None:
+        return '-'
+    return f"{value / 1024:,.1f}KB"
+
+
+def _ratio(value: Optional[int], base: int) -> str:
+    if value is None or not base:
+        return ''
+    return f" ({value / base * 100:.0f}%)"
+
+
+def format_report(reports: List[Dict[str, Any]]) -> str:
+    """公開前後のサイズを比較する表を返す（括弧内は公開前に対する割合）"""
+    columns = ['minified', 'gzip', 'brotli']
+    if any('columnar' in report for report in reports):
+        columns += ['columnar', 'columnar_gzip', 'columnar_brotli']
+    lines = ['\t'.join(['file', 'before'] + columns)]
+    totals = {key: 0 for key in ['before'] + columns}
+    for report in reports:
+        cells = [report['file'], _size(report['before'])]
+        for key in columns:
+            value = report.get(key)
+            cells.append(_size(value) + _ratio(value, report['before']))
+            totals[key] = None if value is None or totals[key] is None else totals[key] + value
+        totals['before'] += report['before']
+        lines.append('\t'.join(cells))
+    if len(reports) > 1:
+        lines.append('\t'.join(['合計', _size(totals['before'])]
+                               + [_size(totals[key]) + _ratio(totals[key], totals['before']) for key in columns]))
+    return '\n'.join(lines)
@@ -0,0 +1,64 @@
+"""
+楽天競馬オークション詳細ページの抽出パターン
+- 各パターンはここで1度だけコンパイルされ、DETAIL_PATTERNS に登録される
+- アンカー（パターンの先頭文字列）を持つパターンはページごとに1度だけまとめて検索する
+"""
+import re
+
+from backend.scrapers.extractors.registry import PatternRegistry
+
+DETAIL_PATTERNS = PatternRegistry()
+
+# 血統名の値（空白で始まらず、改行・コロンを含まない）
+_NAME_VALUE = r'[^\n\r\s][^\n\r：:]*'
+
+# 馬名 + スペース + 性別 + 年齢 + "歳"（例: "アイドルフェスタ　　牝３歳"）
+DETAIL_PATTERNS.register('name_sex_age', r'(?P<name>[^\n\r\t]+?)\s+(?P<sex>[牡牝セ])\s*(?P<age>\d+)歳')
+
+# 落札価格（例: "2,000,000円(税込 2,200,000円)"）と、フォールバックの税込価格
+DETAIL_PATTERNS.register('sold_price', r'(?P<price>\d{1,3}(?:,\d{3})*)円\(税込\s*(?P<price_with_tax>\d{1,3}(?:,\d{3})*)円\)')
+DETAIL_PATTERNS.register('sold_price_with_tax', r'税込\s*(?P<price_with_tax>\d{1,3}(?:,\d{3})*)円', anchors=('税込',))
+
+# 血統: 「父：XXX 母：YYY 母の父：ZZZ」を一度に抽出し、失敗した場合は個別に抽出する
+DETAIL_PATTERNS.register(
+    'pedigree',
+    rf'父[：:](?P<sire>{_NAME_VALUE})[\s\u3000]*母[：:](?P<dam>{_NAME_VALUE})[\s\u3000]*(?:母の?父|母父)[：:](?P<damsire>{_NAME_VALUE})',
+    anchors=('父：', '父:'),
+)
+DETAIL_PATTERNS.register('sire', rf'父[：:](?P<sire>{_NAME_VALUE})', anchors=('父：', '父:'))
+DETAIL_PATTERNS.register('dam', rf'母[：:](?P<dam>{_NAME_VALUE})', anchors=('母：', '母:'))
+DETAIL_PATTERNS.register('damsire', rf'(?:母の?父|母父)[：:](?P<damsire>{_NAME_VALUE})', anchors=('母父', '母の父'))
+# 血統ブロック（「父：」から「母の父：」の行末まで）
+DETAIL_PATTERNS.register(
+    'pedigree_section', r'(?P<section>父[：:].*?(?:母の?父|母父)[：:].*?[\n\r])',
+    anchors=('父：', '父:'), flags=re.DOTALL,
+)
+
+# 馬体重・成績（例: "最終出走馬体重：480kg", "通算成績：24戦4勝［4-6-2-12］"）
+DETAIL_PATTERNS.register('weight', r'最終出走馬体重[：:]\s*(?P<weight>\d+)kg', anchors=('最終出走馬体重',))
+DETAIL_PATTERNS.register('race_record', r'通算成績[：:]\s*(?P<race_record>\d+戦\d+勝［\d+-\d+-\d+-\d+］)', anchors=('通算成績',))
+
+# 獲得賞金（総獲得賞金がなければ中央・地方の合計）
+DETAIL_PATTERNS.register('total_prize', r'総獲得賞金[：:]\s*(?P<prize>[\d,.]+)万?円', anchors=('総獲得賞金',))
+DETAIL_PATTERNS.register('central_prize', r'中央獲得賞金[：:]\s*(?P<prize>[\d,.]+)万?円', anchors=('中央獲得賞金',))
+DETAIL_PATTERNS.register('local_prize', r'地方獲得賞金[：:]\s*(?P<prize>[\d,.]+)万?円', anchors=('地方獲得賞金',))
+
+# 「本馬について」の後のコメント本文
+DETAIL_PATTERNS.register(
+    'comment', r'本馬について(?P<comment>.+?)(?=\n\n|\n販売申込者|$)',
+    anchors=('本馬について',), flags=re.DOTALL,
+)
+
+# 「販売申込者：」の行
+DETAIL_PATTERNS.register('seller', r'販売申込者[：:]\s*(?P<seller>[^\n]+)', anchors=('販売申込者',))
+
+# 値の後処理に使うパターン
+INVOICE_NOTE_PATTERN = re.compile(r'\s*[(（]インボイス登録あり[)）]')
+DAM_SIRE_NOTE_PATTERN = re.compile(r'[（(]母父[：:]')
+
+# 馬名の正規化に使うパターン
+NAME_LABEL_PATTERN = re.compile(r'^\s*(父|母|母の?父|母父)[：:]?\s*', re.IGNORECASE)
+NAME_CONTROL_CHARS_PATTERN = re.compile(r'[\n\r\t]')
+NAME_PARENTHESES_PATTERN = re.compile(r'\s*[(（][^)）]*[)）]')
+NAME_SYMBOLS_PATTERN = re.compile(r'[\*\#\@\!\?\|\/\\]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
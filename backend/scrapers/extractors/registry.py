@@ -0,0 +1,131 @@
+"""
+抽出パターンのレジストリ
+- 正規表現はモジュール読み込み時に1度だけコンパイルする
+- 取得する値は名前付きグループ（フィールド）で表す
+- 先頭の文字列（アンカー）が決まっているパターンは、アンカーの位置からまとめて検索する
+- パターンごとのヒット数・ミス数を記録し、どのフォールバックが使われているかを確認できる
+"""
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+Fields = Dict[str, Optional[str]]
+
+
+class ExtractorPattern:
+    """レジストリに登録された1つの抽出パターン
+
+    Args:
+        name: パターン名（レジストリ内で一意）
+        pattern: 正規表現（値は名前付きグループで取得する）
+        anchors: パターンの先頭になり得る文字列。指定した場合は scan() でまとめて検索される
+        flags: 正規表現のフラグ
+    """
+
+    def __init__(self, name: str, pattern: str, anchors: Sequence[str] = (), flags: int = 0):
+        self.name = name
+        self.pattern = pattern
+        self.anchors = tuple(anchors)
+        self.flags = flags
+        self.regex = re.compile(pattern, flags)
+        self.fields: List[str] = list(self.regex.groupindex)
+        if not self.fields:
+            raise ValueError(f"パターン {name} に名前付きグループがありません")
+
+    def search(self, text: str, pos: int = 0) -> Optional[Fields]:
+        """テキストを検索し、最初のマッチの名前付きフィールドを返す"""
+        match = self.regex.search(text, pos)
+        return match.groupdict() if match else None
+
+
+class PatternRegistry:
+    """抽出パターンのレジストリ
+
+    アンカーを持つパターンは ``scan()`` でまとめて検索される。パターンはアンカーの
+    いずれかで始まる必要があり、最初のアンカーより前にはマッチしないため、
+    ページ全体を ``re.search`` した場合と同じ結果になる。
+    """
+
+    def __init__(self):
+        self._patterns: Dict[str, ExtractorPattern] = {}
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, pattern: str, anchors: Sequence[str] = (), flags: int = 0) -> ExtractorPattern:
+        """パターンを登録する"""
+        if name in self._patterns:
+            raise ValueError(f"パターン {name} は既に登録されています")
+        entry = ExtractorPattern(name, pattern, anchors, flags)
+        self._patterns[name] = entry
+        self._hits[name] = 0
+        self._misses[name] = 0
+        return entry
+
+    def __getitem__(self, name: str) -> ExtractorPattern:
+        return self._patterns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._patterns
+
+    def names(self) -> List[str]:
+        return list(self._patterns)
+
+    def scan(self, text: str) -> Dict[str, Fields]:
+        """アンカー付きパターンをまとめて検索する
+
+        各アンカー文字列の出現位置を1度ずつ求め、各パターンはその位置から検索する。
+        アンカーが見つからないパターンは検索自体を省略する。
+
+        Returns:
+            パターン名 → 最初のマッチの名前付きフィールド（マッチしなかったパターンは含まない）
+        """
+        positions: Dict[str, int] = {}
+        results: Dict[str, Fields] = {}
+        for entry in self._patterns.values():
+            if not entry.anchors:
+                continue
+            start = -1
+            for anchor in entry.anchors:
+                position = positions.get(anchor)
+                if position is None:
+                    position = positions[anchor] = text.find(anchor)
+                if position >= 0 and (start < 0 or position < start):
+                    start = position
+            if start < 0:
+                continue
+            fields = entry.search(text, start)
+            if fields is not None:
+                results[entry.name] = fields
+        return results
+
+    def record(self, name: str, hit: bool) -> None:
+        """パターンの使用結果（ヒット/ミス）を記録する"""
+        with self._lock:
+            if hit:
+                self._hits[name] += 1
+            else:
+                self._misses[name] += 1
+
+    def stats(self, names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, int]]:
+        """パターンごとのヒット数・ミス数を返す"""
+        with self._lock:
+            return {
+                name: {'hits': self._hits[name], 'misses': self._misses[name]}
+                for name in (names or self._patterns)
+            }
+
+    def merge_stats(self, stats: Dict[str, Dict[str, int]]) -> None:
+        """別プロセスで記録したヒット数・ミス数を加算する"""
+        with self._lock:
+            for name, counts in stats.items():
+                if name in self._patterns:
+                    self._hits[name] += counts.get('hits', 0)
+                    self._misses[name] += counts.get('misses', 0)
+
+    def reset_stats(self) -> None:
+        """ヒット数・ミス数をリセットする"""
+        with self._lock:
+            for name in self._patterns:
+                self._hits[name] = 0
+                self._misses[name] = 0
@@ -0,0 +1,172 @@
+"""
+並列フェッチエンジン
+- スレッドプールで複数の詳細ページを同時に取得する
+- ホストごとの同時リクエスト数と最小リクエスト間隔（礼儀予算）を守る
+- imap() は入力順に結果を返し、先行して投入するタスク数を制限する（背圧）
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_IN_FLIGHT = 2
+DEFAULT_MIN_INTERVAL = 0.5
+
+
+class _HostState:
+    """1ホスト分の予算状態"""
+
+    def __init__(self, max_in_flight: int):
+        self.semaphore = threading.BoundedSemaphore(max_in_flight)
+        self.next_start = 0.0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.request_count = 0
+
+
+class PolitenessBudget:
+    """ホストごとの礼儀予算
+
+    Args:
+        max_in_flight: 1ホストあたりの同時リクエスト数の上限
+        min_interval: 同一ホストへのリクエスト開始間隔の最小値（秒）
+    """
+
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, min_interval: float = DEFAULT_MIN_INTERVAL):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight は1以上を指定してください")
+        if min_interval < 0:
+            raise ValueError("min_interval は0以上を指定してください")
+        self.max_in_flight = max_in_flight
+        self.min_interval = min_interval
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'PolitenessBudget':
+        """環境変数（SCRAPER_MAX_IN_FLIGHT, SCRAPER_MIN_INTERVAL）から予算を作成"""
+        return cls(
+            max_in_flight=int(os.getenv('SCRAPER_MAX_IN_FLIGHT', DEFAULT_MAX_IN_FLIGHT)),
+            min_interval=float(os.getenv('SCRAPER_MIN_INTERVAL', DEFAULT_MIN_INTERVAL)),
+        )
+
+    def _host_state(self, host: str) -> _HostState:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = _HostState(self.max_in_flight)
+                self._hosts[host] = state
+            return state
+
+    @contextmanager
+    def slot(self, url: str):
+        """URLのホストに対するリクエスト枠を確保する（with文で使用）"""
+        state = self._host_state(urlparse(url).netloc)
+        state.semaphore.acquire()
+        try:
+            # 実際の開始時刻を基準に間隔を確保する（待機はロック外で行う）
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    wait = state.next_start - now
+                    if wait <= 0:
+                        state.next_start = now + self.min_interval
+                        state.in_flight += 1
+                        state.request_count += 1
+                        state.peak_in_flight = max(state.peak_in_flight, state.in_flight)
+                        break
+                time.sleep(wait)
+
+            try:
+                yield
+            finally:
+                with self._lock:
+                    state.in_flight -= 1
+        finally:
+            state.semaphore.release()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """ホストごとのリクエスト数・最大同時実行数を返す"""
+        with self._lock:
+            return {
+                host: {'requests': state.request_count, 'peak_in_flight': state.peak_in_flight}
+                for host, state in self._hosts.items()
+            }
+
+
+class ConcurrentFetcher:
+    """スレッドプールで処理を並列実行し、完了した順に結果を返す
+
+    実際のリクエストは呼び出し側で ``budget.slot(url)`` を通すことで
+    ホストごとの予算が守られる。
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, budget: Optional[PolitenessBudget] = None):
+        if max_workers < 1:
+            raise ValueError("max_workers は1以上を指定してください")
+        self.max_workers = max_workers
+        self.budget = budget or PolitenessBudget()
+
+    @classmethod
+    def from_env(cls) -> 'ConcurrentFetcher':
+        """環境変数（SCRAPER_MAX_WORKERS ほか）から作成"""
+        return cls(
+            max_workers=int(os.getenv('SCRAPER_MAX_WORKERS', DEFAULT_MAX_WORKERS)),
+            budget=PolitenessBudget.from_env(),
+        )
+
+    def imap_unordered(self, func: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[Tuple[Any, Any, Optional[BaseException]]]:
+        """func(item) を並列実行し、完了順に (item, 結果, 例外) を返す
+
+        例外は呼び出し側に送出せず3番目の要素で返すため、
+        1件の失敗で残りの処理が止まることはない。
+        """
+        items = list(items)
+        if not items:
+            return
+        workers = min(self.max_workers, len(items))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fetcher') as executor:
+            futures = {executor.submit(func, item): item for item in items}
+            try:
+                for future in as_completed(futures):
+                    item = futures[future]
+                    error = future.exception()
+                    yield item, (None if error else future.result()), error
+            finally:
+                # 途中で中断された場合は未着手のタスクを取り消す
+                for future in futures:
+                    future.cancel()
+
+    def imap(self, func: Callable[[Any], Any], items: Iterable[Any],
+             window: Optional[int] = None) -> Iterator[Tuple[Any, Any, Optional[BaseException]]]:
+        """func(item) を並列実行し、入力順に (item, 結果, 例外) を返す
+
+        投入済みで結果を受け取っていないタスクは window 件（既定: max_workers の2倍）までとし、
+        呼び出し側が結果を1件受け取るごとに次の item を投入する。items は必要になった時点で
+        1件ずつ取り出すため、ジェネレーターを渡してもよい。
+        """
+        window = max(1, window or self.max_workers * 2)
+        pending: deque = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetcher') as executor:
+            try:
+                for item in items:
+                    pending.append((item, executor.submit(func, item)))
+                    if len(pending) >= window:
+                        yield _outcome(*pending.popleft())
+                while pending:
+                    yield _outcome(*pending.popleft())
+            finally:
+                # 途中で中断された場合は未着手のタスクを取り消す
+                for _, future in pending:
+                    future.cancel()
+
+
+def _outcome(item: Any, future: Future) -> Tuple[Any, Any, Optional[BaseException]]:
+    """完了を待って (item, 結果, 例外) の組にする"""
+    error = future.exception()
+    return item, (None if error else future.result()), error
@@ -0,0 +1,201 @@
+"""
+horses_history.json の集計値（aggregates）
+- 馬数・履歴数・落札価格の件数と合計・賞金成長率の件数と合計を、
+  オークション日ごと・販売者ごとの内訳とあわせて保持する
+- 馬を1頭マージ・追加・削除するたびに、その馬の変更前後の寄与分だけを差し引き・加算する
+  （全馬を走査し直さないので、1頭あたりの更新は履歴の件数分で済む）
+- metadata の total_horses / average_price はこの集計値から求める
+- verify() で全馬から集計し直した結果と比較し、ずれている項目を返す
+
+使用例:
+  aggregates = HistoryAggregates.load(data)
+  before = aggregates.contribution(horse)
+  merge(horse)
+  aggregates.update(before, aggregates.contribution(horse))
+  data['metadata'].update(aggregates.metadata())
+  data[AGGREGATES_KEY] = aggregates.to_dict()
+"""
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+AGGREGATES_KEY = 'aggregates'
+
+# 販売者が空の履歴を集計するキー
+UNKNOWN_SELLER = ''
+
+# 1頭分の寄与: ([(オークション日, 販売者, 落札価格 or None), ...], 成長率 or None)
+Contribution = Tuple[Tuple[Tuple[str, str, Optional[float]], ...], Optional[float]]
+
+
+def sold_price_of(entry: Dict[str, Any]) -> Optional[float]:
+    """履歴エントリの落札価格を返す（未落札・価格なしの場合は None）"""
+    price = entry.get('sold_price')
+    if not price or entry.get('unsold', False):
+        return None
+    if isinstance(price, str):
+        try:
+            price = float(price.replace(',', ''))
+        except ValueError:
+            return None
+    if isinstance(price, bool) or not isinstance(price, (int, float)) or not price:
+        return None
+    return price
+
+
+def growth_rate_of(horse: Dict[str, Any]) -> Optional[float]:
+    """出品時から最新までの賞金成長率（%）を返す（どちらかの賞金が0以下の場合は None）
+
+    出品時の賞金は最新の履歴の total_prize_start（なければ馬の total_prize_start）を使う。
+    """
+    history = horse.get('history') or []
+    start = history[-1].get('total_prize_start') if history else None
+    if not start:
+        start = horse.get('total_prize_start')
+    latest = horse.get('total_prize_latest')
+    try:
+        start = float(start or 0)
+        latest = float(latest or 0)
+    except (TypeError, ValueError):
+        return None
+    if start <= 0 or latest <= 0:
+        return None
+    return (latest - start) / start * 100
+
+
+def _empty_rollup() -> Dict[str, Any]:
+    return {'entries': 0, 'sold_count': 0, 'sold_sum': 0}
+
+
+def _isclose(a: Any, b: Any) -> bool:
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+    return a == b
+
+
+class HistoryAggregates:
+    """horses_history.json の集計値
+
+    Args:
+        data: 保存されている集計値（to_dict() の形式）。None の場合は空から始める
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        data = data or {}
+        self.horses: int = data.get('horses', 0)
+        self.history_entries: int = data.get('history_entries', 0)
+        self.sold: Dict[str, Any] = dict(data.get('sold') or {'count': 0, 'sum': 0})
+        self.growth: Dict[str, Any] = dict(data.get('growth') or {'count': 0, 'sum': 0})
+        self.by_date: Dict[str, Dict[str, Any]] = {k: dict(v) for k, v in (data.get('by_date') or {}).items()}
+        self.by_seller: Dict[str, Dict[str, Any]] = {k: dict(v) for k, v in (data.get('by_seller') or {}).items()}
+
+    @classmethod
+    def from_horses(cls, horses: Iterable[Dict[str, Any]]) -> 'HistoryAggregates':
+        """全馬から集計し直す"""
+        aggregates = cls()
+        for horse in horses:
+            aggregates.add(horse)
+        return aggregates
+
+    @classmethod
+    def load(cls, data: Dict[str, Any]) -> 'HistoryAggregates':
+        """horses_history.json の内容から読み込む（集計値がない古いファイルは全馬から集計する）"""
+        stored = data.get(AGGREGATES_KEY) if isinstance(data, dict) else None
+        if isinstance(stored, dict):
+            return cls(stored)
+        print("集計値が保存されていないため、全馬から集計します")
+        return cls.from_horses(data.get('horses', []) if isinstance(data, dict) else data)
+
+    @staticmethod
+    def contribution(horse: Optional[Dict[str, Any]]) -> Optional[Contribution]:
+        """1頭分の寄与を返す（マージで馬が書き換わる前に取っておく）"""
+        if horse is None:
+            return None
+        entries = tuple(
+            (entry.get('auction_date') or '', entry.get('seller') or UNKNOWN_SELLER, sold_price_of(entry))
+            for entry in horse.get('history') or []
+        )
+        return entries, growth_rate_of(horse)
+
+    def update(self, before: Optional[Contribution], after: Optional[Contribution]) -> None:
+        """1頭分の寄与を差し替える（追加は before=None、削除は after=None）"""
+        if before is not None:
+            self._apply(before, -1)
+        if after is not None:
+            self._apply(after, 1)
+
+    def add(self, horse: Dict[str, Any]) -> None:
+        """馬を1頭追加する"""
+        self.update(None, self.contribution(horse))
+
+    def remove(self, horse: Dict[str, Any]) -> None:
+        """馬を1頭削除する"""
+        self.update(self.contribution(horse), None)
+
+    def _apply(self, contribution: Contribution, sign: int) -> None:
+        entries, growth = contribution
+        self.horses += sign
+        self.history_entries += sign * len(entries)
+        for auction_date, seller, price in entries:
+            for rollups, key in ((self.by_date, auction_date), (self.by_seller, seller)):
+                rollup = rollups.setdefault(key, _empty_rollup())
+                rollup['entries'] += sign
+                if price is not None:
+                    rollup['sold_count'] += sign
+                    rollup['sold_sum'] += sign * price
+                if rollup['entries'] <= 0:
+                    del rollups[key]
+            if price is not None:
+                self.sold['count'] += sign
+                self.sold['sum'] += sign * price
+        if growth is not None:
+            self.growth['count'] += sign
+            self.growth['sum'] += sign * growth
+
+    @property
+    def average_price(self) -> int:
+        """落札価格の平均（落札がない場合は0）"""
+        return int(self.sold['sum'] / self.sold['count']) if self.sold['count'] > 0 else 0
+
+    @property
+    def average_growth_rate(self) -> float:
+        """賞金成長率の平均（小数第2位まで）"""
+        return round(self.growth['sum'] / self.growth['count'], 2) if self.growth['count'] > 0 else 0
+
+    def metadata(self) -> Dict[str, Any]:
+        """metadata に書く集計値"""
+        return {'total_horses': self.horses, 'average_price': self.average_price}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """horses_history.json の "aggregates" に保存する形式"""
+        return {
+            'horses': self.horses,
+            'history_entries': self.history_entries,
+            'sold': dict(self.sold),
+            'growth': dict(self.growth),
+            'by_date': {k: dict(self.by_date[k]) for k in sorted(self.by_date)},
+            'by_seller': {k: dict(self.by_seller[k]) for k in sorted(self.by_seller)},
+        }
+
+    def diff(self, other: 'HistoryAggregates') -> List[str]:
+        """other と異なる項目を "項目: 自分 != other" の形式で返す（浮動小数点の誤差は無視する）"""
+        differences = []
+        mine, theirs = self.to_dict(), other.to_dict()
+        for key in ('horses', 'history_entries'):
+            if mine[key] != theirs[key]:
+                differences.append(f"{key}: {mine[key]} != {theirs[key]}")
+        for key in ('sold', 'growth'):
+            for field in ('count', 'sum'):
+                if not _isclose(mine[key][field], theirs[key][field]):
+                    differences.append(f"{key}.{field}: {mine[key][field]} != {theirs[key][field]}")
+        for key in ('by_date', 'by_seller'):
+            for group in sorted(set(mine[key]) | set(theirs[key])):
+                a = mine[key].get(group, _empty_rollup())
+                b = theirs[key].get(group, _empty_rollup())
+                for field in ('entries', 'sold_count', 'sold_sum'):
+                    if not _isclose(a[field], b[field]):
+                        differences.append(f"{key}[{group!r}].{field}: {a[field]} != {b[field]}")
+        return differences
+
+    def verify(self, horses: Iterable[Dict[str, Any]]) -> List[str]:
+        """全馬から集計し直し、保存されている集計値とのずれを返す（ずれがなければ空のリスト）"""
+        return self.diff(self.from_horses(horses))
@@ -0,0 +1,99 @@
+"""
+horses_history.json の追記型ジャーナル
+- 積み上げ処理でマージし終えた馬のレコードを1頭ごとに1行追記する（JSON Lines）
+- 途中で異常終了しても、次回起動時に replay() で既存データに反映できる
+  （馬の id が同じレコードは置き換え、ない場合は末尾に追加する）
+- horses_history.json を書き出したら remove() で削除する
+
+使用例:
+  journal = HistoryJournal(history_file + '.journal')
+  done_urls = journal.replay(horses)
+  for record in merged_records:
+      journal.append(record, record['detail_url'])
+  save(horses)
+  journal.remove()
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional, Set
+
+
+class HistoryJournal:
+    """horses_history.json 用のジャーナル
+
+    Args:
+        path: ジャーナルファイルのパス
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.recovered = 0
+        self._file = None
+
+    def replay(self, horses: List[Dict[str, Any]]) -> Set[str]:
+        """前回の実行で書き出されなかったレコードを馬のリストに反映する
+
+        Args:
+            horses: horses_history.json の馬のリスト（更新される）
+
+        Returns:
+            Set[str]: 反映したレコードの詳細ページURL（同じロットを取得し直さないために使う）
+        """
+        done_urls: Set[str] = set()
+        if not os.path.exists(self.path):
+            return done_urls
+
+        positions = {horse.get('id'): i for i, horse in enumerate(horses) if horse.get('id') is not None}
+        valid_size = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError('改行がありません')
+                    entry = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    # 異常終了時の書きかけの行は捨て、以降の追記が壊れないように切り詰める
+                    print(f"警告: ジャーナルの不完全な行を無視しました: {self.path}")
+                    f.close()
+                    with open(self.path, 'r+b') as out:
+                        out.truncate(valid_size)
+                    break
+                valid_size += len(line)
+                record = entry['record']
+                position = positions.get(record.get('id'))
+                if position is None:
+                    positions[record.get('id')] = len(horses)
+                    horses.append(record)
+                else:
+                    horses[position] = record
+                if entry.get('detail_url'):
+                    done_urls.add(entry['detail_url'])
+                self.recovered += 1
+        if self.recovered:
+            print(f"前回の未保存データをジャーナルから復元しました: {self.recovered}件")
+        return done_urls
+
+    def append(self, record: Dict[str, Any], detail_url: Optional[str] = None) -> None:
+        """マージし終えた馬のレコードを追記する"""
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        entry = {'record': record}
+        if detail_url:
+            entry['detail_url'] = detail_url
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        """ジャーナルを残したままファイルを閉じる"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        """書き出しが終わったのでジャーナルを削除する"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,290 @@
+"""
+horses_history.json の逐次読み書き
+- HistoryReader: 馬を1頭ずつ読み込む（ファイル全体をメモリに載せない）
+- HistoryWriter: 馬を1頭ずつ書き出し、close() で一時ファイルから置き換える
+- 書き出す内容は json.dump(data, ensure_ascii=False, indent=2) と同一のバイト列になる
+- {"metadata": ..., "horses": [...]} 形式と、馬のリストだけの古い形式の両方に対応する
+
+使用例:
+  with HistoryReader(path) as reader, HistoryWriter(path, reader.header) as writer:
+      for horse in reader:
+          horse['weight'] = fix(horse)
+          writer.write(horse)
+"""
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Iterator, Optional
+
+HORSES_KEY = 'horses'
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _JsonScanner:
+    """ファイルを少しずつ読みながらJSONの値を1つずつ取り出す"""
+
+    def __init__(self, stream, chunk_size: int = CHUNK_SIZE):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        if self._eof:
+            return False
+        chunk = self._stream.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        # 読み終えた部分は捨てる
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """空白を読み飛ばし、次の文字を返す（終端では空文字）"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill(self._chunk_size):
+                return ''
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            self.error(f"'{char}' が必要です")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """次のJSONの値を1つ読み込む"""
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # 値がバッファの途中で切れている場合は続きを読み込んで再試行する
+                if self._fill(size):
+                    size *= 2
+                    continue
+                raise
+            if end == len(self._buffer) and self._fill(size):
+                # 数値などはバッファの終端で切れていても読めてしまうため、続きを確認する
+                size *= 2
+                continue
+            self._pos = end
+            return value
+
+    def error(self, message: str) -> None:
+        raise json.JSONDecodeError(message, self._buffer, self._pos)
+
+
+class HistoryReader:
+    """horses_history.json を1頭ずつ読み込むリーダー
+
+    開いた時点で "horses" より前のトップレベルの値（metadata など）を header に読み込む。
+    馬はイテレートした時に1頭ずつ読み込み、"horses" より後の値は読み終えた後に trailer に入る。
+
+    Args:
+        path: 読み込むファイルのパス
+        chunk_size: 1度に読み込む文字数
+    """
+
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE):
+        self.path = path
+        self.header: Dict[str, Any] = {}
+        self.trailer: Dict[str, Any] = {}
+        self.is_list = False
+        self.count = 0
+        self._stream = open(path, 'r', encoding='utf-8')
+        self._scanner = _JsonScanner(self._stream, chunk_size)
+        self._has_horses = False
+        self._consumed = False
+        try:
+            self._read_header()
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.header.get('metadata', {})
+
+    @property
+    def has_horses(self) -> bool:
+        """"horses" の配列（古い形式ではトップレベルのリスト）があるか"""
+        return self._has_horses
+
+    def _read_header(self) -> None:
+        scanner = self._scanner
+        first = scanner.peek()
+        if first == '[':
+            self.is_list = True
+            self._has_horses = True
+            return
+        scanner.expect('{')
+        if scanner.peek() == '}':
+            return
+        while True:
+            key = scanner.value()
+            scanner.expect(':')
+            if key == HORSES_KEY:
+                self._has_horses = True
+                return
+            self.header[key] = scanner.value()
+            if not self._next_member():
+                return
+
+    def _next_member(self) -> bool:
+        """オブジェクトの次のメンバーがあれば True（'}' で終わった場合は False）"""
+        char = self._scanner.peek()
+        if char == ',':
+            self._scanner.expect(',')
+            return True
+        self._scanner.expect('}')
+        return False
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if self._consumed:
+            raise RuntimeError("HistoryReader は1度しかイテレートできません")
+        self._consumed = True
+        if not self._has_horses:
+            return
+        scanner = self._scanner
+        scanner.expect('[')
+        if scanner.peek() == ']':
+            scanner.expect(']')
+        else:
+            while True:
+                yield scanner.value()
+                self.count += 1
+                if scanner.peek() == ',':
+                    scanner.expect(',')
+                    continue
+                scanner.expect(']')
+                break
+        if not self.is_list:
+            self._read_trailer()
+
+    def _read_trailer(self) -> None:
+        scanner = self._scanner
+        while self._next_member():
+            key = scanner.value()
+            scanner.expect(':')
+            self.trailer[key] = scanner.value()
+
+    def close(self) -> None:
+        self._stream.close()
+
+    def __enter__(self) -> 'HistoryReader':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class HistoryWriter:
+    """horses_history.json を1頭ずつ書き出すライター
+
+    馬は一時ファイルに書き溜め、close() の時点の header / trailer と合わせて
+    出力ファイルを作成し、os.replace で置き換える。そのため読み込み中のファイルと
+    同じパスにも書き出せ、header（metadata の件数など）は書き出しの途中で更新してよい。
+
+    Args:
+        path: 書き出すファイルのパス
+        header: "horses" より前に書くトップレベルの値（metadata など）
+        trailer: "horses" より後に書くトップレベルの値
+        as_list: True の場合は馬のリストだけの古い形式で書き出す
+    """
+
+    def __init__(self, path: str, header: Optional[Dict[str, Any]] = None,
+                 trailer: Optional[Dict[str, Any]] = None, as_list: bool = False):
+        self.path = path
+        self.header = header if header is not None else {}
+        self.trailer = trailer if trailer is not None else {}
+        self.as_list = as_list
+        self.count = 0
+        self._indent = '\n  ' if as_list else '\n    '
+        self._spool = tempfile.TemporaryFile('w+', encoding='utf-8')
+
+    def write(self, horse: Dict[str, Any]) -> None:
+        """馬を1頭書き出す"""
+        text = json.dumps(horse, ensure_ascii=False, indent=2).replace('\n', self._indent)
+        self._spool.write((',' if self.count else '') + self._indent + text)
+        self.count += 1
+
+    def close(self) -> None:
+        """出力ファイルを作成して置き換える"""
+        if self._spool.closed:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                if self.as_list:
+                    self._copy_horses(f, '\n]')
+                else:
+                    f.write('{')
+                    for key, value in self.header.items():
+                        self._write_member(f, key, value)
+                        f.write(',')
+                    f.write(f"\n  {json.dumps(HORSES_KEY)}: ")
+                    self._copy_horses(f, '\n  ]')
+                    for key, value in self.trailer.items():
+                        f.write(',')
+                        self._write_member(f, key, value)
+                    f.write('\n}')
+            os.replace(tmp_path, self.path)
+        finally:
+            self._spool.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def discard(self) -> None:
+        """書き出した内容を破棄する（出力ファイルは変更しない）"""
+        self._spool.close()
+
+    def _copy_horses(self, f, closing: str) -> None:
+        f.write('[')
+        if self.count:
+            self._spool.seek(0)
+            shutil.copyfileobj(self._spool, f)
+            f.write(closing)
+        else:
+            f.write(']')
+
+    @staticmethod
+    def _write_member(f, key: str, value: Any) -> None:
+        text = json.dumps(value, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+        f.write(f"\n  {json.dumps(key, ensure_ascii=False)}: {text}")
+
+    def __enter__(self) -> 'HistoryWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def iter_horses(path: str) -> Iterator[Dict[str, Any]]:
+    """horses_history.json の馬を1頭ずつ返す"""
+    with HistoryReader(path) as reader:
+        yield from reader
+
+
+def count_horses(path: str) -> int:
+    """馬の頭数を数える（1頭ずつ読み捨てる）"""
+    with HistoryReader(path) as reader:
+        for _ in reader:
+            pass
+        return reader.count
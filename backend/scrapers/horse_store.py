@@ -0,0 +1,192 @@
+"""
+馬データのまとめ保存（追記型ジャーナル + 最後に1度だけ書き出し）
+- horses.json / auction_history.json を実行開始時に1度だけ読み込み、メモリ上で更新する
+- 更新内容は1件ごとにジャーナルファイルへ1行追記する（途中で異常終了しても次回起動時に復元できる）
+- compact() でJSONファイルへ書き出し（一時ファイル + os.replace）、ジャーナルを削除する
+- 書き出すJSONは data_helpers.save_horse / save_auction_history と同一のバイト列になる
+
+使用例:
+  with HorseDataStore(data_dir) as store:
+      horse_id = store.save_horse(horse_info)
+      store.save_auction_history({'horse_id': horse_id, ...})
+"""
+import copy
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from backend.scrapers.data_helpers import (
+    build_auction_history_index,
+    build_horse_index,
+    find_auction_history,
+    find_horse_by_name_and_age,
+    load_json_file,
+    merge_auction_history,
+    merge_horse,
+    normalize_horses_data,
+    save_json_file,
+)
+from backend.scrapers.record_index import RecordIndex
+
+HORSES_FILE = 'horses.json'
+HISTORY_FILE = 'auction_history.json'
+JOURNAL_FILE = '.horse_store.journal'
+
+_HORSE = 'horse'
+_HISTORY = 'auction_history'
+
+
+class HorseDataStore:
+    """horses.json / auction_history.json をまとめて更新するストア
+
+    Args:
+        data_dir: データディレクトリのパス
+        journal_path: ジャーナルファイルのパス（既定: data_dir/.horse_store.journal）
+    """
+
+    def __init__(self, data_dir: str = 'static-frontend/public/data', journal_path: Optional[str] = None):
+        self.data_dir = data_dir
+        self.horses_file = os.path.join(data_dir, HORSES_FILE)
+        self.history_file = os.path.join(data_dir, HISTORY_FILE)
+        self.journal_path = journal_path or os.path.join(data_dir, JOURNAL_FILE)
+
+        self._lock = threading.Lock()
+        self._journal = None
+        self._horses_data: Dict[str, Any] = normalize_horses_data(load_json_file(self.horses_file))
+        self._history: List[Dict[str, Any]] = load_json_file(self.history_file)
+        self._horses_dirty = False
+        self._history_dirty = False
+
+        self.recovered = self._replay_journal()
+        # 同一馬・同一履歴の検索は索引で行う（追加分は merge_* が索引に反映する）
+        self._horse_index = build_horse_index(self.horses)
+        self._history_index = build_auction_history_index(self._history)
+
+    @property
+    def horses(self) -> List[Dict[str, Any]]:
+        return self._horses_data.get('horses', [])
+
+    @property
+    def history(self) -> List[Dict[str, Any]]:
+        return self._history
+
+    def save_horse(self, horse_data: Dict[str, Any]) -> str:
+        """馬情報をメモリ上に反映してジャーナルに記録し、馬IDを返す（data_helpers.save_horse と同じ規則）"""
+        with self._lock:
+            record = merge_horse(self._horses_data, copy.deepcopy(horse_data), self._horse_index)
+            self._append(_HORSE, record, metadata=self._horses_data['metadata'])
+            self._horses_dirty = True
+            return record['id']
+
+    def save_auction_history(self, history_data: Dict[str, Any]) -> bool:
+        """オークション履歴をメモリ上に反映してジャーナルに記録する（data_helpers.save_auction_history と同じ規則）"""
+        with self._lock:
+            entry = merge_auction_history(self._history, copy.deepcopy(history_data), self._history_index)
+            self._append(_HISTORY, entry)
+            self._history_dirty = True
+            return True
+
+    def compact(self) -> bool:
+        """メモリ上のデータをJSONファイルへ書き出し、ジャーナルを削除する
+
+        Returns:
+            bool: ファイルを書き出した場合は True（変更がなければ False）
+        """
+        with self._lock:
+            written = False
+            if self._horses_dirty:
+                save_json_file(self.horses_file, self._horses_data)
+                self._horses_dirty = False
+                written = True
+            if self._history_dirty:
+                save_json_file(self.history_file, self._history)
+                self._history_dirty = False
+                written = True
+            self._close_journal()
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            return written
+
+    def close(self) -> None:
+        """変更を書き出してストアを閉じる"""
+        self.compact()
+
+    def __enter__(self) -> 'HorseDataStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # 例外時はジャーナルを残し、次回起動時に復元する
+            with self._lock:
+                self._close_journal()
+
+    def _append(self, kind: str, record: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> None:
+        if self._journal is None:
+            directory = os.path.dirname(self.journal_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        entry = {'kind': kind, 'record': record}
+        if metadata is not None:
+            entry['metadata'] = metadata
+        self._journal.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._journal.flush()
+
+    def _close_journal(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _replay_journal(self) -> int:
+        """前回の実行で書き出されなかったジャーナルをメモリ上のデータに反映する
+
+        Returns:
+            int: 反映したエントリ数
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        count = 0
+        horse_index = build_horse_index(self.horses)
+        history_index = build_auction_history_index(self._history)
+        horses_by_id = {horse['id']: horse for horse in self.horses if horse.get('id')}
+        history_by_id = {entry['id']: entry for entry in self._history if entry.get('id')}
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 異常終了時の書きかけの行は捨てる
+                    print(f"警告: ジャーナルの不完全な行を無視しました: {self.journal_path}")
+                    break
+                record = entry['record']
+                if entry['kind'] == _HORSE:
+                    existing = horses_by_id.get(record.get('id')) or find_horse_by_name_and_age(
+                        self.horses, record.get('name'), record.get('age'), horse_index)
+                    horses_by_id[record.get('id')] = _upsert(self.horses, existing, record, horse_index)
+                    self._horses_data['metadata'] = entry['metadata']
+                    self._horses_dirty = True
+                else:
+                    existing = history_by_id.get(record.get('id')) or find_auction_history(
+                        self._history, record.get('horse_id'), record.get('auction_date'), history_index)
+                    history_by_id[record.get('id')] = _upsert(self._history, existing, record, history_index)
+                    self._history_dirty = True
+                count += 1
+        if count:
+            print(f"前回の未保存データをジャーナルから復元しました: {count}件")
+        return count
+
+
+def _upsert(records: List[Dict[str, Any]], existing: Optional[Dict[str, Any]], record: Dict[str, Any],
+            index: RecordIndex) -> Dict[str, Any]:
+    if existing is None:
+        records.append(record)
+        index.sync()
+        return record
+    # キーの順序を保ったまま置き換える（検索キーは変わらない）
+    existing.clear()
+    existing.update(record)
+    return existing
@@ -0,0 +1,132 @@
+"""
+HTMLパーサーの切り替え
+- すべてのスクレイパーはこのモジュール経由でHTMLを解析する
+- バックエンドは引数または環境変数 SCRAPER_HTML_PARSER で選択する
+  - html.parser: 標準ライブラリ（追加依存なし）
+  - lxml: BeautifulSoup + lxml（requirements.txtに含まれる、既定）
+  - html5lib: BeautifulSoup + html5lib（ブラウザ互換だが低速）
+  - selectolax: lexborによる高速なテキスト・リンク抽出（詳細ページのみ）
+"""
+import os
+from typing import List, Optional, Tuple, Union
+
+from bs4 import BeautifulSoup, FeatureNotFound, UnicodeDammit
+from bs4.element import NavigableString, Script, Stylesheet, TemplateString
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolaxは任意の依存
+    LexborHTMLParser = None
+
+PARSER_ENV_VAR = 'SCRAPER_HTML_PARSER'
+DEFAULT_BACKEND = 'lxml'
+FALLBACK_BACKEND = 'html.parser'
+BACKENDS = ('html.parser', 'lxml', 'html5lib', 'selectolax')
+
+# BeautifulSoupのget_text()と同様に、テキストに含めない要素
+_NON_TEXT_SELECTOR = 'script, style, template'
+_NON_TEXT_STRING_TYPES = {'script': Script, 'style': Stylesheet, 'template': TemplateString}
+
+
+def _is_available(backend: str) -> bool:
+    if backend == 'selectolax':
+        return LexborHTMLParser is not None
+    if backend == 'html.parser':
+        return True
+    try:
+        BeautifulSoup('', backend)
+    except FeatureNotFound:
+        return False
+    return True
+
+
+def available_backends() -> List[str]:
+    """この環境で利用できるバックエンドの一覧"""
+    return [backend for backend in BACKENDS if _is_available(backend)]
+
+
+def get_backend(backend: Optional[str] = None) -> str:
+    """使用するバックエンド名を決定する
+
+    引数 > 環境変数 SCRAPER_HTML_PARSER > 既定値（lxml）の順に参照する。
+    既定値のlxmlが未インストールの場合は html.parser を使う。
+    明示的に指定されたバックエンドが使えない場合は ValueError を送出する。
+    """
+    name = backend or os.getenv(PARSER_ENV_VAR) or ''
+    name = name.strip().lower()
+    if not name:
+        return DEFAULT_BACKEND if _is_available(DEFAULT_BACKEND) else FALLBACK_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"未対応のHTMLパーサーです: {name}（{', '.join(BACKENDS)} のいずれかを指定してください）")
+    if not _is_available(name):
+        raise ValueError(f"HTMLパーサー {name} がインストールされていません")
+    return name
+
+
+def soup_builder(backend: Optional[str] = None) -> str:
+    """BeautifulSoupに渡すツリービルダー名を返す
+
+    selectolaxはBeautifulSoupのAPIを持たないため、ツリーが必要な処理では
+    lxml（なければ html.parser）で代用する。
+    """
+    name = get_backend(backend)
+    if name == 'selectolax':
+        return DEFAULT_BACKEND if _is_available(DEFAULT_BACKEND) else FALLBACK_BACKEND
+    return name
+
+
+def make_soup(content: Union[bytes, str], backend: Optional[str] = None) -> BeautifulSoup:
+    """選択されたバックエンドでBeautifulSoupを作成する"""
+    builder = soup_builder(backend)
+    if builder == 'html5lib' and isinstance(content, bytes):
+        # html5lib独自の文字コード判定はmeta charsetのない断片をcp1252とみなすため、
+        # 他のバックエンドと同じ判定（UnicodeDammit）で先にデコードする
+        content = UnicodeDammit(content, is_html=True).unicode_markup
+    soup = BeautifulSoup(content, builder)
+    if builder == 'html5lib':
+        _mark_non_text_strings(soup)
+    return soup
+
+
+def _mark_non_text_strings(soup: BeautifulSoup) -> None:
+    """html5libで構築したツリーのscript/style/template内の文字列を専用の型に置き換える
+
+    html.parser・lxmlではBeautifulSoupがこれらをScript等として扱い get_text() から
+    除外するが、html5libでは通常の文字列になりページテキストにJavaScriptが混入する。
+    """
+    for tag in soup.find_all(list(_NON_TEXT_STRING_TYPES)):
+        string_type = _NON_TEXT_STRING_TYPES[tag.name]
+        for string in list(tag.find_all(string=True)):
+            if type(string) is NavigableString:
+                string.replace_with(string_type(str(string)))
+
+
+def extract_page_index(content: Union[bytes, str]) -> Tuple[str, List[Tuple[str, str]], List[str]]:
+    """selectolax(lexbor)でページテキスト・リンク・画像を抽出する
+
+    Returns:
+        (ページテキスト, [(href, リンクテキスト)], [画像src]) のタプル。
+        BeautifulSoupで構築した場合と同じ形式・同じ順序で返す。
+    """
+    if LexborHTMLParser is None:
+        raise ValueError("HTMLパーサー selectolax がインストールされていません")
+    tree = LexborHTMLParser(content)
+
+    anchors: List[Tuple[str, str]] = []
+    image_srcs: List[str] = []
+    for node in tree.css('a, img'):
+        attrs = node.attributes
+        if node.tag == 'a':
+            href = attrs.get('href')
+            if href is not None:
+                anchors.append((href, node.text(deep=True)))
+        else:
+            src = attrs.get('src')
+            if src:
+                image_srcs.append(src)
+
+    for node in tree.css(_NON_TEXT_SELECTOR):
+        node.decompose()
+    root = tree.root
+    text = root.text(deep=True) if root is not None else ''
+    return text, anchors, image_srcs
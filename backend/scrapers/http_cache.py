@@ -0,0 +1,326 @@
+"""
+条件付きGETに対応したディスク上のHTTPキャッシュ
+- URLごとに本文とETag/Last-Modifiedを保存し、期限切れ後は If-None-Match / If-Modified-Since で再検証する
+- ドメイン・URLごとの有効期限（TTL）を指定できる（終了したロットの詳細ページは変更されないため無期限など）
+- 合計サイズが上限を超えたら、最後に使われた時刻が古いものから削除する
+- requests.Session に CachingHTTPAdapter をマウントして使う
+
+環境変数:
+  SCRAPER_HTTP_CACHE=0          キャッシュを無効にする
+  SCRAPER_HTTP_CACHE_DIR        保存先（省略時はプロジェクトの data/http_cache）
+  SCRAPER_HTTP_CACHE_MAX_MB     合計サイズの上限（MB、省略時は500）
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, 'data', 'http_cache')
+DEFAULT_MAX_MB = 500
+
+DAY = 24 * 60 * 60
+
+# (URLの正規表現, 有効期限の秒数)。None は無期限、0 は毎回再検証する
+DEFAULT_TTL_RULES: List[Tuple[str, Optional[float]]] = [
+    # 終了したオークションのロット詳細ページは変更されない
+    (r'^https?://auction\.keiba\.rakuten\.co\.jp/item/\d+', None),
+    # JBISの賞金ページは出走があると更新されるため約1か月
+    (r'^https?://(www\.)?jbis\.or\.jp/', 30 * DAY),
+]
+
+# 本文と一緒に保存しないヘッダー（本文は展開済みのバイト列で保存する）
+_DROP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive'}
+
+
+class HttpCache:
+    """URLをキーにしたディスク上のHTTPキャッシュ
+
+    Args:
+        cache_dir: 保存先ディレクトリ
+        max_bytes: 本文の合計サイズの上限
+        ttl_rules: (URLの正規表現, 有効期限の秒数) のリスト。最初に一致したものを使う
+        default_ttl: どのルールにも一致しない場合の有効期限（秒）
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024,
+                 ttl_rules: Optional[List[Tuple[str, Optional[float]]]] = None, default_ttl: Optional[float] = 0):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._rules: List[Tuple[Pattern, Optional[float]]] = [
+            (re.compile(pattern), ttl) for pattern, ttl in (DEFAULT_TTL_RULES if ttl_rules is None else ttl_rules)
+        ]
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for _, _, size in self._scan())
+
+    @classmethod
+    def from_env(cls) -> Optional['HttpCache']:
+        """環境変数から作成する（SCRAPER_HTTP_CACHE=0 の場合は None）"""
+        if os.getenv('SCRAPER_HTTP_CACHE', '1').lower() in ('0', 'false', 'off', 'no'):
+            return None
+        return cls(
+            cache_dir=os.getenv('SCRAPER_HTTP_CACHE_DIR') or DEFAULT_CACHE_DIR,
+            max_bytes=int(float(os.getenv('SCRAPER_HTTP_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024),
+        )
+
+    # --- ルール・状態 ---
+
+    def ttl_for(self, url: str) -> Optional[float]:
+        """URLの有効期限（秒）を返す。None は無期限"""
+        for pattern, ttl in self._rules:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        ttl = self.ttl_for(entry['url'])
+        return ttl is None or time.time() - entry['stored_at'] < ttl
+
+    def stats(self) -> Dict[str, int]:
+        """ヒット・再検証・ミスなどの件数と合計サイズを返す"""
+        with self._lock:
+            return dict(self._counters, bytes=self._total_bytes)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    # --- 読み書き ---
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + '.json', base + '.body'
+
+    def get_entry(self, url: str) -> Optional[Dict[str, Any]]:
+        """保存済みのエントリ（メタデータ）を返す"""
+        meta_path, _ = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+
+    def _read_body(self, url: str) -> Optional[bytes]:
+        _, body_path = self._paths(url)
+        try:
+            with open(body_path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_entry(self, entry: Dict[str, Any], body: Optional[bytes] = None) -> None:
+        meta_path, body_path = self._paths(entry['url'])
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        if body is not None:
+            with open(body_path + suffix, 'wb') as f:
+                f.write(body)
+            os.replace(body_path + suffix, body_path)
+        with open(meta_path + suffix, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(meta_path + suffix, meta_path)
+        self._touch(meta_path)
+
+    @staticmethod
+    def _touch(meta_path: str) -> None:
+        """メタデータの更新時刻を最後に使われた時刻にする（削除順の判定に使う）
+
+        ファイルシステムの時刻は粗いことがあるため、time.time() の値を明示的に設定する。
+        """
+        now = time.time()
+        try:
+            os.utime(meta_path, (now, now))
+        except OSError:
+            pass
+
+    def cached_response(self, url: str, request: Optional[requests.PreparedRequest] = None) -> Optional[requests.Response]:
+        """有効期限内のキャッシュがあればサーバーにアクセスせずにレスポンスを返す"""
+        entry = self.get_entry(url)
+        if entry is None or not self.is_fresh(entry):
+            return None
+        response = self._build_response(entry, request)
+        if response is None:
+            return None
+        self._count('hits')
+        return response
+
+    def _build_response(self, entry: Dict[str, Any], request: Optional[requests.PreparedRequest],
+                        from_cache: bool = True) -> Optional[requests.Response]:
+        body = self._read_body(entry['url'])
+        if body is None:
+            return None
+        self._touch(self._paths(entry['url'])[0])
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry.get('reason', 'OK')
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = entry['url']
+        response.request = request
+        response._content = body
+        response.from_cache = from_cache
+        return response
+
+    def store(self, url: str, response: requests.Response) -> bool:
+        """レスポンスを保存する（保存する価値がない場合は False）"""
+        if response.status_code != 200:
+            return False
+        if 'no-store' in response.headers.get('Cache-Control', '').lower():
+            return False
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        # 検証子がなく有効期限もない（毎回再検証する）URLは再利用できない
+        if not etag and not last_modified and self.ttl_for(url) == 0:
+            return False
+        body = response.content
+        previous = self.get_entry(url)
+        entry = {
+            'url': url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in _DROP_HEADERS},
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': time.time(),
+            'size': len(body),
+        }
+        self._write_entry(entry, body)
+        with self._lock:
+            self._total_bytes += len(body) - (previous['size'] if previous else 0)
+            self._counters['stores'] += 1
+            over = self._total_bytes > self.max_bytes
+        if over:
+            self.evict()
+        return True
+
+    def refresh(self, entry: Dict[str, Any], headers: Dict[str, str]) -> None:
+        """304 Not Modified を受けたエントリの保存時刻と検証子を更新する"""
+        entry['stored_at'] = time.time()
+        for name, key in (('ETag', 'etag'), ('Last-Modified', 'last_modified')):
+            if headers.get(name):
+                entry[key] = headers[name]
+                entry['headers'][name] = headers[name]
+        self._write_entry(entry)
+
+    # --- 削除 ---
+
+    def _scan(self):
+        """(メタデータのパス, 最終使用時刻, 本文サイズ) を列挙する"""
+        for sub in os.scandir(self.cache_dir):
+            if not sub.is_dir():
+                continue
+            for item in os.scandir(sub.path):
+                if not item.name.endswith('.json'):
+                    continue
+                body_path = item.path[:-len('.json')] + '.body'
+                try:
+                    yield item.path, item.stat().st_mtime, os.path.getsize(body_path)
+                except OSError:
+                    continue
+
+    def evict(self) -> int:
+        """合計サイズが上限の9割以下になるまで、最後に使われた時刻が古いものから削除する"""
+        target = self.max_bytes * 0.9
+        removed = 0
+        with self._lock:
+            entries = sorted(self._scan(), key=lambda item: item[1])
+            total = sum(size for _, _, size in entries)
+            for meta_path, _, size in entries:
+                if total <= target:
+                    break
+                for path in (meta_path, meta_path[:-len('.json')] + '.body'):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+                removed += 1
+            self._total_bytes = total
+            self._counters['evictions'] += removed
+        return removed
+
+    def clear(self) -> None:
+        """キャッシュを全て削除する"""
+        with self._lock:
+            for meta_path, _, _ in list(self._scan()):
+                for path in (meta_path, meta_path[:-len('.json')] + '.body'):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            self._total_bytes = 0
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """HttpCache を使うトランスポートアダプタ
+
+    GET リクエストのみキャッシュし、有効期限内ならサーバーにアクセスせずに返す。
+    期限切れの場合は条件付きリクエストを送り、304 ならキャッシュの本文を 200 として返す。
+    返すレスポンスには from_cache 属性（サーバーにアクセスしなかった場合 True）を付ける。
+    HTTPAdapter の引数（max_retries, pool_maxsize など）はそのまま渡せる。
+    """
+
+    def __init__(self, cache: Optional[HttpCache], **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, **kwargs):
+        cache = self.cache
+        if cache is None or request.method != 'GET' or stream or 'Range' in request.headers:
+            response = super().send(request, stream=stream, **kwargs)
+            response.from_cache = False
+            return response
+
+        url = request.url
+        entry = cache.get_entry(url)
+        if entry is not None and cache.is_fresh(entry):
+            response = cache._build_response(entry, request)
+            if response is not None:
+                cache._count('hits')
+                return response
+            entry = None
+
+        if entry is not None and not os.path.exists(cache._paths(url)[1]):
+            # 本文が削除されている場合は条件付きリクエストにしない
+            entry = None
+        if entry is not None:
+            if entry.get('etag'):
+                request.headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, stream=stream, **kwargs)
+        response.from_cache = False
+
+        if entry is not None and response.status_code == 304:
+            cache.refresh(entry, response.headers)
+            cached = cache._build_response(entry, request, from_cache=False)
+            if cached is not None:
+                cached.connection = self
+                cache._count('revalidated')
+                return cached
+
+        cache._count('misses')
+        cache.store(url, response)
+        return response
+
+
+def mount_http_cache(session: requests.Session, cache: Optional[HttpCache], **adapter_kwargs) -> CachingHTTPAdapter:
+    """セッションの http:// と https:// に CachingHTTPAdapter をマウントする"""
+    adapter = CachingHTTPAdapter(cache, **adapter_kwargs)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
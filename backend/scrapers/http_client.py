@@ -0,0 +1,139 @@
+"""
+共通HTTPクライアント
+- スクレイパー・保守スクリプトは create_session() / get_session() でセッションを取得する
+- ホストごとにコネクションプールの大きさを調整し、keep-alive で接続を再利用する
+- リトライ・バックオフの方針と既定のタイムアウトを共通化する
+- gzip/deflate（brotli のデコーダがインストールされていれば br も）で受け取る
+- GET はディスク上のHTTPキャッシュ（http_cache）を経由する
+
+環境変数:
+  SCRAPER_HTTP_TIMEOUT      既定のタイムアウト（秒、省略時は30）
+  SCRAPER_HTTP_RETRIES      リトライ回数（省略時は3）
+  SCRAPER_HTTP_BACKOFF      リトライ間隔の係数（省略時は1）
+  SCRAPER_HTTP_POOL_SIZE    1ホストあたりの最大接続数（省略時は10）
+"""
+import os
+import threading
+from typing import Dict, Optional
+
+import requests
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+from backend.scrapers.http_cache import CachingHTTPAdapter, HttpCache
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1
+DEFAULT_POOL_SIZE = 10
+
+# リトライするステータス（429 は Retry-After ヘッダーに従って待機する）
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+# ホストごとの最大接続数（既定値と異なるもの）。JBISは1件ずつ順に取得するため小さくする
+HOST_POOL_SIZES: Dict[str, int] = {
+    'www.jbis.or.jp': 2,
+}
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
+    # urllib3 が展開できる形式だけを受け付ける（brotli があれば br を含む）
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+_FROM_ENV = object()
+
+
+class ClientAdapter(CachingHTTPAdapter):
+    """既定のタイムアウトを持つアダプタ（リクエストで timeout を省略した場合に使う）"""
+
+    def __init__(self, cache: Optional[HttpCache], timeout: float = DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(cache, **kwargs)
+
+    def send(self, request, stream=False, timeout=None, **kwargs):
+        return super().send(request, stream=stream, timeout=self.timeout if timeout is None else timeout, **kwargs)
+
+
+def make_retry(max_retries: int = DEFAULT_RETRIES, backoff_factor: float = DEFAULT_BACKOFF) -> Retry:
+    """共通のリトライ方針"""
+    return Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET", "POST"],
+        # 最後の試行でもエラーのステータスはレスポンスとして返し、raise_for_status() で扱う
+        raise_on_status=False,
+    )
+
+
+def create_session(timeout: Optional[float] = None, max_retries: Optional[int] = None,
+                   backoff_factor: Optional[float] = None, pool_size: Optional[int] = None,
+                   http_cache=_FROM_ENV, host_pool_sizes: Optional[Dict[str, int]] = None) -> requests.Session:
+    """設定済みのセッションを作成する
+
+    Args:
+        timeout: 既定のタイムアウト（秒）。省略時は環境変数 SCRAPER_HTTP_TIMEOUT
+        max_retries: リトライ回数。省略時は環境変数 SCRAPER_HTTP_RETRIES
+        backoff_factor: リトライ間隔の係数。省略時は環境変数 SCRAPER_HTTP_BACKOFF
+        pool_size: 1ホストあたりの最大接続数。省略時は環境変数 SCRAPER_HTTP_POOL_SIZE
+        http_cache: HTTPキャッシュ。省略時は環境変数から作成し、None ならキャッシュしない
+        host_pool_sizes: ホストごとの最大接続数（省略時は HOST_POOL_SIZES）
+    """
+    if timeout is None:
+        timeout = float(os.getenv('SCRAPER_HTTP_TIMEOUT', DEFAULT_TIMEOUT))
+    if max_retries is None:
+        max_retries = int(os.getenv('SCRAPER_HTTP_RETRIES', DEFAULT_RETRIES))
+    if backoff_factor is None:
+        backoff_factor = float(os.getenv('SCRAPER_HTTP_BACKOFF', DEFAULT_BACKOFF))
+    if pool_size is None:
+        pool_size = int(os.getenv('SCRAPER_HTTP_POOL_SIZE', DEFAULT_POOL_SIZE))
+    if http_cache is _FROM_ENV:
+        http_cache = HttpCache.from_env()
+    if host_pool_sizes is None:
+        host_pool_sizes = HOST_POOL_SIZES
+
+    session = requests.Session()
+    retry = make_retry(max_retries, backoff_factor)
+
+    def adapter(size: int) -> ClientAdapter:
+        return ClientAdapter(http_cache, timeout=timeout, max_retries=retry,
+                             pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=size)
+
+    default_adapter = adapter(pool_size)
+    session.mount("http://", default_adapter)
+    session.mount("https://", default_adapter)
+    # ホストごとの最大接続数（より長いプレフィックスのアダプタが優先される）
+    for host, size in host_pool_sizes.items():
+        host_adapter = adapter(size)
+        session.mount(f"http://{host}/", host_adapter)
+        session.mount(f"https://{host}/", host_adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    session.http_cache = http_cache
+    return session
+
+
+_shared_session: Optional[requests.Session] = None
+_shared_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """プロセス内で共有するセッションを返す（初回呼び出し時に環境変数の設定で作成）"""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
+
+
+def close_session() -> None:
+    """共有セッションを閉じる（次の get_session() で作り直す）"""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is not None:
+            _shared_session.close()
+            _shared_session = None
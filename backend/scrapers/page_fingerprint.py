@@ -0,0 +1,188 @@
+"""
+詳細ページの内容ハッシュによる変更検出
+- detail_url ごとに、正規化したページ内容のハッシュと前回の抽出結果を保存する
+- ハッシュが前回と同じページは解析・保存をせず、前回の抽出結果を使い回す
+- 抽出結果は項目ごとに持つ（コメントだけを抽出するスクリプトと全項目を抽出するスクレイパーで共有できる）
+  必要な項目が揃っていない場合は、ページが同じでも新規として扱う
+- 正規化ではページごとに変わるだけで内容に関係しない部分を取り除く
+    <script> / <style> / <noscript>、HTMLコメント、Vueの data-v-xxxx 属性、連続する空白
+- 抽出処理が変わったら前回の結果は使えないので、version（抽出処理のソースのハッシュなど）が
+  保存時と異なる場合は記録をすべて破棄する
+- 保存先は SCRAPER_PAGE_FINGERPRINTS_PATH（既定: data/page_fingerprints.json）
+  SCRAPER_PAGE_FINGERPRINTS=0 で無効にできる
+
+使用例:
+  fingerprints = PageFingerprintStore.from_env(version=source_version(__file__))
+  digest = page_hash(response.content)
+  status, cached = fingerprints.lookup(url, digest, fields=('name', 'comment'))
+  if cached is None:
+      cached = parse(response.content)
+      fingerprints.remember(url, digest, cached)
+  fingerprints.save()
+"""
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_STORE_PATH = os.path.join(PROJECT_ROOT, 'data', 'page_fingerprints.json')
+
+NEW = 'new'
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+
+# 正規化で取り除く部分
+VOLATILE_BLOCK_PATTERN = re.compile(rb'<(script|style|noscript)\b[^>]*>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+HTML_COMMENT_PATTERN = re.compile(rb'<!--.*?-->', re.DOTALL)
+VUE_SCOPE_ATTR_PATTERN = re.compile(rb'\sdata-v-[0-9a-f]+(?:="")?')
+WHITESPACE_PATTERN = re.compile(rb'\s+')
+
+
+def normalize_page(content: Union[bytes, str]) -> bytes:
+    """ハッシュ計算用にページ内容を正規化する"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    content = VOLATILE_BLOCK_PATTERN.sub(b'', content)
+    content = HTML_COMMENT_PATTERN.sub(b'', content)
+    content = VUE_SCOPE_ATTR_PATTERN.sub(b'', content)
+    return WHITESPACE_PATTERN.sub(b' ', content).strip()
+
+
+def page_hash(content: Union[bytes, str]) -> str:
+    """正規化したページ内容のハッシュ（SHA-256）を返す"""
+    return hashlib.sha256(normalize_page(content)).hexdigest()
+
+
+def source_version(*paths: str) -> str:
+    """抽出処理のソースファイルの内容からバージョン文字列を作る"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class PageFingerprintStore:
+    """detail_url ごとのページハッシュと抽出結果の保存先
+
+    Args:
+        path: 保存先のJSONファイルのパス
+        version: 抽出処理のバージョン（保存時と異なる場合は記録を使わない）
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, version: str = ''):
+        self.path = path
+        self.version = version
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._status: Dict[str, str] = {}
+        self._dirty = False
+        self._counters = {NEW: 0, CHANGED: 0, UNCHANGED: 0}
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"警告: ページハッシュの保存先を読み込めないため、空の状態から始めます: {e}")
+                data = {}
+            if not isinstance(data, dict):
+                data = {}
+            if data.get('version') == self.version:
+                self._entries = data.get('pages', {})
+            elif data:
+                print("抽出処理が変わったため、前回のページハッシュを破棄します")
+                self._dirty = True
+
+    @classmethod
+    def from_env(cls, version: str = '') -> Optional['PageFingerprintStore']:
+        """環境変数から作成する（SCRAPER_PAGE_FINGERPRINTS=0 の場合は None）"""
+        if os.getenv('SCRAPER_PAGE_FINGERPRINTS', '1').lower() in ('0', 'false', 'off', 'no'):
+            return None
+        return cls(os.getenv('SCRAPER_PAGE_FINGERPRINTS_PATH') or DEFAULT_STORE_PATH, version=version)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __bool__(self) -> bool:
+        # 記録が空でも保存先としては有効（`if store:` で None との区別に使えるようにする）
+        return True
+
+    def lookup(self, url: str, digest: str,
+               fields: Optional[Iterable[str]] = None) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """ページの状態を判定する
+
+        Args:
+            url: 詳細ページのURL
+            digest: page_hash() で求めたハッシュ
+            fields: 使い回すのに必要な項目（前回の抽出結果に揃っていなければ NEW として扱う）
+
+        Returns:
+            Tuple[str, Optional[Dict]]: (NEW / CHANGED / UNCHANGED, UNCHANGED の場合は前回の抽出結果のコピー)
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                status, result = NEW, None
+            elif entry.get('hash') != digest:
+                status, result = CHANGED, None
+            elif not all(field in entry.get('result', {}) for field in fields or ()):
+                # ページは同じだが、必要な項目をまだ抽出していない
+                status, result = NEW, None
+            else:
+                status, result = UNCHANGED, copy.deepcopy(entry['result'])
+            self._status[url] = status
+            self._counters[status] += 1
+            return status, result
+
+    def status(self, url: str) -> Optional[str]:
+        """今回の実行で最後に判定した状態を返す（判定していない場合は None）"""
+        return self._status.get(url)
+
+    def remember(self, url: str, digest: str, result: Dict[str, Any]) -> None:
+        """ページのハッシュと抽出結果を記録する（同じページなら前回の抽出結果に項目を追加する）"""
+        with self._lock:
+            entry = self._entries.get(url)
+            merged = dict(entry['result']) if entry and entry.get('hash') == digest and entry.get('result') else {}
+            merged.update(copy.deepcopy(result))
+            self._entries[url] = {
+                'hash': digest,
+                'result': merged,
+                'seen_at': datetime.now().isoformat(),
+            }
+            self._dirty = True
+
+    def forget(self, url: str) -> None:
+        """記録を削除する（保存に失敗した結果を次回も使い回さないようにする）"""
+        with self._lock:
+            if self._entries.pop(url, None) is not None:
+                self._dirty = True
+
+    def save(self) -> bool:
+        """変更があれば保存先に書き出す（一時ファイル + os.replace）
+
+        Returns:
+            bool: 書き出した場合は True
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.version, 'pages': self._entries}, f,
+                          ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        """今回の実行での新規・変更あり・変更なしのページ数を返す"""
+        return dict(self._counters)
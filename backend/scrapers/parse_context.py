@@ -0,0 +1,156 @@
+"""
+詳細ページの解析コンテキスト
+- BeautifulSoupのツリーとページテキストを1ページにつき1度だけ構築する
+- HTMLパーサーは html_parser の設定に従う（selectolaxの場合はツリーを必要時のみ構築）
+- 抽出パターン（extractors.rakuten_detail）はページごとに1度だけまとめて検索する
+- リンク・画像を1回の走査でインデックス化する
+- 「本馬について」「販売申込者」「血統」などのセクション位置を保持する
+"""
+import re
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from bs4 import BeautifulSoup
+
+from backend.scrapers.extractors.registry import Fields
+from backend.scrapers.extractors.rakuten_detail import DETAIL_PATTERNS
+from backend.scrapers.html_parser import extract_page_index, get_backend, make_soup
+
+_MISSING = object()
+
+
+class DetailPageContext:
+    """詳細ページ1枚分の解析結果を保持するコンテキスト
+
+    各抽出処理はページ全体を何度も走査せず、このコンテキストが保持する
+    テキスト・リンク一覧・セクションを参照する。
+    """
+
+    def __init__(self, soup: BeautifulSoup):
+        text = soup.get_text()
+
+        # リンクと画像を1回の走査で収集する
+        anchors: List[Tuple[str, str]] = []
+        image_srcs: List[str] = []
+        for tag in soup.find_all(['a', 'img']):
+            if tag.name == 'a':
+                href = tag.get('href')
+                if href is not None:
+                    anchors.append((href, tag.get_text()))
+            else:
+                src = tag.get('src', '')
+                if src and isinstance(src, str):
+                    image_srcs.append(src)
+
+        self._init_index(text, anchors, image_srcs)
+        self._soup: Optional[BeautifulSoup] = soup
+        self._content: Union[bytes, str, None] = None
+        self._backend: Optional[str] = None
+
+    def _init_index(self, text: str, anchors: List[Tuple[str, str]], image_srcs: List[str]) -> None:
+        self.text: str = text
+        self.anchors: List[Tuple[str, str]] = anchors
+        self.image_srcs: List[str] = image_srcs
+        self._positions: Dict[str, int] = {}
+        self._cache: Dict[str, object] = {}
+
+    @classmethod
+    def from_html(cls, content: Union[bytes, str], backend: Optional[str] = None) -> 'DetailPageContext':
+        """HTMLからコンテキストを構築
+
+        Args:
+            content: ページのHTML
+            backend: HTMLパーサー名（省略時は環境変数 SCRAPER_HTML_PARSER／既定値）
+        """
+        backend = get_backend(backend)
+        if backend != 'selectolax':
+            return cls(make_soup(content, backend))
+        text, anchors, image_srcs = extract_page_index(content)
+        return cls.from_index(text, anchors, image_srcs, content, backend)
+
+    @classmethod
+    def from_index(cls, text: str, anchors: List[Tuple[str, str]], image_srcs: List[str],
+                   content: Union[bytes, str], backend: Optional[str] = None) -> 'DetailPageContext':
+        """抽出済みのテキスト・リンク・画像からコンテキストを構築（ツリーは必要時に作成）"""
+        ctx = cls.__new__(cls)
+        ctx._init_index(text, anchors, image_srcs)
+        ctx._soup = None
+        ctx._content = content
+        ctx._backend = backend
+        return ctx
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        """BeautifulSoupのツリー（selectolaxで構築した場合は初回参照時に作成）"""
+        if self._soup is None:
+            self._soup = make_soup(self._content, self._backend)
+        return self._soup
+
+    def find(self, keyword: str) -> int:
+        """キーワードの最初の出現位置を返す（見つからない場合は-1、結果はキャッシュ）"""
+        position = self._positions.get(keyword)
+        if position is None:
+            position = self.text.find(keyword)
+            self._positions[keyword] = position
+        return position
+
+    def search(self, pattern: Union[str, re.Pattern], anchors: Sequence[str], flags: int = 0) -> Optional[re.Match]:
+        """アンカー文字列の出現位置から正規表現を検索する
+
+        パターンはアンカー文字列のいずれかで始まる必要がある。最初のアンカーより前に
+        マッチすることはないため、ページ全体を検索した場合と同じ結果になる。
+        アンカーが1つも見つからなければ検索自体を省略する。
+        """
+        positions = [p for p in (self.find(anchor) for anchor in anchors) if p >= 0]
+        if not positions:
+            return None
+        compiled = pattern if isinstance(pattern, re.Pattern) else re.compile(pattern, flags)
+        return compiled.search(self.text, min(positions))
+
+    def _cached(self, key: str, factory):
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self._cache[key] = value
+        return value
+
+    @property
+    def fields(self) -> Dict[str, Fields]:
+        """アンカー付き抽出パターンをまとめて検索した結果（パターン名 → フィールド）"""
+        return self._cached('fields', lambda: DETAIL_PATTERNS.scan(self.text))
+
+    def match(self, name: str) -> Optional[Fields]:
+        """登録済みの抽出パターンの最初のマッチのフィールドを返す（ヒット数を記録する）
+
+        アンカー付きのパターンは ``fields`` の検索結果を使い、
+        それ以外はページテキストを個別に検索する。
+        """
+        pattern = DETAIL_PATTERNS[name]
+        if pattern.anchors:
+            result = self.fields.get(name)
+        else:
+            result = pattern.search(self.text)
+        DETAIL_PATTERNS.record(name, result is not None)
+        return result
+
+    def _section(self, name: str, field: str, strip: bool = True) -> str:
+        def locate():
+            result = self.match(name)
+            if not result:
+                return ''
+            return result[field].strip() if strip else result[field]
+        return self._cached(name, locate)
+
+    @property
+    def pedigree_section(self) -> str:
+        """血統ブロックのテキスト（見つからない場合は空文字）"""
+        return self._section('pedigree_section', 'section', strip=False)
+
+    @property
+    def comment_section(self) -> str:
+        """「本馬について」の本文（見つからない場合は空文字）"""
+        return self._section('comment', 'comment')
+
+    @property
+    def seller_line(self) -> str:
+        """「販売申込者：」の行の値（見つからない場合は空文字）"""
+        return self._section('seller', 'seller')
@@ -0,0 +1,90 @@
+"""
+詳細ページの解析（CPU処理）を別プロセスで行うプール
+- 取得段（スレッド）は生のHTMLバイト列を渡し、解析段（プロセス）は抽出結果の辞書を返す
+- 解析中はGILを握らないため、取得段のスレッドは止まらずに次のページを取得できる
+- プロセス数は SCRAPER_PARSE_WORKERS で指定する（既定: CPUコア数、最大4）
+  0 または 1 を指定すると別プロセスを使わず、呼び出し元のスレッドで解析する（デバッグ用）
+- プロセスは最初の解析時に起動する（spawn方式。取得スレッドが動いている状態でforkしない）
+
+使用例:
+  pool = ParsePool(parse_page, workers=4)
+  detail_data = pool.submit(content).result()
+  pool.close()
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+DEFAULT_MAX_PARSE_WORKERS = 4
+
+
+def default_workers() -> int:
+    """環境変数 SCRAPER_PARSE_WORKERS、未設定ならCPUコア数（最大4）を返す"""
+    value = os.getenv('SCRAPER_PARSE_WORKERS')
+    if value is not None and value.strip() != '':
+        return int(value)
+    return min(DEFAULT_MAX_PARSE_WORKERS, os.cpu_count() or 1)
+
+
+class ParsePool:
+    """解析関数をプロセスプールで実行する（プロセス数が1以下なら呼び出し元で実行）
+
+    Args:
+        func: 解析関数（モジュールの最上位で定義し、pickle できる引数・戻り値を使うこと）
+        workers: プロセス数（省略時は default_workers()）
+        initializer: 各プロセスの起動時に1度だけ呼ぶ関数
+        initargs: initializer の引数
+    """
+
+    def __init__(self, func: Callable[..., Any], workers: Optional[int] = None,
+                 initializer: Optional[Callable[..., Any]] = None, initargs: Tuple[Any, ...] = ()):
+        self.func = func
+        self.workers = default_workers() if workers is None else workers
+        if self.workers < 0:
+            raise ValueError("workers は0以上を指定してください")
+        self.initializer = initializer
+        self.initargs = initargs
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def in_process(self) -> bool:
+        """別プロセスを使わずに呼び出し元で解析するか"""
+        return self.workers <= 1
+
+    def submit(self, *args: Any) -> Future:
+        """解析を依頼し、結果の Future を返す"""
+        if self.in_process:
+            future: Future = Future()
+            try:
+                future.set_result(self.func(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._get_executor().submit(self.func, *args)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=self.initializer,
+                    initargs=self.initargs,
+                )
+            return self._executor
+
+    def close(self) -> None:
+        """プロセスを終了する（再度 submit した場合は起動し直す）"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> 'ParsePool':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
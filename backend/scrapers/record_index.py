@@ -0,0 +1,72 @@
+"""
+レコードリストのハッシュ索引
+- リストを先頭から走査して最初に一致したレコードを返す検索を、キーの辞書引きに置き換える
+- 1つのレコードは複数のキーを持てる（例: 現在の馬名と過去の馬名）
+- 同じキーを持つレコードが複数ある場合は、走査と同じく最も前の位置を返す
+- レコードの追加は sync()、既存レコードの変更・置き換えは update() で索引に反映する
+"""
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+KeyFunc = Callable[[Dict[str, Any]], Iterable[Hashable]]
+
+
+class RecordIndex:
+    """レコードのリストに対する キー → 位置 の索引
+
+    Args:
+        records: 索引を作るレコードのリスト（参照を保持し、sync() で追加分を取り込む）
+        key_func: レコードから検索キーの一覧を返す関数
+    """
+
+    def __init__(self, records: List[Dict[str, Any]], key_func: KeyFunc):
+        self.records = records
+        self._key_func = key_func
+        self._positions: Dict[Hashable, Set[int]] = {}
+        self._keys: List[List[Hashable]] = []
+        self.sync()
+
+    def sync(self) -> None:
+        """リストの末尾に追加されたレコードを索引に取り込む"""
+        for position in range(len(self._keys), len(self.records)):
+            self._keys.append([])
+            self._add(position)
+
+    def update(self, position: int) -> None:
+        """指定位置のレコードが変更・置き換えされた場合に索引を更新する"""
+        self.sync()
+        for key in self._keys[position]:
+            positions = self._positions[key]
+            positions.discard(position)
+            if not positions:
+                del self._positions[key]
+        self._add(position)
+
+    def first(self, key: Hashable) -> Optional[int]:
+        """キーに一致する最も前のレコードの位置を返す"""
+        try:
+            positions = self._positions.get(key)
+        except TypeError:
+            # ハッシュできないキーは索引に含まれない
+            return None
+        return min(positions) if positions else None
+
+    def find(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """キーに一致する最も前のレコードを返す"""
+        position = self.first(key)
+        return self.records[position] if position is not None else None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _add(self, position: int) -> None:
+        keys = []
+        for key in self._key_func(self.records[position]):
+            if key in keys:
+                continue
+            try:
+                self._positions.setdefault(key, set()).add(position)
+            except TypeError:
+                # リスト等のハッシュできない値はキーにしない
+                continue
+            keys.append(key)
+        self._keys[position] = keys
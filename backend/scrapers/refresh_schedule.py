@@ -0,0 +1,60 @@
+"""
+馬ごとの賞金更新スケジュール
+- horses_history.json の各馬に "prize_refresh" として保存する
+    last_checked:   最後にJBISを確認した日時
+    last_changed:   最後に賞金が変わった日時
+    unchanged_runs: 賞金が変わらなかった連続回数
+    next_check:     次に確認する日付（YYYY-MM-DD）
+- 賞金が変わった馬（現役馬）は約1か月ごとに確認する
+- 変わらない回数が続いた馬（引退馬など）は確認間隔を倍々に延ばす（上限あり）
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+SCHEDULE_KEY = 'prize_refresh'
+
+# 月1回の実行で必ず対象になるよう、基本間隔は4週間にする
+BASE_INTERVAL_DAYS = 28
+MAX_INTERVAL_DAYS = 364
+# 変わらない回数がこの回数に達したら間隔を延ばし始める（1回休んだだけの現役馬を外さない）
+STABLE_AFTER = 2
+
+
+def next_interval_days(unchanged_runs: int) -> int:
+    """変わらなかった連続回数から次の確認までの日数を返す"""
+    if unchanged_runs < STABLE_AFTER:
+        return BASE_INTERVAL_DAYS
+    return min(MAX_INTERVAL_DAYS, BASE_INTERVAL_DAYS * 2 ** (unchanged_runs - STABLE_AFTER + 1))
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def is_due(horse: Dict[str, Any], today: Optional[date] = None) -> bool:
+    """今回の実行で確認すべき馬か（スケジュールがない馬は常に対象）"""
+    schedule = horse.get(SCHEDULE_KEY)
+    if not isinstance(schedule, dict):
+        return True
+    next_check = _parse_date(schedule.get('next_check'))
+    return next_check is None or next_check <= (today or date.today())
+
+
+def record_check(horse: Dict[str, Any], changed: bool, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """確認結果をスケジュールに記録し、次の確認日を決める"""
+    now = now or datetime.now()
+    schedule = horse.get(SCHEDULE_KEY)
+    if not isinstance(schedule, dict):
+        schedule = {}
+    unchanged_runs = 0 if changed else int(schedule.get('unchanged_runs') or 0) + 1
+    schedule = {
+        'last_checked': now.isoformat(),
+        'last_changed': now.isoformat() if changed else schedule.get('last_changed'),
+        'unchanged_runs': unchanged_runs,
+        'next_check': (now.date() + timedelta(days=next_interval_days(unchanged_runs))).isoformat(),
+    }
+    horse[SCHEDULE_KEY] = schedule
+    return schedule
@@ -0,0 +1,158 @@
+"""
+スクレイピング実行のチェックポイント（途中再開用）
+- 1行目に実行ID・作成日時・取得予定のURLキュー・付加情報（開催日など）を書き、
+  以降は取得に成功したURLと解析結果を1件ごとに1行追記する（JSON Lines）
+- 途中で異常終了・強制終了しても、--resume で同じキューの未完了分だけを取得し直せる
+- 取得に失敗したURLは記録しない（再開時にもう一度取得する）
+- 結果の保存まで終わったら finish() でファイルを削除する
+
+使用例:
+  checkpoint = RunCheckpoint.for_run('horse_list', resume=True)
+  if checkpoint.queue is None:
+      checkpoint.start(links)
+  for link in checkpoint.pending():
+      ...
+      checkpoint.record(link['url'], detail_data)
+  checkpoint.finish()
+"""
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CHECKPOINT_DIR = os.path.join(PROJECT_ROOT, 'data', 'checkpoints')
+
+_RUN = 'run'
+_DONE = 'done'
+
+
+class RunCheckpoint:
+    """1回のスクレイピング実行の進捗を記録するチェックポイント
+
+    Args:
+        path: チェックポイントファイルのパス
+        resume: True の場合は既存のチェックポイントを読み込む（False の場合は破棄して新しく始める）
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.run_id: Optional[str] = None
+        self.created_at: Optional[str] = None
+        self.queue: Optional[List[Dict[str, Any]]] = None
+        self.meta: Dict[str, Any] = {}
+        self.completed: Dict[str, Any] = {}
+        self.resumed = False
+        self._file = None
+
+        if resume:
+            self.resumed = self._load()
+        elif os.path.exists(self.path):
+            print(f"前回のチェックポイントを破棄して新しく開始します: {self.path}")
+            os.remove(self.path)
+
+    @classmethod
+    def for_run(cls, name: str, resume: bool = False) -> 'RunCheckpoint':
+        """実行の種類ごとの既定パス（SCRAPER_CHECKPOINT_DIR/<name>.jsonl）で作成する"""
+        directory = os.getenv('SCRAPER_CHECKPOINT_DIR') or DEFAULT_CHECKPOINT_DIR
+        return cls(os.path.join(directory, f'{name}.jsonl'), resume=resume)
+
+    def start(self, queue: List[Dict[str, Any]], meta: Optional[Dict[str, Any]] = None) -> None:
+        """新しい実行を開始し、URLキューを書き出す
+
+        Args:
+            queue: 'url' キーを持つリンク情報のリスト（取得する順）
+            meta: 再開時に引き継ぐ付加情報（開催日など）
+        """
+        self._close()
+        self.run_id = uuid.uuid4().hex
+        self.created_at = datetime.now().isoformat()
+        self.queue = list(queue)
+        self.meta = dict(meta or {})
+        self.completed = {}
+        self.resumed = False
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        header = {'type': _RUN, 'run_id': self.run_id, 'created_at': self.created_at,
+                  'queue': self.queue, 'meta': self.meta}
+        # ヘッダーは一時ファイル経由で書き、書きかけのキューが残らないようにする
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.path)
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """キューのうち、まだ完了していないリンク情報を元の順序で返す"""
+        return [link for link in self.queue or [] if link['url'] not in self.completed]
+
+    def record(self, url: str, payload: Optional[Dict[str, Any]]) -> None:
+        """取得に成功したURLと解析結果を追記する（保存不要の場合は payload を None にする）"""
+        if self.queue is None:
+            raise RuntimeError("start() を呼ぶ前に record() は使えません")
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps({'type': _DONE, 'url': url, 'payload': payload}, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.completed[url] = payload
+
+    def finish(self) -> None:
+        """実行が完了したのでチェックポイントを削除する"""
+        self._close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self) -> None:
+        """チェックポイントを残したままファイルを閉じる"""
+        self._close()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _load(self) -> bool:
+        """既存のチェックポイントを読み込む
+
+        Returns:
+            bool: 再開できるチェックポイントがあった場合は True
+        """
+        if not os.path.exists(self.path):
+            print(f"再開できるチェックポイントがないため、最初から実行します: {self.path}")
+            return False
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        try:
+            header = json.loads(lines[0]) if lines else None
+        except json.JSONDecodeError:
+            header = None
+        if not header or header.get('type') != _RUN:
+            print(f"警告: チェックポイントを読み込めないため、最初から実行します: {self.path}")
+            return False
+
+        self.run_id = header['run_id']
+        self.created_at = header.get('created_at')
+        self.queue = header['queue']
+        self.meta = header.get('meta') or {}
+        valid_size = len(lines[0].encode('utf-8'))
+        for line in lines[1:]:
+            try:
+                if not line.endswith('\n'):
+                    raise json.JSONDecodeError('改行がありません', line, len(line))
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # 異常終了時の書きかけの行は捨て、以降の追記が壊れないように切り詰める
+                print(f"警告: チェックポイントの不完全な行を無視しました: {self.path}")
+                with open(self.path, 'r+b') as f:
+                    f.truncate(valid_size)
+                break
+            if entry.get('type') == _DONE:
+                self.completed[entry['url']] = entry['payload']
+            valid_size += len(line.encode('utf-8'))
+
+        print(f"チェックポイントから再開します (実行ID: {self.run_id}, "
+              f"完了 {len(self.completed)}/{len(self.queue)}件)")
+        return True
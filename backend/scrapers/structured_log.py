@@ -0,0 +1,172 @@
+"""
+スクレイパー用の構造化ロガー
+- ログはイベント名・メッセージ・名前付きフィールドで記録する
+- メッセージは %-形式で遅延フォーマットし、レベルが無効なら引数の文字列化も行わない
+- 環境変数 SCRAPER_LOG_LEVEL でレベルを切り替える（既定: INFO）
+- 環境変数 SCRAPER_TRACE_FILE を指定すると、事後調査用に全イベントをJSON Lines形式で書き出す
+  （トレースのレベルは SCRAPER_TRACE_LEVEL、既定: DEBUG）
+
+使用例:
+  log = get_logger('scraper.detail')
+  log.debug('pedigree.extracted', '血統情報を抽出: %s', name, sire=sire, dam=dam)
+"""
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+LOG_LEVEL_ENV_VAR = 'SCRAPER_LOG_LEVEL'
+TRACE_FILE_ENV_VAR = 'SCRAPER_TRACE_FILE'
+TRACE_LEVEL_ENV_VAR = 'SCRAPER_TRACE_LEVEL'
+ROOT_LOGGER_NAME = 'scraper'
+
+_trace_handler: Optional['JsonLinesTraceHandler'] = None
+
+
+def _parse_level(value: Optional[str], default: int) -> int:
+    if not value:
+        return default
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value.strip().upper())
+    if not isinstance(level, int):
+        raise ValueError(f"不明なログレベルです: {value}")
+    return level
+
+
+class JsonLinesTraceHandler(logging.Handler):
+    """ログレコードを1行1イベントのJSONで追記するハンドラー"""
+
+    def __init__(self, path: str, level: int = logging.DEBUG):
+        super().__init__(level)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._stream = open(path, 'a', encoding='utf-8')
+        self._write_lock = threading.Lock()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            entry = {
+                'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+                'level': record.levelname,
+                'logger': record.name,
+                'event': getattr(record, 'event', None),
+                'message': record.getMessage(),
+            }
+            fields = getattr(record, 'fields', None)
+            if fields:
+                entry['fields'] = fields
+            if record.exc_info:
+                entry['exception'] = self.formatException(record.exc_info)
+            line = json.dumps(entry, ensure_ascii=False, default=str)
+            with self._write_lock:
+                self._stream.write(line + '\n')
+                self._stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        with self._write_lock:
+            if not self._stream.closed:
+                self._stream.close()
+        super().close()
+
+
+class StructuredLogger:
+    """レベル判定を先に行う構造化ロガー
+
+    レベルが無効で、トレースも無効な場合は何も生成せずに戻るため、
+    デバッグログを大量に残してもデバッグ無効時のコストはほぼゼロになる。
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self._logger = logger
+
+    @property
+    def name(self) -> str:
+        return self._logger.name
+
+    def is_enabled_for(self, level: int) -> bool:
+        """ログ出力またはトレースのどちらかでこのレベルが有効か"""
+        trace = _trace_handler
+        return self._logger.isEnabledFor(level) or (trace is not None and level >= trace.level)
+
+    def debug(self, event: str, msg: str = '', *args: Any, **fields: Any) -> None:
+        self._log(logging.DEBUG, event, msg, args, fields)
+
+    def info(self, event: str, msg: str = '', *args: Any, **fields: Any) -> None:
+        self._log(logging.INFO, event, msg, args, fields)
+
+    def warning(self, event: str, msg: str = '', *args: Any, **fields: Any) -> None:
+        self._log(logging.WARNING, event, msg, args, fields)
+
+    def error(self, event: str, msg: str = '', *args: Any, exc_info: bool = False, **fields: Any) -> None:
+        self._log(logging.ERROR, event, msg, args, fields, exc_info)
+
+    def _log(self, level: int, event: str, msg: str, args: tuple, fields: Dict[str, Any],
+             exc_info: bool = False) -> None:
+        to_logger = self._logger.isEnabledFor(level)
+        trace = _trace_handler
+        to_trace = trace is not None and level >= trace.level
+        if not (to_logger or to_trace):
+            return
+
+        fn, lno, func = self._caller()
+        record = self._logger.makeRecord(
+            self._logger.name, level, fn, lno, msg or event, args,
+            sys.exc_info() if exc_info else None, func,
+            extra={'event': event, 'fields': fields},
+        )
+        if to_logger:
+            self._logger.handle(record)
+        if to_trace:
+            trace.handle(record)
+
+    def _caller(self):
+        try:
+            fn, lno, func, _ = self._logger.findCaller(stacklevel=4)
+        except ValueError:
+            fn, lno, func = '(unknown file)', 0, '(unknown function)'
+        return fn, lno, func
+
+    def __repr__(self) -> str:
+        return f'<StructuredLogger {self._logger.name}>'
+
+
+def get_logger(name: str = ROOT_LOGGER_NAME) -> StructuredLogger:
+    """構造化ロガーを取得する（名前は 'scraper.' 配下にまとめる）"""
+    if name != ROOT_LOGGER_NAME and not name.startswith(ROOT_LOGGER_NAME + '.'):
+        name = f'{ROOT_LOGGER_NAME}.{name}'
+    return StructuredLogger(logging.getLogger(name))
+
+
+def enable_trace(path: str, level: int = logging.DEBUG) -> JsonLinesTraceHandler:
+    """JSON Linesのトレース出力を有効にする（既に有効な場合は置き換える）"""
+    global _trace_handler
+    disable_trace()
+    _trace_handler = JsonLinesTraceHandler(path, level)
+    return _trace_handler
+
+
+def disable_trace() -> None:
+    """トレース出力を無効にする"""
+    global _trace_handler
+    handler, _trace_handler = _trace_handler, None
+    if handler is not None:
+        handler.close()
+
+
+def configure_from_env() -> None:
+    """環境変数からログレベルとトレース出力を設定する"""
+    logging.getLogger(ROOT_LOGGER_NAME).setLevel(_parse_level(os.getenv(LOG_LEVEL_ENV_VAR), logging.INFO))
+    trace_file = os.getenv(TRACE_FILE_ENV_VAR)
+    if trace_file:
+        enable_trace(trace_file, _parse_level(os.getenv(TRACE_LEVEL_ENV_VAR), logging.DEBUG))
+
+
+configure_from_env()
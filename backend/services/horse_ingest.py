@@ -0,0 +1,335 @@
+"""
+スクレイピング結果のまとめ保存（バルクupsert）
+- 既存馬は馬名の IN 検索でまとめて取得する（1頭ごとの SELECT をしない）
+- 履歴カラム（JSON配列文字列）の追記はメモリ上で行う
+- 新規馬は1回の executemany で INSERT、既存馬は主キー指定の executemany で UPDATE し、1トランザクションでコミットする
+- 出品ごとの履歴（auction_entries）も同じトランザクションで追加・更新する
+- フェーズごとの所要時間を記録する
+"""
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.database.models import AuctionEntry, Horse
+from backend.services.result_cache import mark_dataset_changed
+
+# 履歴として JSON 配列文字列で保存するカラム
+HISTORY_COLUMNS = ['auction_date', 'age', 'sex', 'seller', 'sold_price', 'comment']
+
+# SQLiteのバインド変数の上限（古いバージョンは999）を超えないよう IN 検索を分割する
+IN_CHUNK_SIZE = 500
+
+_COLUMNS = {column.key for column in Horse.__table__.columns}
+
+
+class IngestResult:
+    """まとめ保存の結果"""
+
+    def __init__(self):
+        self.horses: List[Horse] = []
+        self.inserted = 0
+        self.updated = 0
+        self.timings: Dict[str, float] = {}
+
+    def format_timings(self) -> str:
+        return ', '.join(f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in self.timings.items())
+
+
+def _load_history(value: Optional[str]) -> List[Any]:
+    try:
+        return json.loads(value) if value else []
+    except Exception:
+        return []
+
+
+def _history_values(value: Any) -> List[Any]:
+    """履歴カラムの値を配列にする（API経由で配列でない値が入っている場合も扱う）"""
+    if value is None or value == '':
+        return []
+    try:
+        values = json.loads(value) if isinstance(value, str) else value
+    except Exception:
+        return [value]
+    return values if isinstance(values, list) else [values]
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        digits = value.replace(',', '').replace('円', '').strip()
+        if digits.isdigit():
+            return int(digits)
+    return None
+
+
+def lot_entry(horse_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """1回の出品データから auction_entries の行を作成する（開催日がなければ None）"""
+    auction_date = horse_data.get('auction_date') or ''
+    if not auction_date:
+        return None
+    unsold = bool(horse_data.get('unsold'))
+    sold_price = _to_int(horse_data.get('sold_price'))
+    return {
+        'auction_date': str(auction_date),
+        'age': _to_int(horse_data.get('age')),
+        'sex': horse_data.get('sex') or None,
+        'seller': horse_data.get('seller') or None,
+        # 主取り・0円は落札価格なしとして扱う
+        'sold_price': sold_price if sold_price and not unsold else None,
+        'unsold': unsold,
+        'comment': horse_data.get('comment') or None,
+    }
+
+
+def _pick(values: List[Any], i: int, count: int, carry: bool) -> Any:
+    """開催日の i 番目に対応する履歴の値を選ぶ
+
+    落札価格・コメントは出品ごとに追記されるため、件数が開催日より多い場合は新しいものを使う。
+    性別・販売申込者は変化した時だけ追記されるため、足りない場合は直前の値を引き継ぐ（carry）。
+    """
+    if not values:
+        return None
+    if len(values) >= count:
+        return values[len(values) - count + i]
+    if carry:
+        return values[min(i, len(values) - 1)]
+    return values[i] if i < len(values) else None
+
+
+def history_entries(row: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """horsesの履歴カラム（JSON配列文字列）から auction_entries の行を復元する
+
+    履歴カラムは出品ごとの対応を持たないため、開催日の順に各配列の値を割り当てる。
+    """
+    values = {column: _history_values(row.get(column)) for column in HISTORY_COLUMNS}
+    dates = values['auction_date']
+    entries: Dict[str, Dict[str, Any]] = {}
+    for i, auction_date in enumerate(dates):
+        sold_price = _pick(values['sold_price'], i, len(dates), carry=False)
+        entry = lot_entry({
+            'auction_date': auction_date,
+            'age': _pick(values['age'], i, len(dates), carry=False),
+            'sex': _pick(values['sex'], i, len(dates), carry=True),
+            'seller': _pick(values['seller'], i, len(dates), carry=True),
+            'sold_price': sold_price,
+            'unsold': bool(row.get('unsold_count')) and not _to_int(sold_price),
+            'comment': _pick(values['comment'], i, len(dates), carry=False),
+        })
+        if entry:
+            entries[entry['auction_date']] = entry
+    return list(entries.values())
+
+
+def sync_auction_entries(horse: Horse) -> None:
+    """馬の履歴カラムに合わせて出品履歴を作り直す（1頭ずつの作成・更新用）"""
+    row = {key: getattr(horse, key) for key in _COLUMNS}
+    current = {entry.auction_date: entry for entry in horse.auction_entries}
+    entries = []
+    for values in history_entries(row):
+        entry = current.get(values['auction_date']) or AuctionEntry()
+        for key, value in values.items():
+            setattr(entry, key, value)
+        entries.append(entry)
+    # 同じ開催日の行は更新するので、一意制約（馬・開催日）に反しない
+    horse.auction_entries = entries
+
+
+def _dump_history(values: List[Any]) -> str:
+    return json.dumps(values, ensure_ascii=False)
+
+
+def _merge_existing(row: Dict[str, Any], horse_data: Dict[str, Any]) -> None:
+    """既存馬の行（カラム名 → 値）に新しい出品情報を追記する"""
+    # 各履歴カラムの新値
+    new_date = horse_data.get('auction_date', '') or ''
+    new_age = horse_data.get('age', '') or ''
+    new_sex = horse_data.get('sex', '') or ''
+    new_seller = horse_data.get('seller', '') or ''
+    new_sold_price = horse_data.get('sold_price', '') or ''
+    new_comment = horse_data.get('comment', '') or ''
+
+    existing_dates = _load_history(row.get('auction_date'))
+    existing_ages = _load_history(row.get('age'))
+    existing_sexes = _load_history(row.get('sex'))
+    existing_sellers = _load_history(row.get('seller'))
+    existing_prices = _load_history(row.get('sold_price'))
+    existing_comments = _load_history(row.get('comment'))
+
+    # auction_date/age: 新しい日付がなければappend
+    if new_date not in existing_dates:
+        existing_dates.append(new_date)
+        existing_ages.append(new_age)
+    # sex: 直前と異なればappend
+    if not existing_sexes or (new_sex and new_sex != existing_sexes[-1]):
+        existing_sexes.append(new_sex)
+    # seller: 直前と異なればappend
+    if not existing_sellers or (new_seller and new_seller != existing_sellers[-1]):
+        existing_sellers.append(new_seller)
+    # sold_price: 常にappend
+    existing_prices.append(new_sold_price)
+    # comment: 常にappend
+    existing_comments.append(new_comment)
+    # 昇順ソート（auction_date/ageのみ）
+    if len(existing_dates) == len(existing_ages):
+        paired = sorted(zip(existing_dates, existing_ages), key=lambda x: x[0])
+        existing_dates = [date for date, _ in paired]
+        existing_ages = [age for _, age in paired]
+
+    row['auction_date'] = _dump_history(existing_dates)
+    row['age'] = _dump_history(existing_ages)
+    row['sex'] = _dump_history(existing_sexes)
+    row['seller'] = _dump_history(existing_sellers)
+    row['sold_price'] = _dump_history(existing_prices)
+    row['comment'] = _dump_history(existing_comments)
+    # その他の情報も更新
+    for key, value in horse_data.items():
+        if key not in HISTORY_COLUMNS and key in _COLUMNS:
+            row[key] = value
+    row['updated_at'] = datetime.utcnow()
+
+
+def _new_row(horse_data: Dict[str, Any]) -> Dict[str, Any]:
+    """新規馬の行を作成する（履歴カラムは配列で初期化）"""
+    row = {key: value for key, value in horse_data.items() if key in _COLUMNS and key not in HISTORY_COLUMNS}
+    for column in HISTORY_COLUMNS:
+        row[column] = _dump_history([horse_data.get(column, '') or ''])
+    return row
+
+
+def _select_by_names(db: Session, names: List[str]) -> List[Dict[str, Any]]:
+    table = Horse.__table__
+    rows: List[Dict[str, Any]] = []
+    for start in range(0, len(names), IN_CHUNK_SIZE):
+        chunk = names[start:start + IN_CHUNK_SIZE]
+        statement = select(table).where(table.c.name.in_(chunk)).order_by(table.c.id)
+        rows.extend(dict(row) for row in db.execute(statement).mappings())
+    return rows
+
+
+def _select_ids(db: Session, names: List[str]) -> Dict[str, int]:
+    table = Horse.__table__
+    ids: Dict[str, int] = {}
+    for start in range(0, len(names), IN_CHUNK_SIZE):
+        chunk = names[start:start + IN_CHUNK_SIZE]
+        statement = select(table.c.id, table.c.name).where(table.c.name.in_(chunk)).order_by(table.c.id)
+        for horse_id, name in db.execute(statement):
+            ids.setdefault(name, horse_id)
+    return ids
+
+
+def _write_entries(db: Session, horses_data: List[Dict[str, Any]], rows_by_name: Dict[str, Dict[str, Any]],
+                   inserts: Dict[str, Dict[str, Any]]) -> None:
+    """出品ごとの履歴を auction_entries に書き込む（同じ馬・開催日は後の出品で上書き）"""
+    ids = {name: row['id'] for name, row in rows_by_name.items() if name not in inserts}
+    if inserts:
+        ids.update(_select_ids(db, list(inserts)))
+
+    entries: Dict[tuple, Dict[str, Any]] = {}
+    for horse_data in horses_data:
+        entry = lot_entry(horse_data)
+        if entry:
+            entry['horse_id'] = ids[horse_data['name']]
+            entries[(entry['horse_id'], entry['auction_date'])] = entry
+    if not entries:
+        return
+
+    # 既存馬の同じ開催日の行は UPDATE する
+    existing_ids = sorted({horse_id for name, horse_id in ids.items() if name not in inserts})
+    dates = sorted({auction_date for _, auction_date in entries})
+    table = AuctionEntry.__table__
+    for start in range(0, len(existing_ids), IN_CHUNK_SIZE):
+        chunk = existing_ids[start:start + IN_CHUNK_SIZE]
+        statement = select(table.c.id, table.c.horse_id, table.c.auction_date).where(
+            table.c.horse_id.in_(chunk), table.c.auction_date.in_(dates))
+        for entry_id, horse_id, auction_date in db.execute(statement):
+            entry = entries.get((horse_id, auction_date))
+            if entry:
+                entry['id'] = entry_id
+
+    new_entries = [entry for entry in entries.values() if 'id' not in entry]
+    changed_entries = [entry for entry in entries.values() if 'id' in entry]
+    if new_entries:
+        db.bulk_insert_mappings(AuctionEntry, new_entries)
+    if changed_entries:
+        db.bulk_update_mappings(AuctionEntry, changed_entries)
+
+
+def bulk_upsert_horses(db: Session, horses_data: List[Dict[str, Any]]) -> IngestResult:
+    """スクレイピングした馬データをまとめてデータベースに保存する
+
+    同じ馬名の既存馬があれば履歴カラムに追記し、なければ新規に追加する。
+    1頭ずつ保存する場合と同じく、同じ馬名が複数回出品されていれば順に追記する。
+    モデルにないキー（detail_url など）は保存しない。
+
+    Returns:
+        IngestResult: 保存した馬（出品順）、追加・更新件数、フェーズごとの所要時間
+    """
+    result = IngestResult()
+    started = time.perf_counter()
+
+    # 1. 既存馬の取得（馬名の IN 検索）
+    names = list(dict.fromkeys(horse_data['name'] for horse_data in horses_data))
+    rows_by_name: Dict[str, Dict[str, Any]] = {}
+    for row in _select_by_names(db, names):
+        # 同名の馬が複数あれば最初の1頭を使う
+        rows_by_name.setdefault(row['name'], row)
+    now = time.perf_counter()
+    result.timings['resolve'] = now - started
+    started = now
+
+    # 2. メモリ上で履歴をマージ
+    inserts: Dict[str, Dict[str, Any]] = {}
+    updates: Dict[str, Dict[str, Any]] = {}
+    for horse_data in horses_data:
+        name = horse_data['name']
+        unsold = bool(horse_data.get('unsold'))
+        row = rows_by_name.get(name)
+        if row is None:
+            horse_data['unsold_count'] = 1 if unsold else 0
+            row = rows_by_name[name] = inserts[name] = _new_row(horse_data)
+            continue
+        # 既存馬のunsold_countを累積
+        prev_unsold_count = row.get('unsold_count', 0) or 0
+        horse_data['unsold_count'] = prev_unsold_count + 1 if unsold else prev_unsold_count
+        _merge_existing(row, horse_data)
+        if name not in inserts:
+            updates[name] = row
+    now = time.perf_counter()
+    result.timings['merge'] = now - started
+    started = now
+
+    # 3. まとめて書き込み（1トランザクション）
+    try:
+        if inserts:
+            db.bulk_insert_mappings(Horse, list(inserts.values()))
+        if updates:
+            db.bulk_update_mappings(Horse, list(updates.values()))
+        _write_entries(db, horses_data, rows_by_name, inserts)
+        # バルク操作はセッションのイベントが発生しないため、集計結果のキャッシュに書き込みを知らせる
+        mark_dataset_changed(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    now = time.perf_counter()
+    result.timings['write'] = now - started
+    started = now
+
+    # 4. 保存した馬を出品順に返す
+    horses_by_name: Dict[str, Horse] = {}
+    for start in range(0, len(names), IN_CHUNK_SIZE):
+        chunk = names[start:start + IN_CHUNK_SIZE]
+        for horse in db.query(Horse).filter(Horse.name.in_(chunk)).order_by(Horse.id):
+            horses_by_name.setdefault(horse.name, horse)
+    result.horses = [horses_by_name[horse_data['name']] for horse_data in horses_data]
+    result.inserted = len(inserts)
+    result.updated = len(updates)
+    result.timings['reload'] = time.perf_counter() - started
+    return result
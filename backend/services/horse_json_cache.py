@@ -0,0 +1,132 @@
+"""
+馬1頭分のAPIレスポンス（JSON）のキャッシュ
+- 1頭分のレスポンスを JSON のバイト列にして、馬の id ごとに保持する
+- キャッシュした時の updated_at と、一覧のクエリで取得した updated_at が違う馬は作り直す
+  （スクレイパーなど別のプロセスでの更新も updated_at で検出できる）
+- 一覧は id と updated_at だけを SELECT し、キャッシュにない馬だけ全項目を読み込む
+  レスポンスはキャッシュしたバイト列をつなげて作る（Python のオブジェクトに戻さない）
+- JSON への変換は orjson を使う（未インストールの場合は標準の json）
+
+使用例:
+  cache = HorseJsonCache()
+  body, next_cursor = cache.render_page(db, limit=100, cursor=request_cursor)
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.database.models import Horse
+from backend.services.horse_listing import RESPONSE_FIELDS, fetch_horse_page, serialize_row
+
+try:
+    import orjson
+except ImportError:  # orjsonは任意の依存
+    orjson = None
+
+# 保持する馬の数（超えた場合は最も古く使われた馬から捨てる）
+DEFAULT_MAX_ENTRIES = int(os.getenv('HORSE_JSON_CACHE_SIZE', '20000'))
+
+# 一度に読み込む馬の数（SQLite のバインド変数の上限より小さくする）
+LOAD_CHUNK_SIZE = 500
+
+
+def dumps(value: Any) -> bytes:
+    """JSON のバイト列にする（空白なし・非ASCII文字はそのまま）"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def render_horse(row: Dict[str, Any]) -> bytes:
+    """SELECT した1頭分の行をレスポンスの JSON にする"""
+    return dumps(serialize_row(row, RESPONSE_FIELDS))
+
+
+class HorseJsonCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # id -> (updated_at, JSON)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self, horse_id: Optional[int] = None):
+        """馬のキャッシュを捨てる（horse_id が None の場合はすべて）"""
+        with self._lock:
+            if horse_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(horse_id, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        """キャッシュの状態とヒット率"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else None,
+        }
+
+    def get_many(self, db: Session, keys: Iterable[Tuple[int, Any]]) -> List[bytes]:
+        """(id, updated_at) の順にレスポンスの JSON を返す（削除された馬は含めない）"""
+        keys = list(keys)
+        found = {}
+        missing = []
+        with self._lock:
+            for horse_id, updated_at in keys:
+                entry = self._entries.get(horse_id)
+                if entry is not None and entry[0] == updated_at:
+                    self._entries.move_to_end(horse_id)
+                    found[horse_id] = entry[1]
+                else:
+                    missing.append(horse_id)
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            table = Horse.__table__
+            columns = [table.c[name] for name in RESPONSE_FIELDS]
+            for start in range(0, len(missing), LOAD_CHUNK_SIZE):
+                chunk = missing[start:start + LOAD_CHUNK_SIZE]
+                for row in db.execute(select(*columns).where(table.c.id.in_(chunk))).mappings():
+                    found[row['id']] = self._store(row['id'], row['updated_at'], render_horse(row))
+        return [found[horse_id] for horse_id, _ in keys if horse_id in found]
+
+    def get_one(self, db: Session, horse_id: int) -> Optional[bytes]:
+        """1頭分のレスポンスの JSON を返す（見つからない場合は None）"""
+        table = Horse.__table__
+        key = db.execute(select(table.c.id, table.c.updated_at).where(table.c.id == horse_id)).first()
+        if key is None:
+            self.invalidate(horse_id)
+            return None
+        bodies = self.get_many(db, [tuple(key)])
+        return bodies[0] if bodies else None
+
+    def render_page(self, db: Session, **kwargs) -> Tuple[bytes, Optional[str]]:
+        """一覧の1ページをレスポンスの JSON 配列にする（引数は list_horse_rows と同じ。fields は指定できない）
+
+        Returns:
+            Tuple[bytes, Optional[str]]: (JSON 配列, 次のページのカーソル)
+        """
+        rows, next_cursor = fetch_horse_page(db, fields=['id', 'updated_at'], **kwargs)
+        bodies = self.get_many(db, [(row['id'], row['updated_at']) for row in rows])
+        return b'[' + b','.join(bodies) + b']', next_cursor
+
+    def _store(self, horse_id: int, updated_at: Any, body: bytes) -> bytes:
+        with self._lock:
+            self._entries[horse_id] = (updated_at, body)
+            self._entries.move_to_end(horse_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
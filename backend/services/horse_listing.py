@@ -0,0 +1,193 @@
+"""
+馬一覧APIのページングと項目の絞り込み
+- カーソル（前のページの最後の馬のキー）で次のページを検索する（OFFSET を使わない）
+    id 順        : WHERE id > :id ORDER BY id
+    updated_at 順: WHERE (updated_at, id) < (:updated_at, :id) ORDER BY updated_at DESC, id DESC
+                   updated_at が NULL の馬は行値の比較で除かれるため、その後に
+                   WHERE updated_at IS NULL AND id < :id ORDER BY id DESC で返す
+  どちらもインデックスの範囲検索になるため、深いページでも1ページ目と同じコストで取得できる
+- fields で指定した項目のカラムだけを SELECT する（ORM オブジェクトを作らない）
+- 履歴カラム（JSON配列文字列）の配列化と日時の文字列化を1回で行い、そのままJSONにできる dict を返す
+
+使用例:
+  rows, next_cursor = list_horse_rows(db, limit=100, cursor=request_cursor, fields=['id', 'name'])
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from backend.database.models import AuctionEntry, Horse, normalize_name, normalized_name
+
+# APIで返す項目（HorseResponse と同じ順）
+RESPONSE_FIELDS = [
+    'id', 'name', 'sex', 'age', 'sire', 'dam', 'dam_sire', 'race_record', 'weight',
+    'total_prize_start', 'total_prize_latest', 'sold_price', 'auction_date', 'seller',
+    'disease_tags', 'comment', 'image_url', 'unsold_count', 'created_at', 'updated_at',
+]
+
+# 配列で返す履歴カラム
+JSON_ARRAY_FIELDS = {'sex', 'age', 'sold_price', 'auction_date', 'seller', 'comment'}
+
+# 並び順ごとのキー（カーソルに入れるカラム）
+ORDERS = {
+    'id': ('id',),
+    'updated_at': ('updated_at', 'id'),
+}
+
+MAX_LIMIT = 1000
+
+
+class InvalidQuery(ValueError):
+    """fields / order_by / cursor の指定が不正"""
+
+
+def parse_json_field(value: Any) -> List[Any]:
+    """履歴カラムの値を配列にする（JSONでない値は1要素の配列にする）"""
+    try:
+        if value is None:
+            return []
+        return json.loads(value)
+    except Exception:
+        return [value] if value else []
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """カンマ区切りの項目名を検証して返す（未指定の場合はすべての項目）"""
+    if not fields:
+        return list(RESPONSE_FIELDS)
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in RESPONSE_FIELDS]
+    if unknown:
+        raise InvalidQuery(f"不明な項目です: {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+
+def encode_cursor(order_by: str, row: Dict[str, Any]) -> str:
+    """ページの最後の馬から次のページのカーソルを作る"""
+    values = []
+    for key in ORDERS[order_by]:
+        value = row[key]
+        values.append(value.isoformat() if isinstance(value, datetime) else value)
+    raw = json.dumps({'o': order_by, 'k': values}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(order_by: str, cursor: str) -> List[Any]:
+    """カーソルからキーの値を取り出す（並び順が違うカーソルは不正とする）"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw.decode('utf-8'))
+        values = data['k']
+        if data['o'] != order_by or len(values) != len(ORDERS[order_by]):
+            raise ValueError(data['o'])
+        if not isinstance(values[-1], int) or isinstance(values[-1], bool):
+            raise ValueError(values[-1])
+        if order_by == 'updated_at' and values[0] is not None:
+            # updated_at が NULL の馬のカーソルは None のまま
+            if not isinstance(values[0], str):
+                raise ValueError(values[0])
+            values[0] = datetime.fromisoformat(values[0])
+    except Exception:
+        raise InvalidQuery("cursor が不正です（並び順を変えた場合は最初のページから取得してください）")
+    return values
+
+
+def serialize_row(row: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """SELECT した1行をレスポンスの dict にする"""
+    item = {}
+    for name in fields:
+        value = row[name]
+        if name in JSON_ARRAY_FIELDS:
+            value = parse_json_field(value)
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        item[name] = value
+    return item
+
+
+def _fetch(db: Session, statement, limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+    if offset > 0:
+        statement = statement.offset(offset)
+    return [dict(row) for row in db.execute(statement.limit(limit)).mappings()]
+
+
+def fetch_horse_page(db: Session, limit: int = 100, cursor: Optional[str] = None, order_by: str = 'id',
+                     fields: Optional[Sequence[str]] = None, auction_date: Optional[str] = None,
+                     name: Optional[str] = None, offset: int = 0) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """馬の一覧を1ページ取得する（SELECT した値のまま返す。引数は list_horse_rows と同じ）"""
+    if order_by not in ORDERS:
+        raise InvalidQuery(f"order_by は {' / '.join(ORDERS)} のいずれかを指定してください")
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    fields = list(fields or RESPONSE_FIELDS)
+    table = Horse.__table__
+    keys = ORDERS[order_by]
+    columns = [table.c[name] for name in dict.fromkeys(list(fields) + list(keys))]
+
+    statement = select(*columns)
+    if auction_date:
+        horse_ids = select(AuctionEntry.__table__.c.horse_id).where(AuctionEntry.__table__.c.auction_date == auction_date)
+        statement = statement.where(table.c.id.in_(horse_ids))
+    if name:
+        statement = statement.where(normalized_name(table.c.name) == normalize_name(name))
+
+    if order_by == 'id':
+        # 最初のページも主キーの範囲検索にする
+        last_id = decode_cursor(order_by, cursor)[0] if cursor else 0
+        statement = statement.where(table.c.id > last_id).order_by(table.c.id)
+        rows = _fetch(db, statement, limit + 1, offset)
+    elif offset > 0:
+        # skip を使う既存のクライアント用（NULL の馬を最後にした1つのクエリで読み飛ばす）
+        statement = statement.order_by(table.c.updated_at.desc().nulls_last(), table.c.id.desc())
+        rows = _fetch(db, statement, limit + 1, offset)
+    else:
+        updated_at, last_id = decode_cursor(order_by, cursor) if cursor else (None, None)
+        rows = []
+        if cursor is None or updated_at is not None:
+            dated = statement.where(table.c.updated_at.isnot(None))
+            if cursor:
+                dated = dated.where(tuple_(table.c.updated_at, table.c.id) < (updated_at, last_id))
+            rows = _fetch(db, dated.order_by(table.c.updated_at.desc(), table.c.id.desc()), limit + 1)
+        if len(rows) <= limit:
+            # updated_at が NULL の馬（カーソルが NULL の馬の場合はその続きから）
+            undated = statement.where(table.c.updated_at.is_(None))
+            if cursor and updated_at is None:
+                undated = undated.where(table.c.id < last_id)
+            rows += _fetch(db, undated.order_by(table.c.id.desc()), limit + 1 - len(rows))
+
+    # 1件多く取得して、次のページがあるかを判定する
+    next_cursor = encode_cursor(order_by, rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def list_horse_rows(db: Session, limit: int = 100, cursor: Optional[str] = None, order_by: str = 'id',
+                    fields: Optional[Sequence[str]] = None, auction_date: Optional[str] = None,
+                    name: Optional[str] = None, offset: int = 0) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """馬の一覧を1ページ取得する
+
+    Args:
+        limit: 1ページの件数（1〜MAX_LIMIT）
+        cursor: 前のページのレスポンスで返したカーソル（最初のページは None）
+        order_by: 'id'（昇順）または 'updated_at'（新しい順）
+        fields: 返す項目（None の場合はすべて）
+        auction_date: 指定した開催日に出品された馬に絞り込む
+        name: 正規化した馬名が一致する馬に絞り込む
+        offset: 読み飛ばす件数（skip を使う既存のクライアント用。深いページほど遅くなる）
+
+    Returns:
+        Tuple[List[Dict], Optional[str]]: (レスポンスの dict のリスト, 次のページのカーソル。最後のページは None)
+    """
+    rows, next_cursor = fetch_horse_page(db, limit=limit, cursor=cursor, order_by=order_by, fields=fields,
+                                         auction_date=auction_date, name=name, offset=offset)
+    return [serialize_row(row, fields or RESPONSE_FIELDS) for row in rows], next_cursor
+
+
+def get_horse_row(db: Session, horse_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+    """1頭分をレスポンスの dict で取得する（見つからない場合は None）"""
+    fields = list(fields or RESPONSE_FIELDS)
+    table = Horse.__table__
+    row = db.execute(select(*[table.c[name] for name in fields]).where(table.c.id == horse_id)).mappings().first()
+    return serialize_row(dict(row), fields) if row else None
@@ -1,18 +1,35 @@
 from sqlalchemy.orm import Session
-from backend.database.models import Horse, get_db
-from backend.scrapers.rakuten_scraper import RakutenAuctionScraper
-from typing import List, Dict, Optional
+from backend.database.models import AuctionEntry, Horse, get_db, normalize_name, normalized_name
+from backend.services.horse_ingest import HISTORY_COLUMNS, bulk_upsert_horses, sync_auction_entries
+from backend.services.horse_json_cache import HorseJsonCache
+from backend.services.horse_listing import get_horse_row, list_horse_rows
+from backend.services.result_cache import ResultCache
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import json
 from sqlalchemy.inspection import inspect
 
 class HorseService:
-    def __init__(self):
-        self.rakuten_scraper = RakutenAuctionScraper()
+    def __init__(self, rakuten_scraper=None, json_cache: Optional[HorseJsonCache] = None,
+                 result_cache: Optional[ResultCache] = None):
+        self._rakuten_scraper = rakuten_scraper
+        # 参照APIのレスポンス（1頭分のJSON）のキャッシュ
+        self.json_cache = json_cache or HorseJsonCache()
+        # 統計情報・開催日の一覧のキャッシュ（書き込みのコミットで無効になる）
+        self.result_cache = result_cache or ResultCache.from_env()
+    
+    @property
+    def rakuten_scraper(self):
+        """楽天オークションのスクレイパー（参照APIでは使わないため、初めて使う時に作成する）"""
+        if self._rakuten_scraper is None:
+            from backend.scrapers.rakuten_scraper import RakutenAuctionScraper
+            self._rakuten_scraper = RakutenAuctionScraper()
+        return self._rakuten_scraper
     
     def create_horse(self, db: Session, horse_data: Dict) -> Horse:
         """馬データをデータベースに保存"""
         horse = Horse(**horse_data)
+        sync_auction_entries(horse)
         db.add(horse)
         db.commit()
         db.refresh(horse)
@@ -22,13 +39,49 @@ class HorseService:
         """馬データを取得"""
         return db.query(Horse).offset(skip).limit(limit).all()
     
+    def list_horses(self, db: Session, limit: int = 100, cursor: Optional[str] = None, order_by: str = 'id',
+                    fields: Optional[List[str]] = None, auction_date: Optional[str] = None,
+                    name: Optional[str] = None, offset: int = 0) -> Tuple[List[Dict], Optional[str]]:
+        """馬データをカーソルでページングして取得（指定した項目だけをレスポンスの dict で返す）"""
+        return list_horse_rows(db, limit=limit, cursor=cursor, order_by=order_by, fields=fields,
+                               auction_date=auction_date, name=name, offset=offset)
+    
+    def get_horse_fields(self, db: Session, horse_id: int, fields: Optional[List[str]] = None) -> Optional[Dict]:
+        """IDで馬データを取得（指定した項目だけをレスポンスの dict で返す）"""
+        return get_horse_row(db, horse_id, fields)
+    
+    def list_horses_json(self, db: Session, limit: int = 100, cursor: Optional[str] = None, order_by: str = 'id',
+                         auction_date: Optional[str] = None, name: Optional[str] = None,
+                         offset: int = 0) -> Tuple[bytes, Optional[str]]:
+        """馬データの1ページ分（全項目）をキャッシュしたJSONから作る"""
+        return self.json_cache.render_page(db, limit=limit, cursor=cursor, order_by=order_by,
+                                           auction_date=auction_date, name=name, offset=offset)
+    
+    def get_horse_json(self, db: Session, horse_id: int) -> Optional[bytes]:
+        """IDで馬データ（全項目）をキャッシュしたJSONで取得"""
+        return self.json_cache.get_one(db, horse_id)
+    
     def get_horse_by_id(self, db: Session, horse_id: int) -> Optional[Horse]:
         """IDで馬データを取得"""
         return db.query(Horse).filter(Horse.id == horse_id).first()
     
+    def get_horses_by_name(self, db: Session, name: str) -> List[Horse]:
+        """馬名で馬データを取得（空白の有無を無視して比較し、正規化した馬名の式インデックスを使う）"""
+        return db.query(Horse).filter(normalized_name(Horse.name) == normalize_name(name)).order_by(Horse.id).all()
+    
     def get_horses_by_auction_date(self, db: Session, auction_date: str) -> List[Horse]:
-        """開催日で馬データを取得"""
-        return db.query(Horse).filter(Horse.auction_date == auction_date).all()
+        """開催日で馬データを取得（出品履歴の開催日インデックスを使う）"""
+        horse_ids = db.query(AuctionEntry.horse_id).filter(AuctionEntry.auction_date == auction_date)
+        return db.query(Horse).filter(Horse.id.in_(horse_ids)).order_by(Horse.id).all()
+    
+    def get_auction_dates(self, db: Session) -> List[str]:
+        """開催日の一覧を取得"""
+        return self.result_cache.get_or_compute('auction_dates', lambda: self._load_auction_dates(db))
+    
+    def _load_auction_dates(self, db: Session) -> List[str]:
+        """開催日の一覧をDBから取得する"""
+        dates = db.query(AuctionEntry.auction_date).distinct().order_by(AuctionEntry.auction_date).all()
+        return [date[0] for date in dates]
     
     def update_horse(self, db: Session, horse_id: int, horse_data: Dict) -> Optional[Horse]:
         """馬データを更新"""
@@ -36,9 +89,12 @@ class HorseService:
         if horse:
             for key, value in horse_data.items():
                 setattr(horse, key, value)
+            if any(key in HISTORY_COLUMNS for key in horse_data):
+                sync_auction_entries(horse)
             horse.updated_at = datetime.utcnow()
             db.commit()
             db.refresh(horse)
+            self.json_cache.invalidate(horse_id)
         return horse
     
     def delete_horse(self, db: Session, horse_id: int) -> bool:
@@ -47,6 +103,7 @@ class HorseService:
         if horse:
             db.delete(horse)
             db.commit()
+            self.json_cache.invalidate(horse_id)
             return True
         return False
     
@@ -62,107 +119,10 @@ class HorseService:
             
             # netkeiba_scraper関連の処理を全て削除
             
-            # データベースに保存
-            saved_horses = []
-            for horse_data in horses_data:
-                # 主取り回数の管理
-                unsold_count = 0
-                if 'unsold' in horse_data and horse_data['unsold']:
-                    unsold_count = 1
-                existing_horse = db.query(Horse).filter(
-                    Horse.name == horse_data['name']
-                ).first()
-                if existing_horse:
-                    # 既存馬のunsold_countを累積
-                    prev_unsold_count = getattr(existing_horse, 'unsold_count', 0) or 0
-                    if 'unsold' in horse_data and horse_data['unsold']:
-                        unsold_count = prev_unsold_count + 1
-                    else:
-                        unsold_count = prev_unsold_count
-                horse_data['unsold_count'] = unsold_count
-                # 各履歴カラムの新値
-                new_date = horse_data.get('auction_date', '') or ''
-                new_age = horse_data.get('age', '') or ''
-                new_sex = horse_data.get('sex', '') or ''
-                new_seller = horse_data.get('seller', '') or ''
-                new_sold_price = horse_data.get('sold_price', '') or ''
-                new_comment = horse_data.get('comment', '') or ''
-                
-                if existing_horse:
-                    # auction_date/age履歴
-                    try:
-                        existing_dates = json.loads(getattr(existing_horse, 'auction_date', '')) if getattr(existing_horse, 'auction_date', '') else []
-                    except Exception:
-                        existing_dates = []
-                    try:
-                        existing_ages = json.loads(getattr(existing_horse, 'age', '')) if getattr(existing_horse, 'age', '') else []
-                    except Exception:
-                        existing_ages = []
-                    # sex履歴
-                    try:
-                        existing_sexes = json.loads(getattr(existing_horse, 'sex', '')) if getattr(existing_horse, 'sex', '') else []
-                    except Exception:
-                        existing_sexes = []
-                    # seller履歴
-                    try:
-                        existing_sellers = json.loads(getattr(existing_horse, 'seller', '')) if getattr(existing_horse, 'seller', '') else []
-                    except Exception:
-                        existing_sellers = []
-                    # sold_price履歴
-                    try:
-                        existing_prices = json.loads(getattr(existing_horse, 'sold_price', '')) if getattr(existing_horse, 'sold_price', '') else []
-                    except Exception:
-                        existing_prices = []
-                    # comment履歴
-                    try:
-                        existing_comments = json.loads(getattr(existing_horse, 'comment', '')) if getattr(existing_horse, 'comment', '') else []
-                    except Exception:
-                        existing_comments = []
-                    # auction_date/age: 新しい日付がなければappend
-                    if new_date not in existing_dates:
-                        existing_dates.append(new_date)
-                        existing_ages.append(new_age)
-                    # sex: 直前と異なればappend
-                    if not existing_sexes or (new_sex and new_sex != existing_sexes[-1]):
-                        existing_sexes.append(new_sex)
-                    # seller: 直前と異なればappend
-                    if not existing_sellers or (new_seller and new_seller != existing_sellers[-1]):
-                        existing_sellers.append(new_seller)
-                    # sold_price: 常にappend
-                    existing_prices.append(new_sold_price)
-                    # comment: 常にappend
-                    existing_comments.append(new_comment)
-                    # 昇順ソート（auction_date/ageのみ）
-                    if len(existing_dates) == len(existing_ages):
-                        paired = sorted(zip(existing_dates, existing_ages), key=lambda x: x[0])
-                        existing_dates, existing_ages = zip(*paired)
-                        existing_dates = list(existing_dates)
-                        existing_ages = list(existing_ages)
-                    # 保存
-                    existing_horse.auction_date = json.dumps(existing_dates, ensure_ascii=False)
-                    existing_horse.age = json.dumps(existing_ages, ensure_ascii=False)
-                    existing_horse.sex = json.dumps(existing_sexes, ensure_ascii=False)
-                    existing_horse.seller = json.dumps(existing_sellers, ensure_ascii=False)
-                    existing_horse.sold_price = json.dumps(existing_prices, ensure_ascii=False)
-                    existing_horse.comment = json.dumps(existing_comments, ensure_ascii=False)
-                    # その他の情報も更新
-                    for key, value in horse_data.items():
-                        if key not in ['auction_date', 'age', 'sex', 'seller', 'sold_price', 'comment']:
-                            setattr(existing_horse, key, value)
-                    existing_horse.updated_at = datetime.utcnow()
-                    saved_horses.append(existing_horse)
-                else:
-                    # 新規データ（履歴カラムは配列で初期化）
-                    horse_data['auction_date'] = json.dumps([new_date], ensure_ascii=False)
-                    horse_data['age'] = json.dumps([new_age], ensure_ascii=False)
-                    horse_data['sex'] = json.dumps([new_sex], ensure_ascii=False)
-                    horse_data['seller'] = json.dumps([new_seller], ensure_ascii=False)
-                    horse_data['sold_price'] = json.dumps([new_sold_price], ensure_ascii=False)
-                    horse_data['comment'] = json.dumps([new_comment], ensure_ascii=False)
-                    horse = self.create_horse(db, horse_data)
-                    saved_horses.append(horse)
-            db.commit()
-            print(f"{len(saved_horses)}頭の馬データを保存しました。")
+            # データベースに保存（既存馬の取得・履歴のマージ・書き込みをまとめて行う）
+            result = bulk_upsert_horses(db, horses_data)
+            saved_horses = result.horses
+            print(f"{len(saved_horses)}頭の馬データを保存しました。（新規{result.inserted}頭・更新{result.updated}頭, {result.format_timings()}）")
             return saved_horses
         except Exception as e:
             print(f"スクレイピングと保存に失敗: {e}")
@@ -183,31 +143,30 @@ class HorseService:
     
     def get_statistics(self, db: Session) -> Dict:
         """統計情報を取得"""
+        return self.result_cache.get_or_compute('statistics', lambda: self._compute_statistics(db))
+    
+    def _compute_statistics(self, db: Session) -> Dict:
+        """統計情報を集計する（件数・平均落札価格・平均成長率）"""
         from sqlalchemy import func
         from datetime import datetime, timedelta
         
         total_horses = db.query(Horse).count()
         
-        # 平均落札価格
-        avg_price = db.query(Horse).filter(Horse.sold_price > 0).with_entities(
-            func.avg(Horse.sold_price)
+        # 平均落札価格（出品ごとの落札価格から集計）
+        avg_price = db.query(func.avg(AuctionEntry.sold_price)).filter(
+            AuctionEntry.sold_price > 0
         ).scalar() or 0
         
-        # 平均成長率
-        horses_with_growth = db.query(Horse).filter(
+        # 平均成長率（馬を読み込まずに、件数と合計をまとめてSQLで集計する）
+        growth_count, total_growth = db.query(
+            func.count(Horse.id),
+            func.sum((Horse.total_prize_latest - Horse.total_prize_start) * 100.0 / Horse.total_prize_start)
+        ).filter(
             Horse.total_prize_start > 0,
             Horse.total_prize_latest > 0
-        ).all()
-        
-        total_growth = 0
-        growth_count = 0
-        for horse in horses_with_growth:
-            if horse.total_prize_start > 0:
-                growth_rate = (horse.total_prize_latest - horse.total_prize_start) / horse.total_prize_start * 100
-                total_growth += growth_rate
-                growth_count += 1
+        ).one()
         
-        avg_growth = total_growth / growth_count if growth_count > 0 else 0
+        avg_growth = (total_growth or 0) / growth_count if growth_count > 0 else 0
         
         # 日付フォーマット調整
         last_scraping_date = db.query(Horse).order_by(Horse.created_at.desc()).first()
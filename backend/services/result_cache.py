@@ -0,0 +1,159 @@
+"""
+集計結果（統計情報・開催日の一覧など）のプロセス内キャッシュ
+- データの世代番号: セッションで書き込み（INSERT / UPDATE / DELETE）をコミットするたびに1つ進める
+  （スクレイピング・賞金更新・APIからの更新のどれでも進む）
+  bulk_insert_mappings / bulk_update_mappings はセッションのイベントが発生しないため、
+  これらを使う処理はコミット前に mark_dataset_changed() を呼ぶ
+- キャッシュした結果は、計算を始めた時の世代番号と一致する間だけ使う
+- 別のプロセス（スクリプトやワークフロー）での書き込みは検出できないため、TTL（秒）を過ぎた結果も使わない
+- 件数の上限を超えた場合は、最も古く使われた結果から捨てる
+- 名前ごとのヒット数・ミス数を metrics() で返す
+
+設定（環境変数）:
+  RESULT_CACHE_TTL   結果を使う秒数（既定: 300。0 の場合はキャッシュしない）
+  RESULT_CACHE_SIZE  保持する結果の数（既定: 128）
+
+使用例:
+  cache = ResultCache.from_env()
+  stats = cache.get_or_compute('statistics', lambda: compute_statistics(db))
+"""
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def current_generation() -> int:
+    """現在のデータの世代番号"""
+    return _generation
+
+
+def bump_generation() -> int:
+    """データの世代番号を進める（キャッシュしたすべての結果が古くなる）"""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        return _generation
+
+
+def mark_dataset_changed(session: Session) -> None:
+    """このセッションの次のコミットで世代番号を進める（セッションのイベントが発生しない書き込み用）"""
+    session.info['dataset_changed'] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_flush(session, flush_context):
+    mark_dataset_changed(session)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_statement(orm_execute_state):
+    # session.execute(insert(...)) などの一括の INSERT / UPDATE / DELETE
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mark_dataset_changed(orm_execute_state.session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_on_commit(session):
+    if session.info.pop('dataset_changed', False):
+        bump_generation()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_on_rollback(session):
+    session.info.pop('dataset_changed', None)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class ResultCache:
+    def __init__(self, ttl: float = 300, max_entries: int = 128, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        # key -> (世代番号, 期限, 結果)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> 'ResultCache':
+        return cls(ttl=_env_int('RESULT_CACHE_TTL', 300), max_entries=_env_int('RESULT_CACHE_SIZE', 128))
+
+    def get_or_compute(self, name: str, compute: Callable[[], Any], key: Hashable = None) -> Any:
+        """キャッシュした結果を返す（ない場合・古い場合は compute() の結果をキャッシュして返す）
+
+        Args:
+            name: 結果の名前（メトリクスはこの単位で集計する）
+            compute: 結果を計算する関数
+            key: 引数などで結果が変わる場合の区別（name と組み合わせる）
+
+        Returns:
+            結果のコピー（呼び出し側で変更してもキャッシュに影響しない）
+        """
+        cache_key = (name, key)
+        generation = current_generation()
+        now = self.clock()
+        with self._lock:
+            stats = self._stats.setdefault(name, {'hits': 0, 'misses': 0, 'stale': 0})
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == generation and entry[1] > now:
+                stats['hits'] += 1
+                self._entries.move_to_end(cache_key)
+                return copy.copy(entry[2])
+            stats['misses'] += 1
+            if entry is not None:
+                # 書き込みまたは TTL で古くなった結果
+                stats['stale'] += 1
+                del self._entries[cache_key]
+
+        # 計算中に書き込みがあった場合は、次の呼び出しで世代番号が一致せずに計算し直す
+        value = compute()
+        if self.ttl > 0 and self.max_entries > 0:
+            with self._lock:
+                self._entries[cache_key] = (generation, now + self.ttl, value)
+                self._entries.move_to_end(cache_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return copy.copy(value)
+
+    def clear(self):
+        """キャッシュしたすべての結果を捨てる"""
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        """キャッシュの状態とヒット率"""
+        with self._lock:
+            by_name = {}
+            for name, stats in sorted(self._stats.items()):
+                total = stats['hits'] + stats['misses']
+                by_name[name] = {**stats, 'hit_rate': round(stats['hits'] / total, 4) if total else None}
+            hits = sum(stats['hits'] for stats in self._stats.values())
+            total = hits + sum(stats['misses'] for stats in self._stats.values())
+            return {
+                'generation': current_generation(),
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'evictions': self.evictions,
+                'hits': hits,
+                'misses': total - hits,
+                'hit_rate': round(hits / total, 4) if total else None,
+                'by_name': by_name,
+            }
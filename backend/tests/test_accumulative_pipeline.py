@@ -0,0 +1,77 @@
+"""
+積み上げ型スクレイピングのパイプライン（取得 → 解析 → 照合 → マージ → ジャーナル）のテスト
+"""
+import contextlib
+import io
+import json
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.accumulative_scraper import AccumulativeScraper
+from test_concurrent_fetcher import LIST_CARDS, FixtureServer, make_scraper
+
+
+def _accumulator(server, history_file):
+    accumulator = AccumulativeScraper(enable_history=True)
+    accumulator.scraper = make_scraper(server.base_url)
+    accumulator.history_file = str(history_file)
+    return accumulator
+
+
+def _without_timestamps(value):
+    if isinstance(value, dict):
+        return {k: _without_timestamps(v) for k, v in value.items() if k not in ('created_at', 'updated_at')}
+    if isinstance(value, list):
+        return [_without_timestamps(v) for v in value]
+    return value
+
+
+def _detail_requests(server):
+    return [path for _, path in server.request_log if re.match(r'^/item/\d+$', path)]
+
+
+def test_pipeline_journals_each_lot_and_resumes_after_crash(tmp_path):
+    with FixtureServer() as server, contextlib.redirect_stdout(io.StringIO()):
+        assert _accumulator(server, tmp_path / 'expected.json').scrape_and_accumulate()
+        expected = json.loads((tmp_path / 'expected.json').read_text(encoding='utf-8'))
+
+        # 3頭目の新規追加で異常終了させる
+        history_file = tmp_path / 'horses_history.json'
+        accumulator = _accumulator(server, history_file)
+        original = accumulator.create_new_horse_entry
+        created = []
+
+        def crashing(horse_data, auction_date, horse_id):
+            if len(created) == 2:
+                raise KeyboardInterrupt
+            created.append(horse_id)
+            return original(horse_data, auction_date, horse_id)
+
+        accumulator.create_new_horse_entry = crashing
+        server.request_log.clear()
+        with pytest.raises(KeyboardInterrupt):
+            accumulator.scrape_and_accumulate()
+
+        journal = Path(accumulator.journal_file)
+        journaled = [json.loads(line) for line in journal.read_text(encoding='utf-8').splitlines()]
+        assert not history_file.exists() and len(journaled) >= 2
+        # 後段が止まっている間、取得は先行件数（max_workers の2倍）までしか進まない
+        assert len(_detail_requests(server)) <= len(journaled) + 1 + 8
+
+        server.request_log.clear()
+        resumed = _accumulator(server, history_file)
+        assert resumed.scrape_and_accumulate()
+        result = json.loads(history_file.read_text(encoding='utf-8'))
+
+    assert not journal.exists()
+    # ジャーナルにあるロットは取得し直さない
+    assert len(_detail_requests(server)) == len(LIST_CARDS) - len(journaled)
+    assert _without_timestamps(result['horses']) == _without_timestamps(expected['horses'])
+    assert result['metadata']['total_horses'] == expected['metadata']['total_horses']
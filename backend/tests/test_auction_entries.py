@@ -0,0 +1,116 @@
+"""
+出品履歴テーブル（auction_entries）と移行処理のテスト
+"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.database.migrations.create_auction_entries import create_auction_entries
+from backend.database.models import AuctionEntry, Base, Horse
+from backend.services.horse_ingest import bulk_upsert_horses, history_entries, sync_auction_entries
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+
+
+def _entries(db, name):
+    horse = db.query(Horse).filter(Horse.name == name).one()
+    return [(e.auction_date, e.age, e.sex, e.seller, e.sold_price, e.unsold, e.comment) for e in horse.auction_entries]
+
+
+def test_bulk_upsert_writes_one_entry_per_auction(db):
+    bulk_upsert_horses(db, [
+        {'name': 'A', 'auction_date': '2025-07-01', 'age': 3, 'sex': '牡', 'seller': '社台', 'sold_price': 0, 'unsold': True},
+        {'name': 'B', 'auction_date': '2025-07-01', 'age': '4', 'sex': '牝', 'sold_price': '1,200,000'},
+    ])
+    bulk_upsert_horses(db, [
+        {'name': 'A', 'auction_date': '2025-08-01', 'age': 3, 'sex': 'セ', 'seller': '社台', 'sold_price': 500000, 'comment': '再出品'},
+        # 同じ開催日の再取得は上書きする
+        {'name': 'B', 'auction_date': '2025-07-01', 'age': 4, 'sex': '牝', 'sold_price': 1300000},
+    ])
+
+    assert _entries(db, 'A') == [
+        ('2025-07-01', 3, '牡', '社台', None, True, None),
+        ('2025-08-01', 3, 'セ', '社台', 500000, False, '再出品'),
+    ]
+    assert _entries(db, 'B') == [('2025-07-01', 4, '牝', None, 1300000, False, None)]
+
+    horse_ids = db.query(AuctionEntry.horse_id).filter(AuctionEntry.auction_date == '2025-07-01')
+    assert sorted(h.name for h in db.query(Horse).filter(Horse.id.in_(horse_ids))) == ['A', 'B']
+    assert db.query(func.avg(AuctionEntry.sold_price)).filter(AuctionEntry.sold_price > 0).scalar() == 900000
+
+
+def test_history_entries_aligns_history_columns():
+    row = {
+        'auction_date': json.dumps(['2025-06-01', '2025-07-01', '2025-08-01']),
+        'age': json.dumps([2, 3, 3]),
+        'sex': json.dumps(['牡', 'セ']),
+        'seller': json.dumps(['社台']),
+        'sold_price': json.dumps(['', 0, 100000, 2000000]),
+        'comment': json.dumps(['初回']),
+        'unsold_count': 1,
+    }
+    assert history_entries(row) == [
+        {'auction_date': '2025-06-01', 'age': 2, 'sex': '牡', 'seller': '社台', 'sold_price': None, 'unsold': True, 'comment': '初回'},
+        {'auction_date': '2025-07-01', 'age': 3, 'sex': 'セ', 'seller': '社台', 'sold_price': 100000, 'unsold': False, 'comment': None},
+        {'auction_date': '2025-08-01', 'age': 3, 'sex': 'セ', 'seller': '社台', 'sold_price': 2000000, 'unsold': False, 'comment': None},
+    ]
+    # API経由で配列でない値が入っている場合
+    assert history_entries({'auction_date': '2025-07-01', 'sold_price': 5000}) == [
+        {'auction_date': '2025-07-01', 'age': None, 'sex': None, 'seller': None, 'sold_price': 5000, 'unsold': False, 'comment': None},
+    ]
+
+
+def test_migration_backfills_once(engine, db):
+    db.add_all([
+        Horse(name='A', auction_date=json.dumps(['2025-07-01', '2025-08-01']), age=json.dumps([3, 3]),
+              sold_price=json.dumps([100, 200])),
+        Horse(name='B', auction_date=json.dumps(['']), sold_price=json.dumps([''])),
+    ])
+    db.commit()
+    AuctionEntry.__table__.drop(engine)
+
+    assert create_auction_entries(engine) == 2
+    assert create_auction_entries(engine) == 0
+    assert _entries(db, 'A') == [
+        ('2025-07-01', 3, None, None, 100, False, None),
+        ('2025-08-01', 3, None, None, 200, False, None),
+    ]
+
+
+def test_sync_replaces_entries_without_violating_unique_constraint(db):
+    horse = Horse(name='A', auction_date=json.dumps(['2025-07-01']), sold_price=json.dumps([100]))
+    sync_auction_entries(horse)
+    db.add(horse)
+    db.commit()
+
+    horse.auction_date = json.dumps(['2025-07-01', '2025-08-01'])
+    horse.sold_price = json.dumps([150, 200])
+    sync_auction_entries(horse)
+    db.commit()
+
+    assert _entries(db, 'A') == [
+        ('2025-07-01', None, None, None, 150, False, None),
+        ('2025-08-01', None, None, None, 200, False, None),
+    ]
+    assert db.query(AuctionEntry).count() == 2
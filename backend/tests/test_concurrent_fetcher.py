@@ -0,0 +1,166 @@
+"""
+並列フェッチエンジンのテスト
+debug_element_*.html と debug_output の詳細ページを返すローカルHTTPサーバーを相手に動作確認する
+"""
+import glob
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.fetcher import ConcurrentFetcher, PolitenessBudget
+from scripts.improved_scraper import ImprovedRakutenScraper
+
+SCRAPERS_DIR = PROJECT_ROOT / 'backend' / 'scrapers'
+LIST_CARDS = sorted(glob.glob(str(SCRAPERS_DIR / 'debug_element_*.html')),
+                    key=lambda p: int(re.search(r'(\d+)\.html$', p).group(1)))
+DETAIL_PAGES = sorted(glob.glob(str(SCRAPERS_DIR / 'debug_output' / 'debug_horse_145*.html')))
+
+RESPONSE_DELAY = 0.05
+
+
+class FixtureServer:
+    """フィクスチャを配信するローカルHTTPサーバー"""
+
+    def __init__(self):
+        self.list_page = ('<html><body>' + ''.join(
+            Path(p).read_text(encoding='utf-8') for p in LIST_CARDS) + '</body></html>').encode('utf-8')
+        self.details = [Path(p).read_bytes() for p in DETAIL_PAGES]
+        self.request_log = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server.lock:
+                    server.request_log.append((time.monotonic(), self.path))
+                    server.in_flight += 1
+                    server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+                # 応答を返す前に処理中の件数を戻す（クライアントが次のリクエストを
+                # 開始するより先に減算されるようにする）
+                time.sleep(RESPONSE_DELAY)
+                with server.lock:
+                    server.in_flight -= 1
+                match = re.match(r'^/item/(\d+)$', self.path)
+                if self.path == '/':
+                    body = server.list_page
+                elif match:
+                    body = server.details[int(match.group(1)) % len(server.details)]
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def make_scraper(base_url, max_workers=4, max_in_flight=2, min_interval=0.0):
+    fetcher = ConcurrentFetcher(max_workers=max_workers,
+                                budget=PolitenessBudget(max_in_flight=max_in_flight, min_interval=min_interval))
+    scraper = ImprovedRakutenScraper(timeout=5, max_retries=0, fetcher=fetcher)
+    scraper.base_url = base_url
+    # JBISへの外部アクセスは行わない
+    scraper._extract_jbis_prize_money = lambda jbis_url: 0.0
+    return scraper
+
+
+def test_scrape_horse_list_fetches_all_lots_in_page_order():
+    with FixtureServer() as server:
+        scraper = make_scraper(server.base_url)
+        horses = scraper.scrape_horse_list()
+
+    expected_ids = [re.search(r'href="/item/(\d+)"', Path(p).read_text(encoding='utf-8')).group(1) for p in LIST_CARDS]
+    assert [h['detail_url'] for h in horses] == [f"{server.base_url}item/{i}" for i in expected_ids]
+    assert all(h['name'] and h['sire'] and h['dam'] for h in horses)
+
+
+def test_budget_limits_in_flight_requests_per_host():
+    with FixtureServer() as server:
+        scraper = make_scraper(server.base_url, max_workers=8, max_in_flight=3)
+        horses = scraper.scrape_horse_list()
+
+    assert len(horses) == len(LIST_CARDS)
+    # 並列に取得されているが、ホストごとの上限は超えない
+    assert 1 < server.peak_in_flight <= 3
+    host_stats = next(iter(scraper.fetcher.budget.stats().values()))
+    assert host_stats['peak_in_flight'] <= 3
+
+
+def test_budget_enforces_min_interval_per_host():
+    min_interval = 0.03
+    starts = []
+    with FixtureServer() as server:
+        scraper = make_scraper(server.base_url, max_workers=4, max_in_flight=4, min_interval=min_interval)
+        # リクエスト開始時刻はクライアント側で記録する（接続確立の揺らぎを含めない）
+        original_get = scraper.session.get
+
+        def recording_get(url, **kwargs):
+            starts.append(time.monotonic())
+            return original_get(url, **kwargs)
+
+        scraper.session.get = recording_get
+        scraper.scrape_horse_list()
+
+    starts.sort()
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    # 計測誤差を考慮して若干の余裕を持たせる
+    assert min(gaps) >= min_interval * 0.8
+
+
+def test_imap_unordered_reports_errors_without_stopping():
+    fetcher = ConcurrentFetcher(max_workers=3)
+
+    def work(item):
+        if item == 2:
+            raise RuntimeError("boom")
+        return item * 10
+
+    results = {item: (result, error) for item, result, error in fetcher.imap_unordered(work, range(5))}
+    assert results[1] == (10, None)
+    assert isinstance(results[2][1], RuntimeError)
+    assert len(results) == 5
+
+
+def test_imap_keeps_input_order_and_bounds_pending_tasks():
+    fetcher = ConcurrentFetcher(max_workers=4)
+    started = []
+
+    def items():
+        for i in range(20):
+            started.append(i)
+            yield i
+
+    results = []
+    for item, result, error in fetcher.imap(lambda i: time.sleep(0.01 * (i % 3)) or i * 2, items(), window=3):
+        # 呼び出し側が受け取るまで、先行して投入されるのは window 件まで
+        assert len(started) <= item + 3
+        results.append((item, result, error))
+
+    assert results == [(i, i * 2, None) for i in range(20)]
@@ -0,0 +1,68 @@
+"""
+静的フロントエンド向けJSONの公開処理（data_publish）のテスト
+"""
+import gzip
+import json
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers import data_publish
+from backend.scrapers.data_publish import format_report, from_columnar, publish_data, to_columnar
+
+DATA = {
+    'metadata': {'total_horses': 2, 'last_updated': '2025-01-05T00:00:00'},
+    'horses': [
+        {'id': 1, 'name': 'テスト馬', 'history': [
+            {'auction_date': '2025-01-05', 'sold_price': 100, 'disease_tags': []},
+            {'auction_date': '2025-01-09', 'sold_price': None, 'disease_tags': ['骨折']},
+        ]},
+        # キーが揃っていない配列は列形式にしない
+        {'id': 2, 'name': '別の馬', 'history': [], 'comment': ''},
+    ],
+}
+
+
+def test_columnar_round_trip():
+    encoded = to_columnar(DATA)
+    history = encoded['horses'][0]['history']
+    assert history == {'$columns': ['auction_date', 'sold_price', 'disease_tags'],
+                       '$rows': [['2025-01-05', 100, []], ['2025-01-09', None, ['骨折']]]}
+    assert isinstance(encoded['horses'], list)
+    assert from_columnar(encoded) == DATA
+
+
+def test_publish_writes_minified_and_compressed_siblings(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_publish, 'brotli', None)
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    path = data_dir / 'horses_history.json'
+    path.write_text(json.dumps(DATA, ensure_ascii=False, indent=2), encoding='utf-8')
+    # brotli がない場合、古い .br は削除する
+    (data_dir / 'horses_history.json.br').write_bytes(b'stale')
+
+    reports = publish_data(str(data_dir), columnar=True, pretty_dir=str(tmp_path / 'pretty'))
+
+    minified = path.read_bytes()
+    assert json.loads(minified) == DATA and b'\n' not in minified
+    assert gzip.decompress((data_dir / 'horses_history.json.gz').read_bytes()) == minified
+    assert not (data_dir / 'horses_history.json.br').exists()
+    columnar = json.loads((data_dir / 'horses_history.columnar.json').read_text(encoding='utf-8'))
+    assert from_columnar(columnar) == DATA
+    pretty = (tmp_path / 'pretty' / 'horses_history.json').read_text(encoding='utf-8')
+    assert pretty == json.dumps(DATA, ensure_ascii=False, indent=2)
+
+    assert len(reports) == 1
+    report = reports[0]
+    assert report['minified'] == len(minified) < report['before']
+    assert report['brotli'] is None and report['columnar'] < report['minified']
+    assert 'horses_history.json' in format_report(reports)
+
+    # 内容が変わらなければ圧縮版も同じバイト列になる
+    gz = (data_dir / 'horses_history.json.gz').read_bytes()
+    publish_data(str(data_dir))
+    assert (data_dir / 'horses_history.json.gz').read_bytes() == gz
+    assert path.read_bytes() == minified
@@ -0,0 +1,70 @@
+"""
+抽出パターンレジストリのテスト
+"""
+import contextlib
+import io
+import re
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.extractors.registry import PatternRegistry
+from backend.scrapers.extractors.rakuten_detail import DETAIL_PATTERNS
+from backend.scrapers.parse_context import DetailPageContext
+from scripts.improved_scraper import ImprovedRakutenScraper
+
+DETAIL_PAGES = sorted((PROJECT_ROOT / 'backend' / 'scrapers' / 'debug_output').glob('debug_*.html'))
+
+
+def test_combined_scan_matches_individual_search():
+    anchored = [name for name in DETAIL_PATTERNS.names() if DETAIL_PATTERNS[name].anchors]
+    assert len(anchored) > 5
+    for path in DETAIL_PAGES:
+        text = DetailPageContext.from_html(path.read_bytes()).text
+        scanned = DETAIL_PATTERNS.scan(text)
+        for name in anchored:
+            assert scanned.get(name) == DETAIL_PATTERNS[name].search(text), (path.name, name)
+
+
+def test_patterns_starting_at_same_position_are_captured_independently():
+    registry = PatternRegistry()
+    registry.register('full', r'父[：:](?P<sire>\S+) 母[：:](?P<dam>\S+)', anchors=('父：',))
+    registry.register('sire', r'父[：:](?P<sire>\S+)', anchors=('父：',))
+    registry.register('section', r'(?P<section>父.*?\n)', anchors=('父',), flags=re.DOTALL)
+    registry.register('missing', r'母の父[：:](?P<damsire>\S+)', anchors=('母の父',))
+
+    result = registry.scan('馬名\n父：キタサンブラック 母：シュガーハート\n')
+    assert result['full'] == {'sire': 'キタサンブラック', 'dam': 'シュガーハート'}
+    assert result['sire'] == {'sire': 'キタサンブラック'}
+    assert result['section'] == {'section': '父：キタサンブラック 母：シュガーハート\n'}
+    assert 'missing' not in result
+
+
+def test_pattern_without_named_group_is_rejected():
+    registry = PatternRegistry()
+    try:
+        registry.register('unnamed', r'父[：:](\S+)')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('名前付きグループのないパターンが登録されました')
+
+
+def test_hit_counters_show_which_fallbacks_fire():
+    scraper = ImprovedRakutenScraper()
+    scraper._extract_jbis_prize_money = lambda jbis_url: 0.0
+    DETAIL_PATTERNS.reset_stats()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        detail = scraper.parse_horse_detail(DETAIL_PAGES[0].read_bytes())
+    stats = DETAIL_PATTERNS.stats()
+
+    assert detail['sire'] and detail['dam'] and detail['damsire']
+    # 一括パターンで血統が取れた場合、個別のフォールバックは使われない
+    assert stats['pedigree'] == {'hits': 1, 'misses': 0}
+    assert stats['sire'] == {'hits': 0, 'misses': 0}
+    assert stats['name_sex_age']['hits'] == 1
+    assert stats['seller']['hits'] == 1
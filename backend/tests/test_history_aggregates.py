@@ -0,0 +1,127 @@
+"""
+horses_history.json の集計値（HistoryAggregates）と --verify-aggregates のテスト
+"""
+import contextlib
+import copy
+import io
+import json
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.history_aggregates import AGGREGATES_KEY, HistoryAggregates
+from scripts.clear_recent_horses import clear_recent_horses
+from scripts.keep_latest_horses import keep_latest_horses
+from test_accumulative_pipeline import _accumulator
+from test_concurrent_fetcher import FixtureServer
+
+
+def _horse(horse_id, entries, latest=0):
+    return {
+        'id': horse_id,
+        'total_prize_latest': latest,
+        'history': [
+            {'auction_date': date, 'seller': seller, 'sold_price': price, 'unsold': price is None,
+             'total_prize_start': start}
+            for date, seller, price, start in entries
+        ],
+    }
+
+
+def test_incremental_updates_match_recompute():
+    horses = [
+        _horse(1, [('2025-01-05', '牧場A', 100, 50)], latest=75),
+        _horse(2, [('2025-01-05', '牧場B', None, 0)]),
+        _horse(3, [('2025-01-09', '牧場A', '1,200', 10)], latest=10),
+    ]
+    aggregates = HistoryAggregates()
+    for horse in horses:
+        aggregates.add(horse)
+    assert aggregates.verify(horses) == []
+    assert aggregates.metadata() == {'total_horses': 3, 'average_price': 650}
+    assert aggregates.growth == {'count': 2, 'sum': 50.0}
+    assert aggregates.by_seller['牧場A'] == {'entries': 2, 'sold_count': 2, 'sold_sum': 1300}
+
+    # 再出品で履歴が増え、賞金も変わった馬をマージする
+    before = aggregates.contribution(horses[1])
+    horses[1]['history'].append({'auction_date': '2025-01-09', 'seller': '', 'sold_price': 300,
+                                 'unsold': False, 'total_prize_start': 20})
+    horses[1]['total_prize_latest'] = 30
+    aggregates.update(before, aggregates.contribution(horses[1]))
+    # 馬を削除する
+    aggregates.remove(horses.pop(0))
+
+    assert aggregates.verify(horses) == []
+    assert aggregates.metadata() == {'total_horses': 2, 'average_price': 750}
+    assert aggregates.average_growth_rate == 25.0
+    assert set(aggregates.by_date) == {'2025-01-05', '2025-01-09'}
+    assert aggregates.by_date['2025-01-05'] == {'entries': 1, 'sold_count': 0, 'sold_sum': 0}
+    assert '牧場A' in aggregates.by_seller and '' in aggregates.by_seller
+
+    # 保存した形式から読み込んでも同じ
+    assert HistoryAggregates(json.loads(json.dumps(aggregates.to_dict()))).diff(aggregates) == []
+    drifted = HistoryAggregates(aggregates.to_dict())
+    drifted.sold['count'] += 1
+    assert drifted.verify(horses) == ['sold.count: 3 != 2']
+
+
+def test_accumulate_stores_aggregates_and_verify_fixes_drift(tmp_path):
+    history_file = tmp_path / 'horses_history.json'
+    with FixtureServer() as server, contextlib.redirect_stdout(io.StringIO()):
+        accumulator = _accumulator(server, history_file)
+        assert accumulator.scrape_and_accumulate()
+        # 2回目は既存馬へのマージなので、集計値は差分だけで更新される
+        assert accumulator.scrape_and_accumulate()
+        data = json.loads(history_file.read_text(encoding='utf-8'))
+
+        assert list(data) == ['metadata', AGGREGATES_KEY, 'horses']
+        recomputed = HistoryAggregates.from_horses(data['horses'])
+        assert HistoryAggregates(data[AGGREGATES_KEY]).diff(recomputed) == []
+        assert data['metadata']['total_horses'] == len(data['horses']) == recomputed.horses
+        assert recomputed.history_entries == sum(len(h['history']) for h in data['horses'])
+        assert accumulator.verify_aggregates()
+
+        # 保存値がずれていれば検出し、--fix で書き換える
+        broken = copy.deepcopy(data)
+        broken[AGGREGATES_KEY]['horses'] += 5
+        broken['metadata']['total_horses'] += 5
+        history_file.write_text(json.dumps(broken, ensure_ascii=False), encoding='utf-8')
+        assert not accumulator.verify_aggregates()
+        assert accumulator.verify_aggregates(fix=True)
+        assert accumulator.verify_aggregates()
+        fixed = json.loads(history_file.read_text(encoding='utf-8'))
+
+    assert fixed[AGGREGATES_KEY] == recomputed.to_dict()
+    assert fixed['metadata']['total_horses'] == recomputed.horses
+    assert fixed['horses'] == data['horses']
+
+
+def test_removal_scripts_keep_aggregates_and_metadata_in_sync(tmp_path):
+    horses = [
+        _horse(45, [('2025-01-05', '牧場A', 100, 50)], latest=75),
+        _horse(46, [('2025-01-05', '牧場B', 300, 10), ('2025-01-09', '牧場B', None, 10)], latest=20),
+        _horse(54, [('2025-01-09', '牧場A', 900, 0)]),
+        _horse(55, [('2025-01-09', '牧場C', 200, 40)], latest=40),
+    ]
+    aggregates = HistoryAggregates.from_horses(horses)
+    data = {'metadata': aggregates.metadata(), AGGREGATES_KEY: aggregates.to_dict(), 'horses': copy.deepcopy(horses)}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        data, removed = clear_recent_horses(data)
+    assert removed == 2 and [h['id'] for h in data['horses']] == [45, 55]
+    remaining = HistoryAggregates.from_horses(data['horses'])
+    assert HistoryAggregates(data[AGGREGATES_KEY]).diff(remaining) == []
+    assert data['metadata']['total_horses'] == 2 and data['metadata']['average_price'] == 150
+
+    # 集計値がない古いファイルでも、残った馬の集計値になる
+    history_file = tmp_path / 'horses_history.json'
+    history_file.write_text(json.dumps({'metadata': {}, 'horses': horses}, ensure_ascii=False), encoding='utf-8')
+    with contextlib.redirect_stdout(io.StringIO()):
+        keep_latest_horses(str(history_file), str(history_file), num_horses=1)
+    kept = json.loads(history_file.read_text(encoding='utf-8'))
+    assert [h['id'] for h in kept['horses']] == [55]
+    assert HistoryAggregates(kept[AGGREGATES_KEY]).diff(HistoryAggregates.from_horses(kept['horses'])) == []
+    assert kept['metadata']['total_horses'] == 1 and kept['metadata']['average_price'] == 200
@@ -0,0 +1,107 @@
+"""
+horses_history.json の逐次読み書き（HistoryReader / HistoryWriter）のテスト
+"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.history_stream import HistoryReader, HistoryWriter, count_horses, iter_horses
+from scripts import ensure_data_structure
+
+HISTORY_FILE = PROJECT_ROOT / 'static-frontend' / 'public' / 'data' / 'horses_history.json'
+
+SAMPLES = [
+    {'metadata': {'total_horses': 2, 'note': '改行\n"引用"'},
+     'horses': [{'name': 'テスト馬', 'history': [{'weight': 480, 'disease_tags': []}]}, {'name': 'B', 'age': 3.5}],
+     'generated_by': 12345},
+    {'horses': []},
+    [{'name': '古い形式'}, {'name': 'B', 'history': []}],
+    [],
+]
+
+
+def _roundtrip(src, dst, chunk_size):
+    with HistoryReader(str(src), chunk_size=chunk_size) as reader:
+        writer = HistoryWriter(str(dst), reader.header, as_list=reader.is_list)
+        for horse in reader:
+            writer.write(horse)
+        writer.trailer = reader.trailer
+    writer.close()
+
+
+@pytest.mark.parametrize('sample', SAMPLES)
+@pytest.mark.parametrize('chunk_size', [1, 5, 65536])
+def test_roundtrip_is_byte_identical_to_json_dump(tmp_path, sample, chunk_size):
+    src, dst = tmp_path / 'src.json', tmp_path / 'dst.json'
+    src.write_text(json.dumps(sample, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    _roundtrip(src, dst, chunk_size)
+
+    assert dst.read_bytes() == src.read_bytes()
+
+
+@pytest.mark.skipif(not HISTORY_FILE.exists(), reason='horses_history.json がありません')
+def test_reads_published_history_file(tmp_path):
+    data = json.loads(HISTORY_FILE.read_text(encoding='utf-8'))
+    assert list(iter_horses(str(HISTORY_FILE))) == data['horses']
+    assert count_horses(str(HISTORY_FILE)) == len(data['horses'])
+
+    _roundtrip(HISTORY_FILE, tmp_path / 'copy.json', 4096)
+    assert (tmp_path / 'copy.json').read_bytes() == HISTORY_FILE.read_bytes()
+
+
+def test_rewrite_in_place_with_updated_metadata(tmp_path):
+    path = tmp_path / 'horses_history.json'
+    data = {'metadata': {'total_horses': 3}, 'horses': [{'id': i, 'weight': None} for i in range(3)]}
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    with HistoryReader(str(path), chunk_size=8) as reader, HistoryWriter(str(path), reader.header) as writer:
+        for horse in reader:
+            if horse['id'] != 1:
+                horse['weight'] = 480
+                writer.write(horse)
+        # 書き出しの途中・後でもメタデータを更新できる
+        writer.header['metadata']['total_horses'] = writer.count
+
+    expected = {'metadata': {'total_horses': 2}, 'horses': [{'id': 0, 'weight': 480}, {'id': 2, 'weight': 480}]}
+    assert path.read_text(encoding='utf-8') == json.dumps(expected, ensure_ascii=False, indent=2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['horses_history.json']
+
+
+def test_discard_and_errors_leave_file_untouched(tmp_path):
+    path = tmp_path / 'horses_history.json'
+    path.write_text('{"metadata": {}, "horses": [{"id": 1}, {"id": 2', encoding='utf-8')
+    before = path.read_bytes()
+
+    with pytest.raises(json.JSONDecodeError):
+        with HistoryReader(str(path)) as reader, HistoryWriter(str(path), reader.header) as writer:
+            for horse in reader:
+                writer.write(horse)
+
+    writer = HistoryWriter(str(path))
+    writer.write({'id': 3})
+    writer.discard()
+
+    assert path.read_bytes() == before
+
+
+def test_ensure_data_structure_keeps_aggregates_and_trailing_keys(tmp_path, monkeypatch):
+    history_file = tmp_path / 'horses_history.json'
+    data = {'metadata': {'total_horses': 1}, 'aggregates': {'horses': 1, 'sold': {'count': 1, 'sum': 100}},
+            'horses': [{'id': 1, 'name': 'テスト馬\n', 'history': [{'auction_date': '2025-01-05'}]}],
+            'generated_by': 'scraper'}
+    history_file.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(ensure_data_structure, 'HISTORY_FILE', history_file)
+
+    assert ensure_data_structure.main() == 0
+    fixed = json.loads(history_file.read_text(encoding='utf-8'))
+    assert list(fixed) == ['metadata', 'aggregates', 'horses', 'generated_by']
+    assert fixed['aggregates'] == data['aggregates'] and fixed['generated_by'] == 'scraper'
+    assert fixed['horses'][0]['name'] == 'テスト馬' and fixed['horses'][0]['history'][0]['sold_price'] is None
+    assert ensure_data_structure.ensure_structure(data)['aggregates'] == data['aggregates']
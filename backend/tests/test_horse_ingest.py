@@ -0,0 +1,127 @@
+"""
+馬データのまとめ保存（bulk_upsert_horses）のテスト
+"""
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.database.models import Base, Horse
+from backend.services.horse_ingest import HISTORY_COLUMNS, bulk_upsert_horses
+
+COMPARED_COLUMNS = [c.key for c in Horse.__table__.columns if c.key not in ('created_at', 'updated_at')]
+
+
+@pytest.fixture
+def make_session():
+    engines = []
+
+    def factory():
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        engines.append(engine)
+        return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    yield factory
+    for engine in engines:
+        engine.dispose()
+
+
+def _legacy_save(db, horses_data):
+    """まとめ保存導入前の1頭ずつの保存処理（比較用）"""
+    for horse_data in horses_data:
+        unsold = bool(horse_data.get('unsold'))
+        existing_horse = db.query(Horse).filter(Horse.name == horse_data['name']).first()
+        if existing_horse:
+            prev = existing_horse.unsold_count or 0
+            horse_data['unsold_count'] = prev + 1 if unsold else prev
+            values = {c: json.loads(getattr(existing_horse, c) or '[]') for c in HISTORY_COLUMNS}
+            new = {c: horse_data.get(c, '') or '' for c in HISTORY_COLUMNS}
+            if new['auction_date'] not in values['auction_date']:
+                values['auction_date'].append(new['auction_date'])
+                values['age'].append(new['age'])
+            for column in ('sex', 'seller'):
+                if not values[column] or (new[column] and new[column] != values[column][-1]):
+                    values[column].append(new[column])
+            values['sold_price'].append(new['sold_price'])
+            values['comment'].append(new['comment'])
+            paired = sorted(zip(values['auction_date'], values['age']), key=lambda x: x[0])
+            values['auction_date'] = [d for d, _ in paired]
+            values['age'] = [a for _, a in paired]
+            for column in HISTORY_COLUMNS:
+                setattr(existing_horse, column, json.dumps(values[column], ensure_ascii=False))
+            for key, value in horse_data.items():
+                if key not in HISTORY_COLUMNS and key != 'unsold':
+                    setattr(existing_horse, key, value)
+        else:
+            horse_data['unsold_count'] = 1 if unsold else 0
+            row = {k: v for k, v in horse_data.items() if k not in HISTORY_COLUMNS and k != 'unsold'}
+            row.update({c: json.dumps([horse_data.get(c, '') or ''], ensure_ascii=False) for c in HISTORY_COLUMNS})
+            db.add(Horse(**row))
+            db.commit()
+    db.commit()
+
+
+def _random_lot(rng, names):
+    return {
+        'name': rng.choice(names),
+        'sex': rng.choice(['牡', '牝', 'セ']),
+        'age': rng.randint(2, 5),
+        'sire': rng.choice(['キタサンブラック', 'ドゥラメンテ']),
+        'seller': rng.choice(['社台', 'ノーザン', '']),
+        'auction_date': rng.choice(['2025-07-01', '2025-08-01', '2025-06-01']),
+        'sold_price': rng.choice([0, 1000000, 2500000]),
+        'comment': rng.choice(['', 'コメント']),
+        'unsold': rng.random() < 0.3,
+        'detail_url': 'https://example.com/item',
+    }
+
+
+def _snapshot(db):
+    return sorted(tuple(getattr(h, c) for c in COMPARED_COLUMNS) for h in db.query(Horse).order_by(Horse.id))
+
+
+def test_matches_one_by_one_save(make_session):
+    rng = random.Random(3)
+    names = [f'テスト馬{i}' for i in range(150)]
+    seed = [_random_lot(rng, names[:60]) for _ in range(80)]
+    batch = [_random_lot(rng, names) for _ in range(200)]
+
+    _, legacy_db = make_session()
+    # 旧処理はモデルにないキーを受け付けないため detail_url を除いて保存する
+    _legacy_save(legacy_db, [{k: v for k, v in lot.items() if k != 'detail_url'} for lot in seed])
+    _legacy_save(legacy_db, [{k: v for k, v in lot.items() if k != 'detail_url'} for lot in batch])
+
+    _, db = make_session()
+    bulk_upsert_horses(db, [dict(lot) for lot in seed])
+    result = bulk_upsert_horses(db, [dict(lot) for lot in batch])
+
+    assert _snapshot(db) == _snapshot(legacy_db)
+    assert [h.name for h in result.horses] == [lot['name'] for lot in batch]
+    assert set(result.timings) == {'resolve', 'merge', 'write', 'reload'}
+
+
+def test_200_horses_in_constant_number_of_statements(make_session):
+    engine, db = make_session()
+    bulk_upsert_horses(db, [{'name': f'既存{i}', 'auction_date': '2025-07-01'} for i in range(100)])
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    lots = [{'name': f'既存{i}' if i < 100 else f'新規{i}', 'auction_date': '2025-08-01', 'sold_price': 100}
+            for i in range(200)]
+    result = bulk_upsert_horses(db, lots)
+
+    assert (result.inserted, result.updated) == (100, 100)
+    # 既存馬の取得・INSERT・UPDATE・新規馬のID取得・出品履歴の確認とINSERT・保存結果の再取得の7文だけ
+    assert len(statements) == 7
+    horse = db.query(Horse).filter(Horse.name == '既存0').one()
+    assert json.loads(horse.auction_date) == ['2025-07-01', '2025-08-01']
+    assert json.loads(horse.sold_price) == ['', 100]
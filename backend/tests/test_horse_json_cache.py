@@ -0,0 +1,108 @@
+"""
+馬1頭分のAPIレスポンス（JSON）のキャッシュ（HorseJsonCache）のテスト
+"""
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend import main
+from backend.database.models import Base, Horse
+from backend.services import horse_json_cache
+from backend.services.horse_json_cache import HorseJsonCache
+from backend.services.horse_listing import list_horse_rows
+from backend.services.horse_service import HorseService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    base = datetime(2025, 1, 1, 9, 30)
+    for i in range(12):
+        session.add(Horse(
+            name=f'テスト馬{i}', sex='["牡"]', age='[3]', sold_price='[1500000]', auction_date='["2025-01-05"]',
+            seller='["牧場A"]', comment='["馬体良好", "再出品"]', total_prize_start=12.5,
+            created_at=base, updated_at=base + timedelta(hours=i),
+        ))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_page_matches_uncached_rows_and_reuses_bytes(db):
+    cache = HorseJsonCache()
+    body, next_cursor = cache.render_page(db, limit=5)
+    rows, expected_cursor = list_horse_rows(db, limit=5)
+    assert json.loads(body) == rows and next_cursor == expected_cursor
+    assert (cache.hits, cache.misses, len(cache)) == (0, 5, 5)
+
+    # 2回目はキャッシュしたバイト列をつなげるだけ
+    assert cache.render_page(db, limit=5) == (body, next_cursor)
+    body, _ = cache.render_page(db, limit=5, order_by='updated_at')
+    assert [horse['id'] for horse in json.loads(body)] == [12, 11, 10, 9, 8]
+    assert (cache.hits, cache.misses) == (5, 5 + 5)
+
+
+def test_writes_invalidate_cached_json(db):
+    service = HorseService(rakuten_scraper=object(), json_cache=HorseJsonCache())
+    assert json.loads(service.get_horse_json(db, 1))['comment'] == ['馬体良好', '再出品']
+
+    service.list_horses_json(db, limit=3)
+    service.update_horse(db, 1, {'comment': '["更新"]'})
+    assert json.loads(service.get_horse_json(db, 1))['comment'] == ['更新']
+
+    # サービスを通さない更新（別プロセスのスクレイパーなど）も updated_at の違いで検出する
+    db.execute(update(Horse).where(Horse.id == 2).values(name='名前変更'))
+    db.commit()
+    body, _ = service.list_horses_json(db, limit=3)
+    assert [horse['name'] for horse in json.loads(body)] == ['テスト馬0', '名前変更', 'テスト馬2']
+    assert json.loads(body)[0]['comment'] == ['更新']
+
+    assert service.delete_horse(db, 1)
+    assert service.get_horse_json(db, 1) is None
+    body, _ = service.list_horses_json(db, limit=3)
+    assert [horse['id'] for horse in json.loads(body)] == [2, 3, 4]
+
+
+def test_cache_drops_least_recently_used_entries(db):
+    cache = HorseJsonCache(max_entries=3)
+    cache.render_page(db, limit=3)
+    cache.get_one(db, 1)
+    cache.get_one(db, 4)
+    assert list(cache._entries) == [3, 1, 4]
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_endpoints_return_cached_json(db, monkeypatch):
+    monkeypatch.setattr(main, 'horse_service', HorseService(rakuten_scraper=object()))
+    response = asyncio.run(main.get_horses(limit=10, db=db))
+    assert response.media_type == 'application/json'
+    assert json.loads(response.body) == list_horse_rows(db, limit=10)[0]
+    assert main.NEXT_CURSOR_HEADER in response.headers
+
+    response = asyncio.run(main.get_horse(3, db=db))
+    assert json.loads(response.body) == main.HorseResponse.model_validate(
+        json.loads(response.body)).model_dump(mode='json')
+    with pytest.raises(main.HTTPException) as error:
+        asyncio.run(main.get_horse(99, db=db))
+    assert error.value.status_code == 404
+
+
+def test_dumps_without_orjson(monkeypatch):
+    value = {'name': 'テスト馬', 'sold_price': [1500000], 'total_prize_start': 12.5, 'weight': None}
+    expected = horse_json_cache.dumps(value)
+    monkeypatch.setattr(horse_json_cache, 'orjson', None)
+    assert horse_json_cache.dumps(value) == expected
@@ -0,0 +1,150 @@
+"""
+馬一覧APIのカーソルページングと項目の絞り込み（horse_listing / GET /horses/）のテスト
+"""
+import asyncio
+import base64
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.orm import sessionmaker
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend import main
+from backend.database.models import Base, Horse
+from backend.services.horse_listing import RESPONSE_FIELDS, InvalidQuery, list_horse_rows, parse_json_field
+
+
+@pytest.fixture
+def db():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    base = datetime(2025, 1, 1, 9, 30)
+    for i in range(25):
+        session.add(Horse(
+            name=f'テスト馬{i}', sex='["牡"]', age='[3]', sold_price='[1000000]' if i % 2 else 'null',
+            auction_date='["2025-01-05"]', seller='["牧場A"]', comment='コメント' if i == 3 else '[""]',
+            total_prize_start=10.0, created_at=base,
+            # 同じ更新日時の馬を含める（id で順序が決まる）
+            updated_at=base + timedelta(days=i // 3, microseconds=i % 2),
+        ))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _all_pages(db, **kwargs):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = list_horse_rows(db, cursor=cursor, **kwargs)
+        pages.append(rows)
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_every_horse_once(db):
+    pages = _all_pages(db, limit=7, fields=['id'])
+    assert [len(page) for page in pages] == [7, 7, 7, 4]
+    assert [row['id'] for page in pages for row in page] == list(range(1, 26))
+
+    pages = _all_pages(db, limit=4, order_by='updated_at', fields=['id', 'updated_at'])
+    rows = [row for page in pages for row in page]
+    expected = sorted(db.query(Horse).all(), key=lambda h: (h.updated_at, h.id), reverse=True)
+    assert [row['id'] for row in rows] == [h.id for h in expected]
+
+    with pytest.raises(InvalidQuery):
+        # 並び順が違うカーソルは使えない
+        list_horse_rows(db, cursor=list_horse_rows(db, limit=1)[1], order_by='updated_at')
+
+
+def test_null_updated_at_rows_are_paged_last(db):
+    db.execute(update(Horse).where(Horse.id.in_([2, 9, 17, 24])).values(updated_at=None))
+    db.commit()
+    expected = [h.id for h in sorted(db.query(Horse).filter(Horse.updated_at.isnot(None)),
+                                     key=lambda h: (h.updated_at, h.id), reverse=True)] + [24, 17, 9, 2]
+
+    # ページの途中と、NULL の馬だけのページの両方でカーソルをまたぐ
+    for limit in (3, 20):
+        pages = _all_pages(db, limit=limit, order_by='updated_at', fields=['id'])
+        assert [row['id'] for page in pages for row in page] == expected
+    rows, _ = list_horse_rows(db, limit=30, offset=19, order_by='updated_at', fields=['id'])
+    assert [row['id'] for row in rows] == expected[19:]
+
+
+def _cursor(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def test_malformed_cursor_keys_are_rejected(db):
+    cursors = [
+        ('updated_at', {'o': 'updated_at', 'k': ['garbage', 1]}),
+        ('updated_at', {'o': 'updated_at', 'k': [20250101, 1]}),
+        ('updated_at', {'o': 'updated_at', 'k': ['2025-01-01T09:30:00', '1']}),
+        ('updated_at', {'o': 'updated_at', 'k': [None, None]}),
+        ('id', {'o': 'id', 'k': ['5']}),
+        ('id', {'o': 'id', 'k': [True]}),
+        ('id', {'o': 'id', 'k': 5}),
+    ]
+    for order_by, data in cursors:
+        with pytest.raises(InvalidQuery):
+            list_horse_rows(db, cursor=_cursor(data), order_by=order_by)
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(main.get_horses(cursor=_cursor(data), order_by=order_by, db=db))
+        assert error.value.status_code == 400
+
+
+def test_fields_select_only_requested_columns(db):
+    statements = []
+    event.listen(db.get_bind(), 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    rows, _ = list_horse_rows(db, limit=2, fields=['name', 'sold_price'])
+
+    assert rows == [{'name': 'テスト馬0', 'sold_price': None}, {'name': 'テスト馬1', 'sold_price': [1000000]}]
+    selected = statements[-1].split('FROM')[0]
+    # 並び順のキー以外は指定した項目のカラムだけを読む
+    assert 'horses.name' in selected and 'horses.sold_price' in selected and 'horses.id' in selected
+    assert 'horses.comment' not in selected and 'horses.created_at' not in selected
+
+
+def test_full_rows_match_previous_response(db):
+    rows, _ = list_horse_rows(db, limit=5)
+    for row, horse in zip(rows, db.query(Horse).order_by(Horse.id).limit(5)):
+        # 以前の jsonable_encoder + parse_json_field + レスポンスモデルでの変換結果と同じ
+        previous = {**jsonable_encoder(horse), **{
+            key: parse_json_field(getattr(horse, key))
+            for key in ('sex', 'age', 'sold_price', 'auction_date', 'seller', 'comment')}}
+        assert list(row) == RESPONSE_FIELDS
+        assert row == main.HorseResponse.model_validate(previous).model_dump(mode='json')
+
+
+def test_endpoint_returns_next_cursor_header(db):
+    response = asyncio.run(main.get_horses(limit=10, fields='id,name', db=db))
+    body = json.loads(response.body)
+    assert [row['id'] for row in body] == list(range(1, 11)) and set(body[0]) == {'id', 'name'}
+    cursor = response.headers[main.NEXT_CURSOR_HEADER]
+
+    response = asyncio.run(main.get_horses(limit=10, cursor=cursor, skip=999, fields='id', db=db))
+    assert [row['id'] for row in json.loads(response.body)] == list(range(11, 21))
+    # 既存のクライアントの skip も使える
+    response = asyncio.run(main.get_horses(skip=20, limit=10, fields='id', db=db))
+    assert [row['id'] for row in json.loads(response.body)] == list(range(21, 26))
+    assert main.NEXT_CURSOR_HEADER not in response.headers
+
+    response = asyncio.run(main.get_horse(4, fields='comment', db=db))
+    assert json.loads(response.body) == {'comment': ['コメント']}
+    for call in (lambda: main.get_horses(fields='id,password', db=db),
+                 lambda: main.get_horses(cursor='broken', db=db),
+                 lambda: main.get_horses(order_by='name', db=db)):
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(call())
+        assert error.value.status_code == 400
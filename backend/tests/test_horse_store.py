@@ -0,0 +1,127 @@
+"""
+馬データのまとめ保存（HorseDataStore）のテスト
+"""
+import itertools
+import os
+import sys
+from datetime import datetime as real_datetime
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers import data_helpers
+from backend.scrapers.data_helpers import save_auction_history, save_horse
+from backend.scrapers.horse_store import HorseDataStore
+
+
+@pytest.fixture
+def deterministic(monkeypatch):
+    """UUIDと現在時刻を呼び出し順に決まる値にする"""
+    def reset():
+        ids = itertools.count(1)
+        ticks = itertools.count(1)
+
+        class FixedDatetime(real_datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return real_datetime(2025, 8, 1, 12, 0, 0, next(ticks))
+
+        monkeypatch.setattr(data_helpers.uuid, 'uuid4', lambda: f'00000000-0000-0000-0000-{next(ids):012d}')
+        monkeypatch.setattr(data_helpers, 'datetime', FixedDatetime)
+    return reset
+
+
+def _horse(name, age, **extra):
+    horse = {
+        'name': name, 'sex': '牝', 'age': age, 'sire': 'キタサンブラック', 'dam': 'シュガーハート',
+        'damsire': 'サンデーサイレンス', 'disease_tags': ['骨折'], 'weight': 480, 'seller': 'テスト牧場',
+        'auction_date': '2025-08-01', 'total_prize_start': 120.0, 'total_prize_latest': 150.5,
+        'comment': '本馬について\nテスト', 'race_record': '10戦2勝',
+    }
+    horse.update(extra)
+    return horse
+
+
+# 2回目の「テスト馬A」は既存馬の更新、母父が空の馬は警告付きで保存される
+BATCH = [
+    _horse('テスト馬A', 3),
+    _horse('テスト馬B', 4, disease_tags=[]),
+    _horse('テスト馬A', 3, total_prize_latest=200.0, disease_tags=['喉鳴り'], comment='更新'),
+    _horse('テスト馬C', 5, damsire=''),
+]
+
+
+def _save_batch(save_horse_fn, save_history_fn):
+    for horse in BATCH:
+        horse = dict(horse, disease_tags=list(horse['disease_tags']))
+        horse_id = save_horse_fn(horse)
+        save_history_fn({
+            'horse_id': horse_id, 'auction_date': horse['auction_date'], 'sold_price': 1000000.0,
+            'weight': float(horse['weight']), 'seller': horse['seller'], 'is_unsold': False,
+            'comment': horse['comment'],
+        })
+
+
+def _seed(data_dir):
+    data_dir.mkdir()
+    (data_dir / 'horses.json').write_text('[{"name": "既存馬", "age": 6, "sex": "牡"}]', encoding='utf-8')
+
+
+def test_compacted_output_is_byte_compatible_with_per_horse_saves(tmp_path, deterministic):
+    legacy_dir, store_dir = tmp_path / 'legacy', tmp_path / 'store'
+    _seed(legacy_dir)
+    _seed(store_dir)
+
+    deterministic()
+    _save_batch(lambda h: save_horse(h, str(legacy_dir)), lambda a: save_auction_history(a, str(legacy_dir)))
+
+    deterministic()
+    with HorseDataStore(str(store_dir)) as store:
+        _save_batch(store.save_horse, store.save_auction_history)
+        # 書き出しは最後に1度だけ行われる
+        assert (store_dir / 'horses.json').read_bytes() != (legacy_dir / 'horses.json').read_bytes()
+        assert not (store_dir / 'auction_history.json').exists()
+
+    for name in ('horses.json', 'auction_history.json'):
+        assert (store_dir / name).read_bytes() == (legacy_dir / name).read_bytes(), name
+    assert not os.path.exists(store.journal_path)
+    assert sorted(os.listdir(store_dir)) == ['auction_history.json', 'horses.json']
+
+
+def test_unflushed_journal_is_recovered_on_next_open(tmp_path, deterministic):
+    legacy_dir, store_dir = tmp_path / 'legacy', tmp_path / 'store'
+    _seed(legacy_dir)
+    _seed(store_dir)
+
+    deterministic()
+    _save_batch(lambda h: save_horse(h, str(legacy_dir)), lambda a: save_auction_history(a, str(legacy_dir)))
+
+    deterministic()
+    store = HorseDataStore(str(store_dir))
+    _save_batch(store.save_horse, store.save_auction_history)
+    # 書き出す前に異常終了した場合を再現する（最後の行は書きかけ）
+    store._close_journal()
+    with open(store.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"kind": "horse", "rec')
+
+    recovered = HorseDataStore(str(store_dir))
+    assert recovered.recovered == len(BATCH) * 2
+    assert recovered.compact()
+
+    for name in ('horses.json', 'auction_history.json'):
+        assert (store_dir / name).read_bytes() == (legacy_dir / name).read_bytes(), name
+    assert not os.path.exists(recovered.journal_path)
+
+
+def test_compact_without_changes_does_not_rewrite(tmp_path):
+    _seed(tmp_path / 'data')
+    horses_file = tmp_path / 'data' / 'horses.json'
+    before = horses_file.read_bytes()
+
+    store = HorseDataStore(str(tmp_path / 'data'))
+    assert store.compact() is False
+    assert horses_file.read_bytes() == before
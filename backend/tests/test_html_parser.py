@@ -0,0 +1,151 @@
+"""
+HTMLパーサー切り替えの適合性テスト
+利用可能なすべてのバックエンドで、debug_*.html / error_*.html から
+html.parser と同一の項目が抽出されることを確認する
+"""
+import contextlib
+import hashlib
+import io
+import os
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.html_parser import BACKENDS, available_backends, get_backend, make_soup
+from backend.scrapers.parse_context import DetailPageContext
+from scripts.improved_scraper import ImprovedRakutenScraper
+from scripts.update_jbis_history_data import get_jbis_prize
+
+REFERENCE_BACKEND = 'html.parser'
+
+
+def _fixture_pages(pattern):
+    """内容が重複するフィクスチャを除いて (パス, 内容) を返す"""
+    pages = {}
+    for path in sorted(PROJECT_ROOT.glob(pattern)):
+        if 'node_modules' in path.parts or 'archive' in path.parts:
+            continue
+        content = path.read_bytes()
+        pages.setdefault(hashlib.sha1(content).hexdigest(), (path.relative_to(PROJECT_ROOT), content))
+    return list(pages.values())
+
+
+FIXTURES = _fixture_pages('**/debug_*.html') + _fixture_pages('error_*.html')
+JBIS_PAGES = [(path, content) for path, content in FIXTURES if 'jbis' in path.name]
+
+
+class _Response:
+    def __init__(self, content):
+        self.content = content
+        self.text = content.decode('utf-8', errors='replace')
+        self.ok = True
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+
+class _Session:
+    def __init__(self, content):
+        self.content = content
+
+    def get(self, url, **kwargs):
+        return _Response(self.content)
+
+
+def _make_scraper(backend):
+    scraper = ImprovedRakutenScraper(html_parser=backend)
+    # テスト中にJBISへアクセスしない
+    scraper._extract_jbis_prize_money = lambda jbis_url: 0.0
+    return scraper
+
+
+def _detail_fields(scraper, content):
+    """詳細ページとして抽出した項目（抽出できない場合は例外の種類とメッセージ）"""
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return scraper.parse_horse_detail(content)
+    except Exception as e:
+        return (type(e).__name__, str(e))
+
+
+def _list_links(scraper, content):
+    """一覧ページとして抽出した (リンクテキスト, URL) の一覧"""
+    scraper._make_request = lambda url, **kwargs: _Response(content)
+    scraper.iter_horse_details = lambda links: ((link, {'name': link['text']}) for link in links)
+    with contextlib.redirect_stderr(io.StringIO()):
+        horses = scraper.scrape_horse_list()
+    return [(horse['name'], horse['detail_url']) for horse in horses]
+
+
+def _extract_all(backend):
+    scraper = _make_scraper(backend)
+    results = {}
+    for path, content in FIXTURES:
+        results[path] = (_detail_fields(scraper, content), _list_links(scraper, content))
+    return results
+
+
+def test_every_backend_extracts_identical_fields():
+    assert FIXTURES
+    expected = _extract_all(REFERENCE_BACKEND)
+    # 詳細ページ・一覧ページの両方が比較対象に含まれていること
+    assert any(isinstance(detail, dict) for detail, _ in expected.values())
+    assert any(links for _, links in expected.values())
+
+    for backend in available_backends():
+        if backend == REFERENCE_BACKEND:
+            continue
+        actual = _extract_all(backend)
+        for path in expected:
+            assert actual[path] == expected[path], (backend, str(path))
+
+
+def test_every_backend_extracts_identical_jbis_prize():
+    assert JBIS_PAGES
+    for path, content in JBIS_PAGES:
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = get_jbis_prize(_Session(content), 'https://www.jbis.or.jp/horse/0000000000/')
+            for backend in available_backends():
+                os.environ['SCRAPER_HTML_PARSER'] = backend
+                try:
+                    actual = get_jbis_prize(_Session(content), 'https://www.jbis.or.jp/horse/0000000000/')
+                finally:
+                    del os.environ['SCRAPER_HTML_PARSER']
+                assert actual == expected, (backend, str(path))
+
+
+def test_backend_selection():
+    os.environ.pop('SCRAPER_HTML_PARSER', None)
+    assert get_backend('html.parser') == 'html.parser'
+    assert get_backend(None) in BACKENDS
+
+    os.environ['SCRAPER_HTML_PARSER'] = 'HTML.PARSER'
+    try:
+        assert get_backend(None) == 'html.parser'
+        # 引数の指定は環境変数より優先される
+        assert get_backend('lxml') == 'lxml'
+    finally:
+        del os.environ['SCRAPER_HTML_PARSER']
+
+    try:
+        get_backend('no-such-parser')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('未対応のパーサー名で ValueError が送出されませんでした')
+
+
+def test_selectolax_context_builds_soup_on_demand():
+    if 'selectolax' not in available_backends():
+        return
+    _, content = next((path, content) for path, content in FIXTURES if 'debug_horse_' in path.name)
+    ctx = DetailPageContext.from_html(content, 'selectolax')
+    assert ctx._soup is None
+    reference = DetailPageContext.from_html(content, REFERENCE_BACKEND)
+    assert ctx.anchors == reference.anchors
+    assert ctx.image_srcs == reference.image_srcs
+    assert ctx.soup.find('title').get_text() == make_soup(content, REFERENCE_BACKEND).find('title').get_text()
@@ -0,0 +1,110 @@
+"""
+条件付きGETに対応したHTTPキャッシュ（HttpCache / CachingHTTPAdapter）のテスト
+"""
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.http_cache import HttpCache, mount_http_cache
+
+
+class ValidatorServer:
+    """ETag / Last-Modified を返し、条件付きリクエストには304を返すサーバー"""
+
+    def __init__(self):
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((self.path, self.headers.get('If-None-Match')))
+                etag = f'"{self.path}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                body = f'<html>{self.path} ページ</html>'.encode('utf-8') * 10
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if not self.path.startswith('/plain'):
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _session(cache):
+    session = requests.Session()
+    mount_http_cache(session, cache)
+    return session
+
+
+def test_expired_entries_are_revalidated_with_conditional_get(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl_rules=[])
+    with ValidatorServer() as server, _session(cache) as session:
+        first = session.get(f"{server.base_url}/item/1")
+        second = session.get(f"{server.base_url}/item/1")
+        # 検証子のないページは保存しない
+        session.get(f"{server.base_url}/plain")
+
+    assert second.status_code == 200 and second.content == first.content
+    assert second.text == first.text and not second.from_cache
+    assert server.requests[:2] == [('/item/1', None), ('/item/1', '"/item/1"')]
+    assert cache.stats()['revalidated'] == 1 and cache.stats()['stores'] == 1
+    assert cache.get_entry(f"{server.base_url}/plain") is None
+
+
+def test_fresh_entries_are_served_without_request(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl_rules=[(r'/item/\d+$', None)])
+    with ValidatorServer() as server, _session(cache) as session:
+        url = f"{server.base_url}/item/2"
+        session.get(url)
+        response = session.get(url)
+        direct = cache.cached_response(url)
+
+        # 別のインスタンス（次回の実行）からも再利用できる
+        reopened = HttpCache(str(tmp_path), ttl_rules=[(r'/item/\d+$', None)])
+        assert reopened.cached_response(url).content == response.content
+
+    assert len(server.requests) == 1
+    assert response.from_cache and direct.from_cache
+    assert response.encoding == 'utf-8'
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+
+
+def test_size_limit_evicts_least_recently_used(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl_rules=[(r'.', None)])
+    with ValidatorServer() as server, _session(cache) as session:
+        size = len(session.get(f"{server.base_url}/item/10").content)
+        cache.max_bytes = int(size * 2.5)
+        session.get(f"{server.base_url}/item/11")
+        # item/10 を使って、item/11 の方を古くする
+        session.get(f"{server.base_url}/item/10")
+        session.get(f"{server.base_url}/item/12")
+
+    assert cache.get_entry(f"{server.base_url}/item/10") is not None
+    assert cache.get_entry(f"{server.base_url}/item/11") is None
+    assert cache.stats()['evictions'] >= 1
+    assert cache.stats()['bytes'] <= cache.max_bytes
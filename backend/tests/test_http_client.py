@@ -0,0 +1,95 @@
+"""
+共通HTTPクライアント（create_session / get_session）のテスト
+"""
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+import requests
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.http_client import close_session, create_session, get_session
+
+
+class KeepAliveServer:
+    """クライアントの接続元ポートとヘッダーを記録するHTTP/1.1サーバー"""
+
+    def __init__(self):
+        self.ports = []
+        self.headers = []
+        self.failures = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.ports.append(self.client_address[1])
+                server.headers.append(dict(self.headers))
+                if self.path == '/slow':
+                    time.sleep(0.5)
+                if self.path == '/flaky' and server.failures < 2:
+                    server.failures += 1
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body = b'ok'
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def test_connections_are_reused_and_headers_are_shared():
+    with KeepAliveServer() as server, create_session(http_cache=None) as session:
+        for i in range(5):
+            assert session.get(f"{server.base_url}/page/{i}").text == 'ok'
+
+    # 5回のリクエストが1本の接続で送られている
+    assert len(set(server.ports)) == 1
+    assert 'gzip' in server.headers[0]['Accept-Encoding']
+    assert server.headers[0]['User-Agent'].startswith('Mozilla/5.0')
+
+
+def test_default_timeout_and_retry_policy():
+    with KeepAliveServer() as server, create_session(timeout=0.1, max_retries=0, http_cache=None) as session:
+        # timeout を省略しても既定のタイムアウトで打ち切られる
+        with pytest.raises(requests.exceptions.RequestException, match=r'timeout=0\.1'):
+            session.get(f"{server.base_url}/slow")
+
+    with KeepAliveServer() as server, create_session(backoff_factor=0, http_cache=None) as session:
+        assert session.get(f"{server.base_url}/flaky").status_code == 200
+        assert server.failures == 2
+
+
+def test_host_pool_sizes_and_shared_session():
+    session = create_session(http_cache=None, pool_size=12, host_pool_sizes={'www.jbis.or.jp': 2})
+    assert session.get_adapter('https://www.jbis.or.jp/horse/1/')._pool_maxsize == 2
+    assert session.get_adapter('https://auction.keiba.rakuten.co.jp/item/1')._pool_maxsize == 12
+    session.close()
+
+    try:
+        assert get_session() is get_session()
+    finally:
+        close_session()
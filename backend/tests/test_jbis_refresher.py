@@ -0,0 +1,118 @@
+"""
+JBIS賞金の並行取得（AdaptiveLimiter / refresh_prizes）のテスト
+"""
+import asyncio
+import contextlib
+import io
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.adaptive_limiter import AdaptiveLimiter
+from backend.scrapers.http_client import create_session
+from scripts.update_jbis_history_data import refresh_prizes
+
+RESPONSE_DELAY = 0.05
+
+
+class JbisServer:
+    """総賞金のページを返すサーバー（最初の数件は429を返す）"""
+
+    def __init__(self, throttled: int = 0):
+        self.throttled = throttled
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server.lock:
+                    throttle = server.throttled > 0
+                    server.throttled -= 1
+                    server.in_flight += 1
+                    server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+                time.sleep(RESPONSE_DELAY)
+                with server.lock:
+                    server.in_flight -= 1
+                if throttle:
+                    self.send_response(429)
+                    self.send_header('Retry-After', '0')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                horse_id = int(self.path.strip('/').split('/')[-1])
+                body = f'<dl><dt>総賞金</dt><dd>{horse_id * 10},000.5万円</dd></dl>'.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _refresh(server, count, limiter):
+    targets = [(i, f'馬{i}', f"{server.base_url}/horse/{i}/record/") for i in range(1, count + 1)]
+    with create_session(max_retries=0, http_cache=None) as session, contextlib.redirect_stdout(io.StringIO()):
+        return asyncio.run(refresh_prizes(targets, session=session, limiter=limiter))
+
+
+def test_refresh_prizes_fetches_concurrently_within_limit():
+    limiter = AdaptiveLimiter(initial=2, maximum=4, min_interval=0)
+    with JbisServer() as server:
+        prizes = _refresh(server, 24, limiter)
+
+    assert prizes == {i: float(i * 10000) + 0.5 for i in range(1, 25)}
+    # 応答が速いので同時実行数が増えるが、上限は超えない
+    assert 2 < server.peak_in_flight <= 4
+    assert limiter.stats()['increases'] >= 1
+
+
+def test_refresh_prizes_backs_off_and_retries_on_429():
+    limiter = AdaptiveLimiter(initial=4, maximum=4, min_interval=0, max_interval=0.05)
+    with JbisServer(throttled=3) as server:
+        prizes = _refresh(server, 6, limiter)
+
+    assert all(prize is not None for prize in prizes.values()) and len(prizes) == 6
+    stats = limiter.stats()
+    assert stats['throttled'] == 3 and stats['decreases'] >= 1
+    assert stats['requests'] == 9
+
+
+def test_limiter_adjusts_limit_and_interval():
+    limiter = AdaptiveLimiter(initial=4, minimum=1, maximum=8, min_interval=0.1, max_interval=1.0, target_latency=1.0)
+    limiter.record_throttle()
+    assert (limiter.limit, limiter.interval) == (2, 0.2)
+    limiter.record_throttle()
+    limiter.record_throttle()
+    assert limiter.limit == 1
+    for _ in range(3):
+        limiter.record_success(0.01)
+    assert limiter.limit == 3
+    assert limiter.interval == pytest.approx(0.8 * 0.8 * 0.8)
+    limiter.record_success(5.0)
+    assert limiter.limit == 2
+
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(initial=0)
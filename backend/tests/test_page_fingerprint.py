@@ -0,0 +1,92 @@
+"""
+ページハッシュによる変更検出（PageFingerprintStore）のテスト
+"""
+import contextlib
+import io
+import json
+import sys
+import types
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.page_fingerprint import CHANGED, NEW, UNCHANGED, PageFingerprintStore, page_hash
+from scripts import update_comments
+from scripts.improved_scraper import EXTRACTOR_VERSION
+from test_concurrent_fetcher import FixtureServer, make_scraper
+
+URL = 'https://auction.keiba.rakuten.co.jp/item/1'
+PAGE = '<div class="a" data-v-7023039e="">本馬について  良い馬です</div>'
+
+
+def test_hash_ignores_scripts_comments_and_whitespace():
+    noisy = ('<script>var now = 1700000000;</script><!-- build 42 -->'
+             '<div class="a" data-v-028e394f="">本馬について\n\t良い馬です</div>')
+    assert page_hash(PAGE) == page_hash(noisy) == page_hash(PAGE.encode('utf-8'))
+    assert page_hash(PAGE) != page_hash(PAGE.replace('良い', '強い'))
+
+
+def test_lookup_reports_new_changed_and_unchanged(tmp_path):
+    path = str(tmp_path / 'fingerprints.json')
+    store = PageFingerprintStore(path, version='v1')
+    assert store.lookup(URL, page_hash(PAGE)) == (NEW, None)
+    store.remember(URL, page_hash(PAGE), {'comment': '良い馬です'})
+    assert store.save() and not store.save()
+
+    store = PageFingerprintStore(path, version='v1')
+    assert store.lookup(URL, page_hash(PAGE), ('comment',)) == (UNCHANGED, {'comment': '良い馬です'})
+    # 必要な項目がまだ抽出されていない場合は使い回さない
+    assert store.lookup(URL, page_hash(PAGE), ('comment', 'name')) == (NEW, None)
+    store.remember(URL, page_hash(PAGE), {'name': 'テスト馬'})
+    assert store.lookup(URL, page_hash(PAGE), ('comment', 'name'))[1] == {'comment': '良い馬です', 'name': 'テスト馬'}
+    assert store.lookup(URL, page_hash(PAGE + '落札'))[0] == CHANGED
+    assert store.stats() == {NEW: 1, CHANGED: 1, UNCHANGED: 2}
+
+    # 抽出処理のバージョンが変わったら前回の記録は使わない
+    assert len(PageFingerprintStore(path, version='v2')) == 0
+
+
+def test_unchanged_detail_pages_are_not_reparsed(tmp_path):
+    path = str(tmp_path / 'fingerprints.json')
+    with FixtureServer() as server:
+        urls = [f"{server.base_url}item/{i}" for i in range(3)]
+        first = make_scraper(server.base_url)
+        first.fingerprints = PageFingerprintStore(path)
+        expected = [first.scrape_horse_detail(url) for url in urls]
+        first.fingerprints.save()
+
+        scraper = make_scraper(server.base_url)
+        scraper.fingerprints = PageFingerprintStore(path)
+        parsed = []
+        original = scraper.parse_horse_detail
+        scraper.parse_horse_detail = lambda content: parsed.append(content) or original(content)
+        results = [scraper.scrape_horse_detail(url) for url in urls]
+
+    assert first.fingerprints.stats()[NEW] == 3
+    assert results == expected and parsed == []
+    assert scraper.page_unchanged(urls[0])
+    assert scraper.fingerprints.stats() == {NEW: 0, CHANGED: 0, UNCHANGED: 3}
+
+
+def test_update_comments_starts_from_an_empty_store(tmp_path, monkeypatch):
+    path = tmp_path / 'fingerprints.json'
+    monkeypatch.setenv('SCRAPER_PAGE_FINGERPRINTS_PATH', str(path))
+    monkeypatch.setenv('SCRAPER_HTTP_CACHE', '0')
+    monkeypatch.setattr(update_comments, 'time', types.SimpleNamespace(sleep=lambda seconds: None))
+    # 記録が空でも有効な保存先として扱う
+    assert PageFingerprintStore(str(path), version=EXTRACTOR_VERSION)
+
+    history_file = tmp_path / 'horses_history.json'
+    with FixtureServer() as server:
+        horse = {'id': 1, 'name': 'テスト馬', 'detail_url': f"{server.base_url}item/0", 'history': [{'comment': ''}]}
+        history_file.write_text(json.dumps({'metadata': {}, 'horses': [horse]}, ensure_ascii=False), encoding='utf-8')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            assert update_comments.update_comments(str(history_file))
+
+    assert '詳細ページ: 新規 1件 / 変更あり 0件 / 変更なし 0件' in output.getvalue()
+    store = PageFingerprintStore(str(path), version=EXTRACTOR_VERSION)
+    assert len(store) == 1 and store.lookup(horse['detail_url'], store._entries[horse['detail_url']]['hash'],
+                                            ('comment',))[0] == UNCHANGED
@@ -0,0 +1,48 @@
+"""
+詳細ページ解析コンテキストのテスト
+"""
+import re
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.parse_context import DetailPageContext
+
+DETAIL_PAGES = sorted((PROJECT_ROOT / 'backend' / 'scrapers' / 'debug_output').glob('debug_horse_*.html'))
+
+ANCHORED_PATTERNS = [
+    (r'最終出走馬体重[：:]\s*(\d+)kg', ('最終出走馬体重',)),
+    (r'通算成績[：:]\s*(\d+戦\d+勝［\d+-\d+-\d+-\d+］)', ('通算成績',)),
+    (r'総獲得賞金[：:]\s*([\d,.]+)万?円', ('総獲得賞金',)),
+    (r'(?:母の?父|母父)[：:]([^\n\r\s][^\n\r：:]*)', ('母父', '母の父')),
+    (r'母[：:]([^\n\r\s][^\n\r：:]*)', ('母：', '母:')),
+]
+
+
+def test_anchored_search_matches_full_text_search():
+    for path in DETAIL_PAGES:
+        ctx = DetailPageContext.from_html(path.read_bytes())
+        for pattern, anchors in ANCHORED_PATTERNS:
+            expected = re.search(pattern, ctx.text)
+            actual = ctx.search(pattern, anchors)
+            assert (expected and expected.group(0)) == (actual and actual.group(0)), (path.name, pattern)
+
+
+def test_sections_are_located_once():
+    ctx = DetailPageContext.from_html(DETAIL_PAGES[0].read_bytes())
+    assert ctx.comment_section
+    assert ctx.seller_line
+    assert ctx.pedigree_section.startswith('父')
+    # 2回目以降はキャッシュされた同一オブジェクトを返す
+    assert ctx.comment_section is ctx.comment_section
+    assert any('jbis.or.jp' in href for href, _ in ctx.anchors)
+
+
+def test_missing_anchor_skips_search():
+    ctx = DetailPageContext.from_html('<html><body><p>本文のみ</p></body></html>')
+    assert ctx.search(r'通算成績[：:](.*)', ('通算成績',)) is None
+    assert ctx.comment_section == ''
+    assert ctx.seller_line == ''
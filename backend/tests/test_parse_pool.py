@@ -0,0 +1,56 @@
+"""
+解析段のプロセスプール（ParsePool）のテスト
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.extractors.rakuten_detail import DETAIL_PATTERNS
+from backend.scrapers.parse_pool import ParsePool, default_workers
+from test_concurrent_fetcher import FixtureServer, make_scraper
+
+
+def _parse_length(content):
+    if not content:
+        raise ValueError('空のページです')
+    return len(content)
+
+
+def test_single_process_fallback(monkeypatch):
+    pool = ParsePool(_parse_length, workers=0)
+    assert pool.in_process
+    assert pool.submit(b'<html>').result() == 6
+    with pytest.raises(ValueError):
+        pool.submit(b'').result()
+    pool.close()
+
+    monkeypatch.setenv('SCRAPER_PARSE_WORKERS', '3')
+    assert default_workers() == 3
+    with pytest.raises(ValueError):
+        ParsePool(_parse_length, workers=-1)
+
+
+def test_process_pool_matches_in_process_parsing():
+    with FixtureServer() as server:
+        expected = make_scraper(server.base_url).scrape_horse_list()
+
+        DETAIL_PATTERNS.reset_stats()
+        scraper = make_scraper(server.base_url)
+        scraper.parse_pool = ParsePool(scraper.parse_pool.func, workers=2,
+                                       initializer=scraper.parse_pool.initializer,
+                                       initargs=scraper.parse_pool.initargs)
+        try:
+            horses = scraper.scrape_horse_list()
+            assert scraper.parse_pool._executor is not None
+        finally:
+            scraper.close()
+
+    assert horses == expected
+    # 解析プロセスで記録した抽出パターンのヒット数が集計されている
+    counts = DETAIL_PATTERNS.stats(['race_record'])['race_record']
+    assert counts['hits'] + counts['misses'] == len(horses)
@@ -0,0 +1,127 @@
+"""
+HorseService が発行するクエリの実行計画（EXPLAIN QUERY PLAN）と
+horses のインデックス作成マイグレーション（create_horse_indexes）のテスト
+"""
+import contextlib
+import io
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.database.migrations.create_horse_indexes import create_horse_indexes
+from backend.database.models import Base, Horse
+from backend.services.horse_listing import encode_cursor
+from backend.services.horse_service import HorseService
+
+# 全件を読む前提のクエリ（ページ単位の一覧と、全馬の賞金更新）
+FULL_SCAN_ALLOWED = {'get_horses', 'update_prize_money_for_all'}
+
+FULL_SCAN_PATTERN = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+
+
+class FakeScraper:
+    """ネットワークに接続せずにスクレイピング結果を返す"""
+
+    def scrape_all_horses(self, auction_date=None):
+        return [
+            {'name': 'テスト馬', 'sex': '牡', 'age': 3, 'seller': '牧場A', 'auction_date': '2025-01-09',
+             'sold_price': 1500000, 'comment': '再出品'},
+            {'name': '新しい馬', 'sex': '牝', 'age': 2, 'seller': '牧場B', 'auction_date': '2025-01-09',
+             'sold_price': None, 'unsold': True, 'comment': ''},
+        ]
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _capture_selects(engine):
+    statements = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    return statements
+
+
+def _full_scans(engine, statement, parameters):
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    return [row[3] for row in plan if FULL_SCAN_PATTERN.match(row[3])]
+
+
+def test_horse_service_queries_use_indexes(engine):
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    service = HorseService(rakuten_scraper=FakeScraper())
+    service.create_horse(db, {
+        'name': 'テスト 馬', 'sex': '["牡"]', 'age': '[2]', 'seller': '["牧場A"]', 'auction_date': '["2025-01-05"]',
+        'sold_price': '[1000000]', 'comment': '[""]', 'total_prize_start': 10, 'total_prize_latest': 25,
+    })
+    statements = _capture_selects(engine)
+
+    calls = {
+        'get_horses': lambda: service.get_horses(db),
+        'get_horse_by_id': lambda: service.get_horse_by_id(db, 1),
+        'get_horse_fields': lambda: service.get_horse_fields(db, 1, ['id', 'name']),
+        'list_horses': lambda: service.list_horses(db, limit=1, cursor=encode_cursor('id', {'id': 1})),
+        'list_horses_by_updated_at': lambda: service.list_horses(
+            db, limit=1, order_by='updated_at', cursor=encode_cursor('updated_at', {'updated_at': datetime(2025, 1, 1), 'id': 5})),
+        'list_horses_by_auction_date': lambda: service.list_horses(db, auction_date='2025-01-05', fields=['id']),
+        'get_horses_by_name': lambda: service.get_horses_by_name(db, 'テスト馬'),
+        'get_horses_by_auction_date': lambda: service.get_horses_by_auction_date(db, '2025-01-05'),
+        'get_auction_dates': lambda: service.get_auction_dates(db),
+        'get_statistics': lambda: service.get_statistics(db),
+        'update_horse': lambda: service.update_horse(db, 1, {'comment': '["更新"]'}),
+        'scrape_and_save_horses': lambda: service.scrape_and_save_horses(db, '2025-01-09'),
+        'update_prize_money_for_all': lambda: service.update_prize_money_for_all(db),
+        'delete_horse': lambda: service.delete_horse(db, 1),
+    }
+    failures = []
+    for method, call in calls.items():
+        statements.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            call()
+        assert statements, f"{method} がクエリを発行していません"
+        if method in FULL_SCAN_ALLOWED:
+            continue
+        for statement, parameters in statements:
+            scans = _full_scans(engine, statement, parameters)
+            if scans:
+                failures.append(f"{method}: {scans} <- {' '.join(statement.split())[:120]}")
+    assert failures == [], '\n'.join(failures)
+
+    # 正規化した馬名での検索は式インデックスを使う
+    assert [h.name for h in service.get_horses_by_name(db, '新しい 馬')] == ['新しい馬']
+    db.close()
+
+
+def test_create_horse_indexes_migration_is_idempotent(engine):
+    expected = sorted(index.name for index in Horse.__table__.indexes)
+    with engine.begin() as conn:
+        for name in expected:
+            conn.execute(text(f"DROP INDEX {name}"))
+
+    assert create_horse_indexes(engine) == expected
+    assert create_horse_indexes(engine) == []
+    with engine.connect() as conn:
+        created = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+        plan = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT id FROM horses WHERE replace(replace(name, ' ', ''), '　', '') = ?",
+            ('テスト馬',)).fetchall()
+    assert set(expected) <= created
+    assert 'ix_horses_name_key' in plan[0][3]
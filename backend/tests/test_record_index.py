@@ -0,0 +1,94 @@
+"""
+ハッシュ索引（RecordIndex）と同一馬判定のテスト
+"""
+import random
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.data_helpers import (
+    build_auction_history_index,
+    build_horse_index,
+    find_auction_history,
+    find_horse_by_name_and_age,
+)
+from backend.scrapers.record_index import RecordIndex
+from scripts.accumulative_scraper import AccumulativeScraper
+
+NAMES = ['アイドル フェスタ', 'アイドルフェスタ', 'シュガー　ハート', 'テスト馬', '', 'キタサン']
+SIRES = ['キタサンブラック', 'ドゥラメンテ', '']
+
+
+def _linear_match(scraper, new_horse, existing_horses):
+    """索引導入前の線形探索による同一馬判定"""
+    normalize = scraper.normalize_name
+    new_name = normalize(new_horse.get('name', ''))
+    new_triple = [normalize(new_horse.get(k, '')) for k in ('sire', 'dam', 'dam_sire')]
+    for idx, horse in enumerate(existing_horses):
+        names = [normalize(horse.get('name', ''))] + [normalize(h.get('name', '')) for h in horse.get('history', [])]
+        if new_name and new_name in names:
+            return idx, horse
+        triple = [normalize(horse.get(k, '')) for k in ('sire', 'dam', 'dam_sire')]
+        if all(new_triple) and all(triple) and new_triple == triple:
+            return idx, horse
+    return None, None
+
+
+def _random_horse(rng):
+    return {
+        'name': rng.choice(NAMES),
+        'sire': rng.choice(SIRES),
+        'dam': rng.choice(NAMES),
+        'dam_sire': rng.choice(SIRES),
+        'history': [{'name': rng.choice(NAMES)} for _ in range(rng.randint(0, 2))],
+    }
+
+
+def test_find_matching_horse_agrees_with_linear_scan():
+    rng = random.Random(7)
+    scraper = AccumulativeScraper(enable_history=False)
+    existing_horses = [_random_horse(rng) for _ in range(40)]
+
+    for _ in range(300):
+        new_horse = _random_horse(rng)
+        expected = _linear_match(scraper, new_horse, existing_horses)
+        assert scraper.find_matching_horse(new_horse, existing_horses) == expected
+
+        # 既存馬の更新（馬名・血統の変更）と新規追加を索引に反映する
+        if expected[0] is not None and rng.random() < 0.5:
+            existing_horses[expected[0]] = dict(_random_horse(rng), history=[{'name': new_horse['name']}])
+            scraper.identity_index(existing_horses).update(expected[0])
+        else:
+            existing_horses.append(new_horse)
+
+
+def test_data_helper_lookups_use_index():
+    horses = [{'name': 'A', 'age': 3}, {'name': 'B', 'age': 4}, {'name': 'A', 'age': 3, 'id': 'dup'}]
+    index = build_horse_index(horses)
+    assert find_horse_by_name_and_age(horses, 'A', 3, index) is horses[0]
+    assert find_horse_by_name_and_age(horses, 'B', 5, index) is None
+
+    horses.append({'name': 'C', 'age': 2})
+    index.sync()
+    assert find_horse_by_name_and_age(horses, 'C', 2, index) is horses[3]
+
+    history = [{'horse_id': 'x', 'auction_date': '2025-08-01'}]
+    history_index = build_auction_history_index(history)
+    assert find_auction_history(history, 'x', '2025-08-01', history_index) is history[0]
+    assert find_auction_history(history, 'x', '2025-08-08', history_index) is None
+
+
+def test_update_removes_stale_keys_and_unhashable_keys_are_skipped():
+    records = [{'keys': ['a', 'b', 'a']}, {'keys': ['b']}, {'keys': [['unhashable']]}]
+    index = RecordIndex(records, lambda record: record['keys'])
+    assert index.first('a') == 0 and index.first('b') == 0
+    assert index.first(['unhashable']) is None
+
+    records[0] = {'keys': ['c']}
+    index.update(0)
+    assert index.first('a') is None
+    assert index.first('b') == 1
+    assert index.first('c') == 0
@@ -0,0 +1,67 @@
+"""
+馬ごとの賞金更新スケジュール（refresh_schedule）のテスト
+"""
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.refresh_schedule import (
+    MAX_INTERVAL_DAYS,
+    SCHEDULE_KEY,
+    is_due,
+    next_interval_days,
+    record_check,
+)
+
+
+def test_interval_stays_monthly_then_backs_off_exponentially():
+    assert [next_interval_days(n) for n in range(6)] == [28, 28, 56, 112, 224, MAX_INTERVAL_DAYS]
+    assert next_interval_days(50) == MAX_INTERVAL_DAYS
+
+
+def test_record_check_tracks_changes():
+    horse = {'name': 'テスト馬'}
+    assert is_due(horse)
+
+    record_check(horse, changed=True, now=datetime(2025, 1, 1, 9))
+    assert horse[SCHEDULE_KEY] == {
+        'last_checked': '2025-01-01T09:00:00',
+        'last_changed': '2025-01-01T09:00:00',
+        'unchanged_runs': 0,
+        'next_check': '2025-01-29',
+    }
+    assert not is_due(horse, date(2025, 1, 28))
+    assert is_due(horse, date(2025, 1, 29))
+
+    for month in (2, 3, 4):
+        record_check(horse, changed=False, now=datetime(2025, month, 1))
+    schedule = horse[SCHEDULE_KEY]
+    assert schedule['unchanged_runs'] == 3
+    assert schedule['last_changed'] == '2025-01-01T09:00:00'
+    assert schedule['next_check'] == '2025-07-22'
+
+    # 賞金が変わったら月1回に戻る
+    record_check(horse, changed=True, now=datetime(2025, 8, 1))
+    assert horse[SCHEDULE_KEY]['next_check'] == '2025-08-29'
+    # 壊れた値は確認対象として扱う
+    assert is_due({SCHEDULE_KEY: {'next_check': 'unknown'}})
+
+
+def test_monthly_runs_fetch_far_fewer_stable_horses():
+    # 月初に2年間実行し、現役馬（毎月変わる）と引退馬（変わらない）の取得回数を比べる
+    active, retired = {}, {}
+    fetches = {'active': 0, 'retired': 0}
+    for month in range(24):
+        today = date(2024 + month // 12, month % 12 + 1, 1)
+        now = datetime.combine(today, datetime.min.time())
+        for key, horse, changed in (('active', active, True), ('retired', retired, False)):
+            if is_due(horse, today):
+                fetches[key] += 1
+                record_check(horse, changed, now)
+
+    assert fetches['active'] == 24
+    assert fetches['retired'] <= 6
@@ -0,0 +1,155 @@
+"""
+集計結果のキャッシュ（ResultCache）とデータの世代番号のテスト
+"""
+import asyncio
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend import main
+from backend.database.models import AuctionEntry, Base, Horse
+from backend.services.horse_ingest import bulk_upsert_horses
+from backend.services.horse_service import HorseService
+from backend.services.result_cache import ResultCache, current_generation
+from test_query_plans import FakeScraper
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    session.add(Horse(name='テスト馬', sold_price='[1000000]', auction_date='["2025-01-05"]',
+                      total_prize_start=10, total_prize_latest=15))
+    session.add(AuctionEntry(horse_id=1, auction_date='2025-01-05', sold_price=1000000))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _count_selects(engine):
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def test_generation_advances_only_on_committed_writes(db):
+    generation = current_generation()
+    db.query(Horse).all()
+    db.commit()
+    assert current_generation() == generation
+
+    db.add(Horse(name='取り消す馬'))
+    db.flush()
+    db.rollback()
+    db.commit()
+    assert current_generation() == generation
+
+    # session.execute() での一括の INSERT
+    db.execute(insert(Horse.__table__), [{'name': '一括の馬'}])
+    db.commit()
+    assert current_generation() == generation + 1
+
+    db.query(Horse).filter(Horse.name == '一括の馬').one().weight = 480
+    db.commit()
+    assert current_generation() == generation + 2
+
+    # bulk_insert_mappings / bulk_update_mappings だけで書き込むスクレイピング結果の保存
+    with contextlib.redirect_stdout(io.StringIO()):
+        bulk_upsert_horses(db, [{'name': '新しい馬', 'auction_date': '2025-01-09', 'sold_price': 2000000}])
+    assert current_generation() == generation + 3
+    with contextlib.redirect_stdout(io.StringIO()):
+        bulk_upsert_horses(db, [{'name': '新しい馬', 'auction_date': '2025-01-12', 'sold_price': 2500000}])
+    assert current_generation() == generation + 4
+
+
+def test_statistics_are_cached_until_a_write(engine, db):
+    service = HorseService(rakuten_scraper=object(), result_cache=ResultCache())
+    first = service.get_statistics(db)
+    assert first['total_horses'] == 1 and first['average_growth_rate'] == 50.0
+    assert service.get_auction_dates(db) == ['2025-01-05']
+
+    statements = _count_selects(engine)
+    first['total_horses'] = 99
+    assert service.get_statistics(db)['total_horses'] == 1
+    assert service.get_auction_dates(db) == ['2025-01-05']
+    assert statements == []
+
+    service.create_horse(db, {'name': '新しい馬', 'auction_date': '["2025-01-09"]', 'sold_price': '[2000000]'})
+    assert service.get_statistics(db)['total_horses'] == 2
+    assert service.get_auction_dates(db) == ['2025-01-05', '2025-01-09']
+
+    metrics = service.result_cache.metrics()
+    assert metrics['by_name']['statistics'] == {'hits': 1, 'misses': 2, 'stale': 1, 'hit_rate': 0.3333}
+    assert (metrics['hits'], metrics['misses'], metrics['hit_rate']) == (2, 4, 0.3333)
+
+
+def test_scraper_ingestion_invalidates_cached_results(db):
+    service = HorseService(rakuten_scraper=FakeScraper(), result_cache=ResultCache())
+    assert service.get_statistics(db)['total_horses'] == 1
+    assert service.get_auction_dates(db) == ['2025-01-05']
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert len(service.scrape_and_save_horses(db, '2025-01-09')) == 2
+    assert service.get_statistics(db)['total_horses'] == 2
+    assert service.get_auction_dates(db) == ['2025-01-05', '2025-01-09']
+
+
+def test_ttl_and_size_eviction():
+    clock = FakeClock()
+    cache = ResultCache(ttl=60, max_entries=2, clock=clock)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    assert cache.get_or_compute('a', lambda: compute(1)) == 1
+    clock.now += 59
+    assert cache.get_or_compute('a', lambda: compute(2)) == 1
+    clock.now += 1
+    # TTL を過ぎた結果は計算し直す（別プロセスでの書き込み対策）
+    assert cache.get_or_compute('a', lambda: compute(3)) == 3
+
+    cache.get_or_compute('b', lambda: compute(4), key='2025-01-05')
+    cache.get_or_compute('b', lambda: compute(5), key='2025-01-09')
+    assert cache.get_or_compute('a', lambda: compute(6)) == 6
+    assert calls == [1, 3, 4, 5, 6]
+    assert cache.metrics()['entries'] == 2 and cache.metrics()['evictions'] == 2
+
+    disabled = ResultCache(ttl=0)
+    disabled.get_or_compute('a', lambda: 1)
+    assert disabled.metrics()['entries'] == 0
+
+
+def test_cache_metrics_endpoint(db, monkeypatch):
+    monkeypatch.setattr(main, 'horse_service', HorseService(rakuten_scraper=object(), result_cache=ResultCache()))
+    asyncio.run(main.get_statistics(db=db))
+    asyncio.run(main.get_statistics(db=db))
+    metrics = asyncio.run(main.get_cache_metrics())
+    assert metrics['results']['by_name']['statistics']['hit_rate'] == 0.5
+    assert metrics['results']['generation'] == current_generation()
+    assert set(metrics['horse_json']) == {'entries', 'max_entries', 'hits', 'misses', 'hit_rate'}
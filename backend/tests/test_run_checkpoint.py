@@ -0,0 +1,91 @@
+"""
+スクレイピング実行のチェックポイント（RunCheckpoint）と --resume のテスト
+"""
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.run_checkpoint import RunCheckpoint
+from test_concurrent_fetcher import FixtureServer, make_scraper
+
+QUEUE = [{'url': f'https://example.com/item/{i}', 'text': f'馬{i}'} for i in range(5)]
+
+
+def test_resume_restores_queue_and_completed_payloads(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    checkpoint = RunCheckpoint(str(path))
+    checkpoint.start(QUEUE, meta={'auction_date': '2025-01-05'})
+    checkpoint.record(QUEUE[0]['url'], {'name': '馬0'})
+    checkpoint.record(QUEUE[2]['url'], {'name': '馬2'})
+    checkpoint.close()
+
+    resumed = RunCheckpoint(str(path), resume=True)
+    assert resumed.resumed and resumed.run_id == checkpoint.run_id
+    assert resumed.meta == {'auction_date': '2025-01-05'}
+    assert resumed.completed == {QUEUE[0]['url']: {'name': '馬0'}, QUEUE[2]['url']: {'name': '馬2'}}
+    assert resumed.pending() == [QUEUE[1], QUEUE[3], QUEUE[4]]
+
+    resumed.finish()
+    assert not path.exists()
+    # 再開しない場合は既存のチェックポイントを破棄する
+    checkpoint = RunCheckpoint(str(path))
+    checkpoint.start(QUEUE)
+    assert RunCheckpoint(str(path)).queue is None and not path.exists()
+
+
+def test_truncated_last_line_is_dropped(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    checkpoint = RunCheckpoint(str(path))
+    checkpoint.start(QUEUE)
+    checkpoint.record(QUEUE[0]['url'], {'name': '馬0'})
+    checkpoint.close()
+    # 書き込み途中で強制終了した状態を再現する
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "done", "url": "https://example.com/item/1", "pay')
+
+    resumed = RunCheckpoint(str(path), resume=True)
+    assert list(resumed.completed) == [QUEUE[0]['url']]
+    resumed.record(QUEUE[1]['url'], {'name': '馬1'})
+    resumed.close()
+    assert len(RunCheckpoint(str(path), resume=True).completed) == 2
+
+    with pytest.raises(RuntimeError):
+        RunCheckpoint(str(tmp_path / 'other.jsonl')).record(QUEUE[0]['url'], {})
+
+
+def test_scrape_horse_list_resumes_after_crash(tmp_path, monkeypatch):
+    monkeypatch.setenv('SCRAPER_CHECKPOINT_DIR', str(tmp_path))
+    with FixtureServer() as server:
+        expected = make_scraper(server.base_url).scrape_horse_list()
+
+        # 3頭を取得したところで異常終了させる
+        scraper = make_scraper(server.base_url, max_workers=1, max_in_flight=1)
+        original = scraper.iter_horse_details
+
+        def crashing(links):
+            for i, item in enumerate(original(links)):
+                if i == 3:
+                    raise KeyboardInterrupt
+                yield item
+
+        scraper.iter_horse_details = crashing
+        with pytest.raises(KeyboardInterrupt):
+            scraper.scrape_horse_list(RunCheckpoint.for_run('horse_list'))
+
+        server.request_log.clear()
+        checkpoint = RunCheckpoint.for_run('horse_list', resume=True)
+        horses = make_scraper(server.base_url).scrape_horse_list(checkpoint)
+        paths = [path for _, path in server.request_log]
+
+    assert len(checkpoint.completed) == len(expected)
+    # 再開後はトップページを取得せず、残りの詳細ページだけを取得する
+    assert '/' not in paths
+    assert len(paths) == len(expected) - 3 and all(re.match(r'^/item/\d+$', p) for p in paths)
+    assert [h['detail_url'] for h in horses] == [h['detail_url'] for h in expected]
+    assert [h['name'] for h in horses] == [h['name'] for h in expected]
@@ -0,0 +1,86 @@
+"""
+SQLiteの接続設定（SqliteProfile）と読み書き別のエンジンのテスト
+"""
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.database.models import Base
+from backend.database.sqlite_profile import SqliteProfile, create_engines
+
+
+@pytest.fixture
+def engines(tmp_path):
+    write_engine, read_engine = create_engines(f"sqlite:///{tmp_path / 'test.db'}", SqliteProfile(), read_pool_size=2)
+    Base.metadata.create_all(write_engine)
+    yield write_engine, read_engine
+    write_engine.dispose()
+    read_engine.dispose()
+
+
+def _pragma(conn, name):
+    return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_pragmas_are_applied_to_every_connection(engines):
+    write_engine, read_engine = engines
+    for engine in engines:
+        with engine.connect() as conn:
+            assert _pragma(conn, 'journal_mode') == 'wal'
+            assert _pragma(conn, 'synchronous') == 1  # NORMAL
+            assert _pragma(conn, 'temp_store') == 2  # MEMORY
+            assert _pragma(conn, 'cache_size') == -64 * 1024
+            assert _pragma(conn, 'busy_timeout') == 5000
+    assert write_engine.pool.size() == 1
+
+    # 参照用の接続では書き込めない
+    with read_engine.connect() as conn:
+        assert _pragma(conn, 'query_only') == 1
+        with pytest.raises(OperationalError):
+            conn.execute(text("INSERT INTO horses (name) VALUES ('テスト馬')"))
+
+
+def test_reads_are_not_blocked_by_an_open_write_transaction(engines):
+    write_engine, read_engine = engines
+    with write_engine.begin() as conn:
+        conn.execute(text("INSERT INTO horses (name) VALUES ('既存馬')"))
+
+    with write_engine.connect() as writer:
+        transaction = writer.begin()
+        writer.execute(text("INSERT INTO horses (name) VALUES ('取り込み中の馬')"))
+        # 書き込みトランザクション中でも、別スレッドの参照はロック待ちせずにコミット済みの内容を読める
+        counts = []
+
+        def read():
+            with read_engine.connect() as conn:
+                counts.append(conn.execute(text("SELECT count(*) FROM horses")).scalar())
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join(timeout=2)
+        assert counts == [1]
+        transaction.commit()
+
+    with read_engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM horses")).scalar() == 2
+
+
+def test_profile_from_env(monkeypatch):
+    monkeypatch.setenv('SQLITE_SYNCHRONOUS', 'FULL')
+    monkeypatch.setenv('SQLITE_MMAP_SIZE', '0')
+    monkeypatch.setenv('SQLITE_BUSY_TIMEOUT_MS', 'x')
+    profile = SqliteProfile.from_env()
+    assert profile.synchronous == 'FULL' and profile.mmap_size == 0 and profile.busy_timeout_ms == 5000
+    assert 'PRAGMA journal_mode=WAL' in profile.pragmas()
+    assert profile.pragmas(read_only=True)[-1] == 'PRAGMA query_only=ON'
+
+    monkeypatch.setenv('SQLITE_TUNING', '0')
+    assert SqliteProfile.from_env().pragmas() == ['PRAGMA busy_timeout=5000']
@@ -0,0 +1,90 @@
+"""
+構造化ロガーのテスト
+"""
+import contextlib
+import io
+import json
+import logging
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers import structured_log
+from backend.scrapers.structured_log import disable_trace, enable_trace, get_logger
+from scripts.improved_scraper import ImprovedRakutenScraper
+
+DETAIL_PAGES = sorted((PROJECT_ROOT / 'backend' / 'scrapers' / 'debug_output').glob('debug_*.html'))
+
+
+class _CountingArg:
+    """文字列化された回数を数える引数"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return 'value'
+
+
+def test_disabled_level_does_not_format_arguments():
+    log = get_logger('test.disabled')
+    logging.getLogger(log.name).setLevel(logging.INFO)
+    disable_trace()
+    arg = _CountingArg()
+
+    log.debug('test.event', '値: %s', arg, extra=arg)
+
+    assert arg.calls == 0
+    assert not log.is_enabled_for(logging.DEBUG)
+
+
+def test_trace_sink_writes_event_and_fields(tmp_path):
+    log = get_logger('test.trace')
+    logging.getLogger(log.name).setLevel(logging.WARNING)
+    trace_file = tmp_path / 'trace' / 'scrape.jsonl'
+    enable_trace(str(trace_file))
+    try:
+        log.debug('pedigree.extracted', '血統情報を抽出: %s', 'テスト馬', sire='キタサンブラック', dam='シュガーハート')
+    finally:
+        disable_trace()
+
+    lines = trace_file.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 1
+    entry = json.loads(lines[0])
+    assert entry['level'] == 'DEBUG'
+    assert entry['logger'] == 'scraper.test.trace'
+    assert entry['event'] == 'pedigree.extracted'
+    assert entry['message'] == '血統情報を抽出: テスト馬'
+    assert entry['fields'] == {'sire': 'キタサンブラック', 'dam': 'シュガーハート'}
+
+
+def test_log_level_from_environment(monkeypatch):
+    root = logging.getLogger(structured_log.ROOT_LOGGER_NAME)
+    original = root.level
+    try:
+        monkeypatch.setenv(structured_log.LOG_LEVEL_ENV_VAR, 'debug')
+        monkeypatch.delenv(structured_log.TRACE_FILE_ENV_VAR, raising=False)
+        structured_log.configure_from_env()
+        assert root.level == logging.DEBUG
+
+        monkeypatch.setenv(structured_log.LOG_LEVEL_ENV_VAR, 'WARNING')
+        structured_log.configure_from_env()
+        assert root.level == logging.WARNING
+    finally:
+        root.setLevel(original)
+
+
+def test_detail_parse_writes_nothing_to_stdout():
+    scraper = ImprovedRakutenScraper()
+    scraper._extract_jbis_prize_money = lambda jbis_url: 0.0
+
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        for path in DETAIL_PAGES:
+            scraper.parse_horse_detail(path.read_bytes())
+
+    assert stdout.getvalue() == ''
@@ -11,8 +11,9 @@ import os
 import sys
 import argparse
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import importlib.util
+import logging
 
 # プロジェクトルートをパスに追加
 project_root = os.path.dirname(os.path.dirname(__file__))
@@ -27,6 +28,14 @@ except ImportError as e:
     print(f"Error importing ImprovedRakutenScraper: {e}")
     raise
 
+from backend.scrapers.history_aggregates import AGGREGATES_KEY, HistoryAggregates
+from backend.scrapers.history_journal import HistoryJournal
+from backend.scrapers.record_index import RecordIndex
+from backend.scrapers.structured_log import get_logger
+
+# 馬ごとの詳細はデバッグログに出す（SCRAPER_LOG_LEVEL=DEBUG で表示）
+log = get_logger('scraper.accumulate')
+
 
 class AccumulativeScraper:
     def __init__(self, enable_history=None, mode='development'):
@@ -35,6 +44,8 @@ class AccumulativeScraper:
         script_dir = os.path.dirname(os.path.abspath(__file__))
         project_root = os.path.dirname(script_dir)
         self.history_file = os.path.join(project_root, "static-frontend", "public", "data", "horses_history.json")
+        # 同一馬判定用の索引（find_matching_horse で既存馬リストごとに作成）
+        self._identity_index: Optional[RecordIndex] = None
         
         # 履歴管理の制御設定
         self.mode = mode
@@ -53,6 +64,11 @@ class AccumulativeScraper:
         
         print(f"履歴追加モード: {'有効' if self.enable_history else '無効'} (mode: {mode})")
         
+    @property
+    def journal_file(self) -> str:
+        """マージし終えた馬を追記するジャーナル（horses_history.json と同じディレクトリ）"""
+        return os.path.join(os.path.dirname(self.history_file), '.horses_history.journal')
+    
     def load_existing_data(self) -> Dict:
         """既存の履歴データを読み込み"""
         if not os.path.exists(self.history_file):
@@ -85,39 +101,62 @@ class AccumulativeScraper:
             return ""
         return name.strip().replace(" ", "").replace("　", "")
     
+    def identity_keys(self, horse: Dict) -> List[Tuple]:
+        """同一馬判定に使うキー（馬名・履歴内の馬名・血統の組）"""
+        keys = []
+        name = self.normalize_name(horse.get('name', ''))
+        if name:
+            keys.append(('name', name))
+        for history_entry in horse.get('history', []):
+            history_name = self.normalize_name(history_entry.get('name', ''))
+            if history_name:
+                keys.append(('name', history_name))
+        pedigree = self.pedigree_key(horse)
+        if pedigree:
+            keys.append(pedigree)
+        return keys
+    
+    def pedigree_key(self, horse: Dict) -> Optional[Tuple]:
+        """血統（父、母、母父）の組のキー（いずれかが空の場合は None）"""
+        sire = self.normalize_name(horse.get('sire', ''))
+        dam = self.normalize_name(horse.get('dam', ''))
+        dam_sire = self.normalize_name(horse.get('dam_sire', ''))
+        if sire and dam and dam_sire:
+            return ('pedigree', sire, dam, dam_sire)
+        return None
+    
+    def identity_index(self, existing_horses: List[Dict]) -> RecordIndex:
+        """既存馬リストの同一馬判定用索引（リストごとに1度だけ作成し、追加分は自動で取り込む）"""
+        index = self._identity_index
+        if index is None or index.records is not existing_horses:
+            index = self._identity_index = RecordIndex(existing_horses, self.identity_keys)
+        else:
+            index.sync()
+        return index
+    
     def find_matching_horse(self, new_horse: Dict, existing_horses: List[Dict]) -> Tuple[Optional[int], Optional[Dict]]:
         """
         同一馬を検索
         判定基準: 馬名 + 血統情報（父、母、母父）
+        
+        馬名（履歴内の馬名を含む）または血統の組が一致する馬のうち、リストの最も前にある馬を返す。
+        既存馬を更新した場合は identity_index(existing_horses).update(idx) で索引に反映すること。
         """
+        index = self.identity_index(existing_horses)
         new_name = self.normalize_name(new_horse.get('name', ''))
-        new_sire = self.normalize_name(new_horse.get('sire', ''))
-        new_dam = self.normalize_name(new_horse.get('dam', ''))
-        new_dam_sire = self.normalize_name(new_horse.get('dam_sire', ''))
-        
-        for idx, existing_horse in enumerate(existing_horses):
-            # 馬名での一致確認
-            existing_name = self.normalize_name(existing_horse.get('name', ''))
-            if existing_name and new_name and existing_name == new_name:
-                return idx, existing_horse
-            
-            # 履歴内の馬名も確認
-            for history_entry in existing_horse.get('history', []):
-                history_name = self.normalize_name(history_entry.get('name', ''))
-                if history_name and new_name and history_name == new_name:
-                    return idx, existing_horse
-            
-            # 血統情報での一致確認（馬名が異なる場合）
-            existing_sire = self.normalize_name(existing_horse.get('sire', ''))
-            existing_dam = self.normalize_name(existing_horse.get('dam', ''))
-            existing_dam_sire = self.normalize_name(existing_horse.get('dam_sire', ''))
-            
-            if (new_sire and existing_sire and new_sire == existing_sire and
-                new_dam and existing_dam and new_dam == existing_dam and
-                new_dam_sire and existing_dam_sire and new_dam_sire == existing_dam_sire):
-                return idx, existing_horse
-        
-        return None, None
+        new_pedigree = self.pedigree_key(new_horse)
+        
+        candidates = []
+        if new_name:
+            candidates.append(index.first(('name', new_name)))
+        if new_pedigree:
+            candidates.append(index.first(new_pedigree))
+        candidates = [idx for idx in candidates if idx is not None]
+        if not candidates:
+            return None, None
+        
+        idx = min(candidates)
+        return idx, existing_horses[idx]
     
     def create_history_entry(self, horse_data: Dict, auction_date: str) -> Dict:
         """履歴エントリを作成
@@ -171,11 +210,11 @@ class AccumulativeScraper:
         # オークション日を設定
         default_values['auction_date'] = auction_date
         
-        # デバッグ用に作成したエントリを表示
-        print(f"履歴エントリ作成: {default_values['name'] or 'Unknown'} - {auction_date}")
-        print(f"  性別: {default_values['sex']}, 年齢: {default_values['age']}, 販売者: {default_values['seller']}")
-        print(f"  馬体重: {default_values['weight']}kg, 賞金: {default_values['total_prize_latest']}万円, コメント長: {len(default_values['comment'])}文字")
-        print(f"  病気タグ: {default_values['disease_tags']}")
+        # デバッグ用に作成したエントリを記録
+        log.debug('history.entry', '履歴エントリ作成: %s - %s', default_values['name'] or 'Unknown', auction_date,
+                  sex=default_values['sex'], age=default_values['age'], seller=default_values['seller'],
+                  weight=default_values['weight'], total_prize_latest=default_values['total_prize_latest'],
+                  comment_length=len(default_values['comment']), disease_tags=default_values['disease_tags'])
         
         return default_values
     
@@ -206,9 +245,10 @@ class AccumulativeScraper:
         history_dates = {h.get('auction_date') for h in history}
         if auction_date not in history_dates and self.enable_history:
             history.append(new_history_entry)
-            print(f"✅ 履歴を追加: {existing_horse.get('name', 'Unknown')} - {auction_date}")
+            log.info('history.appended', '✅ 履歴を追加: %s - %s', existing_horse.get('name', 'Unknown'), auction_date)
         else:
-            print(f"⚠️ 履歴追加スキップ: {existing_horse.get('name', 'Unknown')} - {auction_date} (テストモード)")
+            log.info('history.skipped', '⚠️ 履歴追加スキップ: %s - %s (テストモード)',
+                     existing_horse.get('name', 'Unknown'), auction_date)
 
         # 血統情報を統一（damsire と dam_sire の両方に同じ値を設定）
         damsire = (
@@ -301,15 +341,15 @@ class AccumulativeScraper:
             value = update_fields.get(field)
             if value in (None, '', 0) and field != 'age':  # age=0は有効
                 missing_fields.append(field)
-                # デバッグ情報を出力
-                print(f"⚠️ 必須フィールドが不足: {field}")
-                print(f"  - 新しいデータ: {new_horse.get(field)}")
-                print(f"  - 既存データ: {existing_horse.get(field)}")
-                print(f"  - 履歴: {[h.get(field) for h in history if h.get(field) not in (None, '')]}")
+                # デバッグ情報を記録
+                if log.is_enabled_for(logging.DEBUG):
+                    log.debug('merge.field_missing', '必須フィールドが不足: %s', field,
+                              new=new_horse.get(field), existing=existing_horse.get(field),
+                              history=[h.get(field) for h in history if h.get(field) not in (None, '')])
         
         if missing_fields:
-            print(f"⚠️ 必須フィールドが不足しています: {', '.join(missing_fields)}")
-            print(f"  デフォルト値を設定します")
+            log.warning('merge.defaults', '⚠️ 必須フィールドが不足しています: %s（デフォルト値を設定します）',
+                        ', '.join(missing_fields), horse=existing_horse.get('name'), missing=missing_fields)
             
             # 不足フィールドにデフォルト値を設定
             for field in missing_fields:
@@ -329,18 +369,11 @@ class AccumulativeScraper:
         # 既存の馬データを更新
         existing_horse.update(update_fields)
         
-        # デバッグ用に更新されたフィールドを表示
-        print(f"\n=== 馬データ更新 (ID: {existing_horse.get('id')}) ===")
-        print(f"馬名: {existing_horse.get('name')}")
-        print(f"性別: {existing_horse.get('sex')}, 年齢: {existing_horse.get('age')}, 販売者: {existing_horse.get('seller')}")
-        print(f"血統: {existing_horse.get('sire')} - {existing_horse.get('dam')} (母父: {existing_horse.get('damsire')})")
-        print(f"JBIS URL: {existing_horse.get('jbis_url')}")
-        print(f"オークション日: {existing_horse.get('auction_date')}")
-        print(f"馬体重: {existing_horse.get('weight', 'N/A')}kg, 賞金: {existing_horse.get('total_prize_latest', 0)}万円")
-        print(f"コメント: {len(existing_horse.get('comment', ''))}文字, 病気タグ: {existing_horse.get('disease_tags', [])}")
-        print(f"画像: {'あり' if existing_horse.get('primary_image') else 'なし'}")
-        print(f"履歴エントリ: {len(existing_horse.get('history', []))}件")
-        print("=" * 50)
+        # デバッグ用に更新されたフィールドを記録
+        if log.is_enabled_for(logging.DEBUG):
+            log.debug('merge.updated', '馬データ更新 (ID: %s): %s', existing_horse.get('id'), existing_horse.get('name'),
+                      horse={k: v for k, v in existing_horse.items() if k != 'history'},
+                      history_count=len(existing_horse.get('history', [])))
         
         return existing_horse
     
@@ -365,6 +398,7 @@ class AccumulativeScraper:
                     "total_horses": 0,
                     "average_price": 0
                 },
+                AGGREGATES_KEY: HistoryAggregates().to_dict(),
                 "horses": []
             }
             
@@ -436,6 +470,7 @@ class AccumulativeScraper:
             elif not keep_latest_only and reset_mode == 'keep_latest':
                 reset_mode = 'keep_all'  # 全履歴保持
             
+            aggregates = HistoryAggregates.load(existing_data)
             reset_count = 0
             total_history_before = 0
             total_history_after = 0
@@ -458,7 +493,9 @@ class AccumulativeScraper:
                 new_history = self._filter_history_by_mode(history, reset_mode, target_date)
                 
                 if len(new_history) != original_count:
+                    before = HistoryAggregates.contribution(horse)
                     horse['history'] = new_history
+                    aggregates.update(before, HistoryAggregates.contribution(horse))
                     reset_count += 1
                     total_history_after += len(new_history)
                     print(f"  ✅ {horse.get('name', 'Unknown')}: {original_count}件 -> {len(new_history)}件")
@@ -469,8 +506,7 @@ class AccumulativeScraper:
             updated_data = {
                 "metadata": {
                     "last_updated": datetime.now().isoformat(),
-                    "total_horses": len(existing_horses),
-                    "average_price": existing_data.get('metadata', {}).get('average_price', 0),
+                    **aggregates.metadata(),
                     "auction_date": datetime.now().strftime('%Y-%m-%d'),
                     "history_reset": True,
                     "reset_date": datetime.now().isoformat(),
@@ -478,6 +514,7 @@ class AccumulativeScraper:
                     "total_history_before": total_history_before,
                     "total_history_after": total_history_after
                 },
+                AGGREGATES_KEY: aggregates.to_dict(),
                 "horses": existing_horses
             }
             
@@ -496,6 +533,60 @@ class AccumulativeScraper:
             print(f"❌ 履歴カウントリセットに失敗: {e}")
             return False
     
+    def verify_aggregates(self, fix=False) -> bool:
+        """保存されている集計値を全馬から集計し直した結果と比較する
+        
+        Args:
+            fix (bool): ずれていた場合に集計し直した値で書き換えるか
+            
+        Returns:
+            bool: ずれがなかった（または書き換えた）場合は True
+        """
+        if not os.path.exists(self.history_file):
+            print("❌ 履歴ファイルが存在しません")
+            return False
+        
+        existing_data = self.load_existing_data()
+        existing_horses = existing_data.get('horses', [])
+        recomputed = HistoryAggregates.from_horses(existing_horses)
+        
+        stored = existing_data.get(AGGREGATES_KEY)
+        if stored is None:
+            differences = [f"{AGGREGATES_KEY} が保存されていません"]
+        else:
+            differences = HistoryAggregates(stored).diff(recomputed)
+        metadata = existing_data.get('metadata', {})
+        for key, value in recomputed.metadata().items():
+            if metadata.get(key) != value:
+                differences.append(f"metadata.{key}: {metadata.get(key)} != {value}")
+        
+        if not differences:
+            print(f"✅ 集計値は一致しています（馬 {recomputed.horses}頭 / 履歴 {recomputed.history_entries}件）")
+            return True
+        
+        print(f"⚠️  集計値のずれ: {len(differences)}件（保存値 != 再集計値）")
+        for difference in differences:
+            print(f"  - {difference}")
+        if not fix:
+            return False
+        
+        # metadata の直後に集計値を置く
+        fixed_data = {}
+        for key, value in existing_data.items():
+            if key in (AGGREGATES_KEY, 'horses'):
+                continue
+            fixed_data[key] = value
+        fixed_data.setdefault('metadata', {}).update(recomputed.metadata())
+        fixed_data[AGGREGATES_KEY] = recomputed.to_dict()
+        fixed_data['horses'] = existing_horses
+        
+        tmp_file = self.history_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(fixed_data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.history_file)
+        print(f"✅ 集計値を再集計した値で書き換えました: {self.history_file}")
+        return True
+    
     def _filter_history_by_mode(self, history: List[Dict], reset_mode: str, target_date: str = None) -> List[Dict]:
         """
         指定されたモードに応じて履歴をフィルタリング
@@ -615,67 +706,33 @@ class AccumulativeScraper:
         history_entry = self.create_history_entry(new_entry, new_entry['auction_date'])
         new_entry['history'].append(history_entry)
         
-        # デバッグ用に作成したエントリを表示
-        print(f"\n=== 新規馬エントリ作成 (ID: {horse_id}) ===")
-        print(f"馬名: {new_entry['name']}")
-        print(f"性別: {new_entry['sex']}, 年齢: {new_entry['age']}, 販売者: {new_entry['seller']}")
-        print(f"父: {new_entry['sire']}, 母: {new_entry['dam']}, 母父: {new_entry['damsire']}")
-        print(f"JBIS URL: {new_entry['jbis_url']}")
-        print(f"オークション日: {new_entry['auction_date']}")
-        print(f"馬体重: {new_entry.get('weight', 'N/A')}kg")
-        print(f"総賞金: {new_entry.get('total_prize_latest', 0)}万円")
-        print(f"コメント長: {len(new_entry.get('comment', ''))}文字")
-        print(f"病気タグ: {new_entry.get('disease_tags', [])}")
-        print("=" * 50)
-        print(f"JBIS URL: {new_entry['jbis_url']}")
-        print(f"Netkeiba URL: {new_entry['netkeiba_url']}")
-        print(f"オークション日: {new_entry['auction_date']}")
-        print(f"馬体重: {new_entry.get('weight')}kg, 賞金: {new_entry['total_prize_latest']}万円")
-        print(f"コメント長: {len(new_entry['comment'])}文字, 病気タグ: {new_entry['disease_tags']}")
+        # デバッグ用に作成したエントリを記録
+        if log.is_enabled_for(logging.DEBUG):
+            log.debug('entry.created', '新規馬エントリ作成 (ID: %s): %s', horse_id, new_entry['name'],
+                      horse={k: v for k, v in new_entry.items() if k != 'history'})
         
         return new_entry
     
-    def scrape_and_accumulate(self) -> bool:
-        """スクレイピング実行＋データ積み上げ
+    def iter_lots(self, links: Iterable[Dict]) -> Iterator[Dict]:
+        """取得・解析段: 詳細ページを掲載順に1頭ずつ返す（取得に失敗したロットは飛ばす）
         
-        Returns:
-            bool: スクレイピングとデータの保存が成功したかどうか
+        先行して取得するのは一定件数までなので、後段の処理が追いつくまで取得は進まない。
         """
-        print("=== 積み上げ型スクレイピング開始 ===")
-        
-        # 既存データを読み込み
-        existing_data = self.load_existing_data()
-        existing_horses = existing_data.get('horses', [])
-        
-        print(f"既存馬データ: {len(existing_horses)}頭")
-        
-        # 新しいデータをスクレイピング
-        print("新しいオークションデータを取得中...")
-        new_horses = self.scraper.scrape_all_horses()
-        
-        if not new_horses:
-            print("新しいデータが取得できませんでした")
-            return False
-        
-        print(f"新規取得: {len(new_horses)}頭")
-        
-        # オークション日を取得
-        auction_date = self.scraper.get_auction_date()
-        
-        # データ統合処理
-        added_count = 0
-        updated_count = 0
-        next_id = max([h.get('id', 0) for h in existing_horses], default=0) + 1
-        
-        # デバッグ用に新しい馬データを表示
-        print("\n=== 新規取得データのサマリー ===")
-        for i, horse in enumerate(new_horses, 1):
-            print(f"{i}. {horse.get('name')} - 性別: {horse.get('sex')}, 年齢: {horse.get('age')}, 販売者: {horse.get('seller')}")
-            print(f"   父: {horse.get('sire')}, 母: {horse.get('dam')}, 母父: {horse.get('damsire') or horse.get('dam_sire')}")
-        
-        print("\n=== データ統合処理を開始します ===")
-        
-        for new_horse in new_horses:
+        for link, detail_data in self.scraper.iter_horse_details(links, ordered=True):
+            if not detail_data or not detail_data.get('name'):
+                log.warning('lot.failed', '詳細データの取得に失敗: %s', link['url'], url=link['url'])
+                continue
+            detail_data['detail_url'] = link['url']
+            log.debug('scrape.summary', '%s - 性別: %s, 年齢: %s, 販売者: %s', detail_data.get('name'),
+                      detail_data.get('sex'), detail_data.get('age'), detail_data.get('seller'),
+                      sire=detail_data.get('sire'), dam=detail_data.get('dam'),
+                      damsire=detail_data.get('damsire') or detail_data.get('dam_sire'))
+            yield detail_data
+    
+    def match_lots(self, lots: Iterable[Dict],
+                   existing_horses: List[Dict]) -> Iterator[Tuple[Dict, Optional[int], Optional[Dict]]]:
+        """照合段: 必須フィールドの既定値を補い、同一馬を検索して (新データ, 位置, 既存馬) を返す"""
+        for new_horse in lots:
             # 必須フィールドのデフォルト値を設定
             default_values = {
                 'comment': '',
@@ -690,54 +747,128 @@ class AccumulativeScraper:
                 if key not in new_horse:
                     new_horse[key] = default
             
-            # 同一馬を検索
+            # 同一馬を検索（前のロットのマージが終わってから検索するので、同じ回の出品も照合される）
             match_idx, existing_horse = self.find_matching_horse(new_horse, existing_horses)
-            
+            yield new_horse, match_idx, existing_horse
+    
+    def merge_lots(self, matches: Iterable[Tuple[Dict, Optional[int], Optional[Dict]]],
+                   existing_horses: List[Dict], auction_date: str,
+                   aggregates: Optional[HistoryAggregates] = None) -> Iterator[Tuple[Dict, bool]]:
+        """マージ段: 既存馬に履歴を追加するか新しい馬を追加し、(マージ後のレコード, 新規追加か) を返す
+        
+        aggregates を渡した場合は、マージした馬の変更前後の差分だけを集計値に反映する。
+        """
+        next_id = max([h.get('id', 0) for h in existing_horses], default=0) + 1
+        for new_horse, match_idx, existing_horse in matches:
             if existing_horse is not None:
                 # 既存馬の履歴を更新
-                print(f"\n=== 既存馬の履歴を更新: {new_horse.get('name')} (ID: {existing_horse.get('id')}) ===")
+                log.info('horse.update', '既存馬の履歴を更新: %s (ID: %s)', new_horse.get('name'), existing_horse.get('id'))
+                before = HistoryAggregates.contribution(existing_horse)
                 updated_horse = self.merge_horse_data(existing_horse, new_horse, auction_date)
                 existing_horses[match_idx] = updated_horse
-                updated_count += 1
+                if aggregates is not None:
+                    aggregates.update(before, HistoryAggregates.contribution(updated_horse))
+                # 馬名・血統・履歴が変わった可能性があるため索引を更新
+                self.identity_index(existing_horses).update(match_idx)
+                yield updated_horse, False
             else:
                 # 新しい馬として追加
-                print(f"\n=== 新規馬を追加: {new_horse.get('name')} (ID: {next_id}) ===")
+                log.info('horse.add', '新規馬を追加: %s (ID: %s)', new_horse.get('name'), next_id)
                 new_entry = self.create_new_horse_entry(new_horse, auction_date, next_id)
                 existing_horses.append(new_entry)
+                if aggregates is not None:
+                    aggregates.add(new_entry)
                 next_id += 1
+                yield new_entry, True
+    
+    def scrape_and_accumulate(self) -> bool:
+        """スクレイピング実行＋データ積み上げ
+        
+        取得 → 解析 → 照合 → マージ → ジャーナル をジェネレーターでつなぎ、1頭ずつ処理する。
+        マージし終えた馬はその場でジャーナルに追記するため、途中で異常終了しても
+        次回の実行で復元され、ジャーナルにあるロットは取得し直さない。
+        
+        Returns:
+            bool: スクレイピングとデータの保存が成功したかどうか
+        """
+        print("=== 積み上げ型スクレイピング開始 ===")
+        
+        # 既存データを読み込み、前回書き出せなかったジャーナルを反映
+        existing_data = self.load_existing_data()
+        existing_horses = existing_data.get('horses', [])
+        journal = HistoryJournal(self.journal_file)
+        done_urls = journal.replay(existing_horses)
+        if journal.recovered:
+            # ジャーナルで置き換わった馬の変更前の寄与はわからないため、集計し直す
+            aggregates = HistoryAggregates.from_horses(existing_horses)
+        else:
+            aggregates = HistoryAggregates.load(existing_data)
+        
+        print(f"既存馬データ: {len(existing_horses)}頭")
+        
+        # 出品中の馬のリンクを取得
+        print("新しいオークションデータを取得中...")
+        links = self.scraper.find_horse_links()
+        
+        if not links and not journal.recovered:
+            print("新しいデータが取得できませんでした")
+            return False
+        
+        # オークション日を取得
+        auction_date = self.scraper.get_auction_date()
+        print(f"オークション日: {auction_date}")
+        
+        pending_links = [link for link in links or [] if link['url'] not in done_urls]
+        print(f"出品馬: {len(links or [])}頭（ジャーナルから復元済み {len(links or []) - len(pending_links)}頭）")
+        
+        # データ統合処理（1頭ずつマージし、ジャーナルに追記する）
+        added_count = 0
+        updated_count = 0
+        
+        print("\n=== データ統合処理を開始します ===")
+        
+        lots = self.iter_lots(pending_links)
+        matches = self.match_lots(lots, existing_horses)
+        for record, added in self.merge_lots(matches, existing_horses, auction_date, aggregates):
+            journal.append(record, record.get('detail_url'))
+            if added:
                 added_count += 1
+            else:
+                updated_count += 1
+        journal.close()
         
-        # メタデータ更新
-        total_horses = len(existing_horses)
-        all_prices = []
-        for horse in existing_horses:
-            for history in horse.get('history', []):
-                price = history.get('sold_price')
-                if price and not history.get('unsold', False):
-                    all_prices.append(price)
+        if not added_count and not updated_count and not journal.recovered:
+            print("新しいデータが取得できませんでした")
+            return False
         
-        avg_price = sum(all_prices) / len(all_prices) if all_prices else 0
+        print(f"新規取得: {added_count + updated_count}頭")
+        
+        # メタデータ更新（マージのたびに更新した集計値から求める）
+        total_horses = aggregates.horses
         
         updated_data = {
             "metadata": {
                 "last_updated": datetime.now().isoformat(),
-                "total_horses": total_horses,
-                "average_price": int(avg_price),
+                **aggregates.metadata(),
                 "auction_date": auction_date,
                 "added_horses": added_count,
                 "updated_horses": updated_count
             },
+            AGGREGATES_KEY: aggregates.to_dict(),
             "horses": existing_horses
         }
         
-        # ファイルに保存
+        # ファイルに保存（一時ファイルに書いてから置き換え、その後ジャーナルを削除）
         print(f"保存先ディレクトリ作成: {os.path.dirname(self.history_file)}")
         os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
         print(f"ファイル保存開始: {self.history_file}")
         print(f"保存データサイズ: 馬数={len(existing_horses)}, メタデータ={updated_data['metadata']}")
         
-        with open(self.history_file, 'w', encoding='utf-8') as f:
+        tmp_file = self.history_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
             json.dump(updated_data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.history_file)
+        journal.remove()
         
         print(f"ファイル保存完了: {self.history_file}")
         
@@ -751,6 +882,8 @@ class AccumulativeScraper:
         print(f"=== 積み上げ完了 ===")
         print(f"新規追加: {added_count}頭")
         print(f"履歴更新: {updated_count}頭")
+        if journal.recovered:
+            print(f"ジャーナルから復元: {journal.recovered}頭")
         print(f"総馬数: {total_horses}頭")
         print(f"保存先: {self.history_file}")
         
@@ -779,6 +912,10 @@ def main():
   # バックアップから復元
   python3 accumulative_scraper.py --restore backup_file.json
   
+  # 集計値を全馬から集計し直して比較（--fix でずれを修正）
+  python3 accumulative_scraper.py --verify-aggregates
+  python3 accumulative_scraper.py --verify-aggregates --fix
+  
   # 履歴リセット例:
   # 最新履歴のみ保持（デフォルト）
   python3 accumulative_scraper.py --reset-history
@@ -831,6 +968,18 @@ def main():
         help='バックアップファイルからデータを復元'
     )
     
+    parser.add_argument(
+        '--verify-aggregates',
+        action='store_true',
+        help='保存されている集計値を全馬から集計し直した結果と比較'
+    )
+    
+    parser.add_argument(
+        '--fix',
+        action='store_true',
+        help='--verify-aggregates でずれがあった場合に書き換える'
+    )
+    
     parser.add_argument(
         '--no-backup',
         action='store_true',
@@ -885,6 +1034,12 @@ def main():
             sys.exit(1)
         return
     
+    # 集計値の検証
+    if args.verify_aggregates:
+        if not scraper.verify_aggregates(fix=args.fix):
+            sys.exit(1)
+        return
+    
     # バックアップ復元処理
     if args.restore:
         print(f"💾 バックアップからの復元を実行中: {args.restore}")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+詳細ページ解析のマイクロベンチマーク
+リポジトリに含まれる debug_*.html を対象に、1ページあたりの解析コストを
+「ツリー構築」「コンテキスト構築（テキスト・リンク索引）」「抽出」に分けて計測する
+利用可能なHTMLパーサーごとに計測し、バックエンド別の比較表を出力する
+
+使用例:
+  python scripts/benchmark_detail_parse.py --repeat 20
+  python scripts/benchmark_detail_parse.py --parser lxml --parser selectolax
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from backend.scrapers.html_parser import available_backends, extract_page_index, make_soup
+from backend.scrapers.parse_context import DetailPageContext
+from scripts.improved_scraper import ImprovedRakutenScraper
+
+
+def find_fixture_pages():
+    """リポジトリ内の debug_*.html のうち、詳細ページとして解析できるものを返す"""
+    scraper = _make_scraper()
+    pages = []
+    skipped = 0
+    for path in sorted(PROJECT_ROOT.glob('**/debug_*.html')):
+        if 'archive' in path.parts or 'node_modules' in path.parts:
+            continue
+        content = path.read_bytes()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                scraper.parse_horse_detail(content)
+        except ValueError:
+            # 一覧ページの断片など、詳細ページでないものは対象外
+            skipped += 1
+            continue
+        pages.append((path.relative_to(PROJECT_ROOT), content))
+    return pages, skipped
+
+
+def _make_scraper():
+    scraper = ImprovedRakutenScraper()
+    # ベンチマーク中にJBISへアクセスしない
+    scraper._extract_jbis_prize_money = lambda jbis_url: 0.0
+    return scraper
+
+
+def _build_context(content, backend):
+    """ツリー構築とコンテキスト構築を分けて実行し、(コンテキスト, ツリー秒, コンテキスト秒) を返す"""
+    t0 = time.perf_counter()
+    if backend == 'selectolax':
+        # selectolaxはツリー構築と索引作成を1回の走査で行う
+        text, anchors, image_srcs = extract_page_index(content)
+        t1 = time.perf_counter()
+        ctx = DetailPageContext.from_index(text, anchors, image_srcs, content, backend)
+    else:
+        soup = make_soup(content, backend)
+        t1 = time.perf_counter()
+        ctx = DetailPageContext(soup)
+    t2 = time.perf_counter()
+    return ctx, t1 - t0, t2 - t1
+
+
+def benchmark(pages, repeat, backend):
+    """各フェーズの1ページあたりの平均時間（ミリ秒）を返す"""
+    scraper = _make_scraper()
+    totals = {'tree': 0.0, 'context': 0.0, 'extract': 0.0}
+    runs = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            for _, content in pages:
+                ctx, tree_seconds, context_seconds = _build_context(content, backend)
+                t0 = time.perf_counter()
+                scraper.extract_horse_detail(ctx)
+                totals['tree'] += tree_seconds
+                totals['context'] += context_seconds
+                totals['extract'] += time.perf_counter() - t0
+                runs += 1
+    return {phase: seconds / runs * 1000 for phase, seconds in totals.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='詳細ページ解析のマイクロベンチマーク')
+    parser.add_argument('--repeat', type=int, default=10, help='各ページの計測回数')
+    parser.add_argument('--parser', action='append', dest='parsers',
+                        help='計測するHTMLパーサー（複数指定可、省略時は利用可能なすべて）')
+    args = parser.parse_args()
+    backends = args.parsers or available_backends()
+
+    pages, skipped = find_fixture_pages()
+    if not pages:
+        print("❌ 詳細ページのフィクスチャが見つかりませんでした")
+        return 1
+
+    print(f"対象ページ: {len(pages)}件（詳細ページ以外 {skipped}件は除外）")
+    results = {backend: benchmark(pages, args.repeat, backend) for backend in backends}
+    baseline = sum(results[backends[0]].values())
+
+    print("\n=== HTMLパーサー別 1ページあたりの解析時間（ms） ===")
+    print(f"{'パーサー':<14}{'ツリー構築':>10}{'コンテキスト':>10}{'抽出':>10}{'合計':>10}{'比率':>8}")
+    for backend, result in results.items():
+        total = sum(result.values())
+        print(f"{backend:<14}{result['tree']:>10.2f}{result['context']:>10.2f}"
+              f"{result['extract']:>10.2f}{total:>10.2f}{total / baseline:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
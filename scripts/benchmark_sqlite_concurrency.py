@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+SQLiteの同時実行ベンチマーク（スクレイピング中のAPI参照）
+取り込みジョブ（bulk_upsert_horses で一定件数ずつ保存）を書き込みスレッドで動かしながら、
+APIと同じ検索（一覧・統計）を参照スレッドで繰り返し、参照の件数とレイテンシを計測する
+SQLite の既定の設定（ロールバックジャーナル）と sqlite_profile のチューニング設定を比較する
+
+使用例:
+  python scripts/benchmark_sqlite_concurrency.py
+  python scripts/benchmark_sqlite_concurrency.py --seconds 10 --readers 8
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend.database.models import AuctionEntry, Base, Horse
+from backend.database.sqlite_profile import SqliteProfile, create_engines
+from backend.services.horse_ingest import bulk_upsert_horses
+
+PROFILES = {
+    # SQLite の既定値（PRAGMA を設定しない）
+    'default': SqliteProfile(enabled=False),
+    'tuned': SqliteProfile(),
+}
+
+
+def _lot(rng, i):
+    return {
+        'name': f"ベンチマーク{rng.randint(0, i)}",
+        'sex': rng.choice(['牡', '牝', 'セ']),
+        'age': rng.randint(2, 5),
+        'sire': rng.choice(['キタサンブラック', 'ドゥラメンテ']),
+        'seller': rng.choice(['社台', 'ノーザン', '']),
+        'auction_date': f"2025-{rng.randint(1, 12):02d}-01",
+        'sold_price': rng.choice([0, 1000000, 2500000]),
+        'comment': 'コメント' * rng.randint(0, 50),
+        'unsold': rng.random() < 0.3,
+    }
+
+
+def _read_once(db):
+    """APIの一覧・統計と同じ程度の検索"""
+    db.query(Horse).order_by(Horse.created_at.desc()).limit(100).all()
+    db.query(func.count(Horse.id)).scalar()
+    db.query(func.avg(AuctionEntry.sold_price)).filter(AuctionEntry.sold_price > 0).scalar()
+
+
+def run(profile_name, seconds, readers, batch_size, seed_horses):
+    profile = PROFILES[profile_name]
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        write_engine, read_engine = create_engines(url, profile, read_pool_size=readers)
+        Base.metadata.create_all(write_engine)
+        WriteSession = sessionmaker(bind=write_engine)
+        ReadSession = sessionmaker(bind=read_engine)
+
+        rng = random.Random(0)
+        with WriteSession() as db:
+            bulk_upsert_horses(db, [_lot(rng, seed_horses) for _ in range(seed_horses)])
+
+        stop = threading.Event()
+        latencies, errors, batches = [], [], [0]
+        lock = threading.Lock()
+
+        def writer():
+            i = seed_horses
+            while not stop.is_set():
+                with WriteSession() as db:
+                    bulk_upsert_horses(db, [_lot(rng, i) for _ in range(batch_size)])
+                i += batch_size
+                batches[0] += 1
+
+        def reader():
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with ReadSession() as db:
+                        _read_once(db)
+                except OperationalError as e:
+                    with lock:
+                        errors.append(str(e.orig))
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        write_engine.dispose()
+        read_engine.dispose()
+
+    latencies.sort()
+    return {
+        'profile': profile_name,
+        'reads': len(latencies),
+        'reads_per_sec': len(latencies) / seconds,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0,
+        'max_ms': latencies[-1] * 1000 if latencies else 0,
+        'errors': len(errors),
+        'write_batches': batches[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='スクレイピング中のAPI参照のベンチマーク')
+    parser.add_argument('--seconds', type=float, default=5, help='プロファイルごとの計測時間（秒）')
+    parser.add_argument('--readers', type=int, default=2, help='参照スレッド数')
+    parser.add_argument('--batch-size', type=int, default=2000, help='1回の保存の頭数')
+    parser.add_argument('--seed-horses', type=int, default=2000, help='計測前に保存しておく頭数')
+    parser.add_argument('--profile', action='append', choices=sorted(PROFILES),
+                        help='計測するプロファイル（複数指定可、既定: すべて）')
+    args = parser.parse_args()
+
+    print("profile\treads/s\tp50\tp95\tmax\terrors\twrite batches")
+    for name in args.profile or list(PROFILES):
+        r = run(name, args.seconds, args.readers, args.batch_size, args.seed_horses)
+        print(f"{r['profile']}\t{r['reads_per_sec']:.1f}\t{r['p50_ms']:.1f}ms\t{r['p95_ms']:.1f}ms\t"
+              f"{r['max_ms']:.1f}ms\t{r['errors']}\t{r['write_batches']}")
+
+
+if __name__ == '__main__':
+    main()
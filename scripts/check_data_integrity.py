@@ -2,16 +2,21 @@
 # -*- coding: utf-8 -*-
 
 import json
+import sys
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+from backend.scrapers.history_stream import HistoryReader
+
 # データファイルのパス
 DATA_PATH = Path(__file__).parent.parent / 'static-frontend' / 'public' / 'data' / 'horses_history.json'
 
 class DataIntegrityChecker:
     def __init__(self):
-        self.data = self._load_data()
+        self._check_data_file()
         self.required_fields = {
             'basic': ['id', 'name', 'sex', 'age', 'sire', 'dam', 'damsire', 'weight', 'seller', 'auction_date', 'sold_price', 'detail_url', 'image_url', 'comment', 'disease_tags'],
             'history': ['auction_date', 'sold_price', 'total_prize_start', 'total_prize_latest']
@@ -21,13 +26,10 @@ class DataIntegrityChecker:
             'issues': []
         }
 
-    def _load_data(self) -> Dict:
-        """データを読み込む"""
+    def _check_data_file(self) -> None:
+        """データファイルの存在を確認する（馬は run_checks で1頭ずつ読み込む）"""
         if not DATA_PATH.exists():
             raise FileNotFoundError(f"データファイルが見つかりません: {DATA_PATH}")
-        
-        with open(DATA_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
 
     def _is_valid_value(self, value: Any, field_name: str) -> bool:
         """値が有効かチェックする"""
@@ -103,23 +105,24 @@ class DataIntegrityChecker:
 
     def run_checks(self) -> Dict:
         """全てのチェックを実行する"""
-        if 'horses' not in self.data:
-            raise ValueError("データに'horses'キーが存在しません")
-        
-        self.results['summary']['total_horses'] = len(self.data['horses'])
-        
-        self.results['summary']['horses_with_issues'] = 0
-        
-        for horse in self.data['horses']:
-            issues = self.check_horse_data(horse)
-            if issues:
-                self.results['summary']['horses_with_issues'] += 1
-                self.results['issues'].append({
-                    'id': horse.get('id', '不明'),
-                    'name': horse.get('name', '不明'),
-                    'issues': issues
-                })
-                self.results['summary']['total_issues'] += len(issues)
+        with HistoryReader(str(DATA_PATH)) as reader:
+            if reader.is_list or not reader.has_horses:
+                raise ValueError("データに'horses'キーが存在しません")
+            
+            self.results['summary']['horses_with_issues'] = 0
+            
+            for horse in reader:
+                issues = self.check_horse_data(horse)
+                if issues:
+                    self.results['summary']['horses_with_issues'] += 1
+                    self.results['issues'].append({
+                        'id': horse.get('id', '不明'),
+                        'name': horse.get('name', '不明'),
+                        'issues': issues
+                    })
+                    self.results['summary']['total_issues'] += len(issues)
+            
+            self.results['summary']['total_horses'] = reader.count
         
         return self.results
 
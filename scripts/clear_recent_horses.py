@@ -23,6 +23,11 @@ HISTORY_FILE = DATA_DIR / "horses_history.json"
 BACKUP_DIR = DATA_DIR / "backups"
 BACKUP_DIR.mkdir(exist_ok=True, parents=True)
 
+# プロジェクトルートをパスに追加
+sys.path.append(str(BASE_DIR))
+
+from backend.scrapers.history_aggregates import AGGREGATES_KEY, HistoryAggregates
+
 def create_backup() -> str:
     """タイムスタンプ付きのバックアップを作成"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -63,10 +68,17 @@ def clear_recent_horses(data: dict) -> tuple[dict, int]:
         for h in data['horses'] if h['id'] in target_ids
     ]
     
+    # 集計値から削除する馬の寄与分を差し引く（集計値がない古いファイルは全馬から集計する）
+    aggregates = HistoryAggregates.load(data)
+    for horse in data['horses']:
+        if horse['id'] in target_ids:
+            aggregates.remove(horse)
+    
     # 削除対象のIDに一致する全てのエントリを削除
     original_count = len(data['horses'])
     data['horses'] = [h for h in data['horses'] if h['id'] not in target_ids]
     removed_count = original_count - len(data['horses'])
+    data[AGGREGATES_KEY] = aggregates.to_dict()
     
     # 削除された馬の情報を表示
     print("\n削除された馬:")
@@ -75,7 +87,7 @@ def clear_recent_horses(data: dict) -> tuple[dict, int]:
     
     # メタデータ更新
     if 'metadata' in data:
-        data['metadata']['total_horses'] = len(data['horses'])
+        data['metadata'].update(aggregates.metadata())
         data['metadata']['last_updated'] = datetime.now().isoformat()
     
     return data, removed_count
@@ -6,8 +6,13 @@
 
 import json
 import os
+import sys
 from typing import Dict, List, Optional
 
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from backend.scrapers.history_stream import HistoryReader, HistoryWriter
+
 def get_latest_weight(history: List[Dict]) -> Optional[int]:
     """履歴から最新の体重を取得"""
     if not history:
@@ -34,45 +39,46 @@ def fix_weight_data():
     print(f"=== 馬体重データ修正開始 ===")
     print(f"対象ファイル: {history_file}")
     
-    # 既存データを読み込み
+    # 既存データを1頭ずつ読み込み、修正しながら書き出す
+    fixed_count = 0
+    already_fixed_count = 0
+    no_weight_count = 0
+    writer = None
+    
     try:
-        with open(history_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with HistoryReader(history_file) as reader:
+            writer = HistoryWriter(history_file, reader.header, as_list=reader.is_list)
+            for horse in reader:
+                horse_name = horse.get('name', 'Unknown')
+                current_weight = horse.get('weight')
+                history = horse.get('history', [])
+                
+                # 履歴から最新体重を取得
+                latest_weight = get_latest_weight(history)
+                
+                if latest_weight is not None:
+                    if current_weight != latest_weight:
+                        horse['weight'] = latest_weight
+                        fixed_count += 1
+                        print(f"修正: {horse_name} -> {latest_weight}kg")
+                    else:
+                        already_fixed_count += 1
+                else:
+                    no_weight_count += 1
+                    # 体重データがない場合はNoneを明示的に設定
+                    horse['weight'] = None
+                writer.write(horse)
+            writer.trailer = reader.trailer
     except FileNotFoundError:
         print(f"エラー: ファイルが見つかりません: {history_file}")
         return False
     except json.JSONDecodeError as e:
+        if writer:
+            writer.discard()
         print(f"エラー: JSONの読み込みに失敗しました: {e}")
         return False
     
-    horses = data.get('horses', [])
-    print(f"総馬数: {len(horses)}頭")
-    
-    # 各馬の体重データを修正
-    fixed_count = 0
-    already_fixed_count = 0
-    no_weight_count = 0
-    
-    for horse in horses:
-        horse_name = horse.get('name', 'Unknown')
-        current_weight = horse.get('weight')
-        history = horse.get('history', [])
-        
-        # 履歴から最新体重を取得
-        latest_weight = get_latest_weight(history)
-        
-        if latest_weight is not None:
-            if current_weight != latest_weight:
-                horse['weight'] = latest_weight
-                fixed_count += 1
-                print(f"修正: {horse_name} -> {latest_weight}kg")
-            else:
-                already_fixed_count += 1
-        else:
-            no_weight_count += 1
-            # 体重データがない場合はNoneを明示的に設定
-            horse['weight'] = None
-    
+    print(f"総馬数: {reader.count}頭")
     print(f"\n=== 修正結果 ===")
     print(f"修正した馬: {fixed_count}頭")
     print(f"既に正しい馬: {already_fixed_count}頭")
@@ -81,14 +87,14 @@ def fix_weight_data():
     # 修正したデータを保存
     if fixed_count > 0 or no_weight_count > 0:
         try:
-            with open(history_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            writer.close()
             print(f"\n✅ データファイルを更新しました: {history_file}")
             return True
         except Exception as e:
             print(f"❌ ファイルの保存に失敗しました: {e}")
             return False
     else:
+        writer.discard()
         print("\n✅ 修正の必要がありませんでした")
         return True
 
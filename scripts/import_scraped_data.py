@@ -10,6 +10,7 @@ if project_root not in sys.path:
 
 from backend.database.models import SessionLocal, Horse
 from backend.scrapers.rakuten_scraper import RakutenAuctionScraper
+from backend.services.horse_ingest import IN_CHUNK_SIZE
 from backend.services.horse_service import HorseService
 
 def map_horse_data(scraped_data):
@@ -58,8 +59,13 @@ def main():
         # データベースに保存
         print("=== データベースに保存中... ===")
         
-        # 既存の馬データを取得（名前で重複チェック）
-        existing_horses = {horse.name: horse for horse in db.query(Horse).all()}
+        # 既存の馬データを取得（名前で重複チェック、取得した馬名だけを馬名インデックスで検索）
+        names = list({data.get('name') for data in horses_data if data.get('name')})
+        existing_horses = {}
+        for start in range(0, len(names), IN_CHUNK_SIZE):
+            chunk = names[start:start + IN_CHUNK_SIZE]
+            for horse in db.query(Horse).filter(Horse.name.in_(chunk)).order_by(Horse.id):
+                existing_horses[horse.name] = horse
         
         new_horses = 0
         updated_horses = 0
@@ -8,16 +8,12 @@ seleniumを使わずにrequestsとBeautifulSoupで実装
 import os
 import sys
 import requests
-from bs4 import BeautifulSoup
 import re
 import json
-import time
 import uuid
 import logging
-from typing import List, Dict, Optional, Any, Tuple
+from typing import List, Dict, Iterable, Optional, Any, Tuple
 from datetime import datetime
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from tqdm import tqdm
 
 # ロギング設定
@@ -40,53 +36,117 @@ from backend.scrapers.data_helpers import (
     save_auction_history,
     load_json_file
 )
+from backend.scrapers.horse_store import HorseDataStore
+from backend.scrapers.extractors import rakuten_detail
+from backend.scrapers.extractors.rakuten_detail import (
+    DAM_SIRE_NOTE_PATTERN,
+    DETAIL_PATTERNS,
+    INVOICE_NOTE_PATTERN,
+    NAME_CONTROL_CHARS_PATTERN,
+    NAME_LABEL_PATTERN,
+    NAME_PARENTHESES_PATTERN,
+    NAME_SYMBOLS_PATTERN,
+    WHITESPACE_PATTERN
+)
+from backend.scrapers.fetcher import ConcurrentFetcher
+from backend.scrapers.http_cache import HttpCache
+from backend.scrapers.http_client import DEFAULT_POOL_SIZE, create_session
+from backend.scrapers.html_parser import get_backend, make_soup
+from backend.scrapers.page_fingerprint import UNCHANGED, PageFingerprintStore, page_hash, source_version
+from backend.scrapers.parse_context import DetailPageContext
+from backend.scrapers.parse_pool import ParsePool
+from backend.scrapers.run_checkpoint import RunCheckpoint
+from backend.scrapers.structured_log import get_logger
+
+# 馬ごとの詳細ログ（SCRAPER_LOG_LEVEL=DEBUG で出力、SCRAPER_TRACE_FILE でJSON Linesに記録）
+log = get_logger('scraper.rakuten')
+
+# 詳細ページから抽出する項目（ページハッシュの保存先にこれらが揃っていれば抽出結果を使い回す）
+DETAIL_FIELDS = ('name', 'sex', 'age', 'sold_price', 'sire', 'dam', 'damsire', 'weight', 'race_record',
+                 'total_prize_start', 'total_prize_latest', 'comment', 'disease_tags', 'primary_image',
+                 'seller', 'jbis_url')
+# 抽出処理のバージョン（このファイルか抽出パターンが変わったら前回の抽出結果を使わない）
+EXTRACTOR_VERSION = source_version(__file__, rakuten_detail.__file__)
 
 class ImprovedRakutenScraper:
-    def __init__(self, timeout=30, max_retries=3, backoff_factor=1):
+    def __init__(self, timeout=30, max_retries=3, backoff_factor=1, fetcher: Optional[ConcurrentFetcher] = None,
+                 html_parser: Optional[str] = None, http_cache: Optional[HttpCache] = None,
+                 fingerprints: Optional[PageFingerprintStore] = None, parse_workers: Optional[int] = None):
         self.base_url = "https://auction.keiba.rakuten.co.jp/"
         self.timeout = timeout
         
-        # セッションの初期化
-        self.session = requests.Session()
-        
-        # リトライ設定
-        retry_strategy = Retry(
-            total=max_retries,
-            backoff_factor=backoff_factor,
-            status_forcelist=[500, 502, 503, 504],
-            allowed_methods=["GET", "POST"]
-        )
-        
-        # アダプタの設定
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount("http://", adapter)
-        self.session.mount("https://", adapter)
-        
-        # ヘッダー設定
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
+        # HTMLパーサー（省略時は環境変数 SCRAPER_HTML_PARSER、未設定ならlxml）
+        self.html_parser = get_backend(html_parser)
+        
+        # 並列フェッチエンジン（同時実行数・ホストごとの礼儀予算は環境変数で調整可能）
+        self.fetcher = fetcher or ConcurrentFetcher.from_env()
+        
+        # ディスク上のHTTPキャッシュ（省略時は環境変数 SCRAPER_HTTP_CACHE* から作成、無効ならNone）
+        self.http_cache = http_cache if http_cache is not None else HttpCache.from_env()
+        
+        # ページハッシュによる変更検出（指定した場合のみ。内容が前回と同じページは解析しない）
+        self.fingerprints = fingerprints
+        
+        # 解析段のプロセスプール（省略時は環境変数 SCRAPER_PARSE_WORKERS、1以下ならこのプロセスで解析）
+        self.parse_pool = ParsePool(_parse_detail_in_worker, parse_workers,
+                                    initializer=_init_parse_worker, initargs=(self.html_parser,))
+        
+        # セッションの初期化（共通HTTPクライアント: リトライ・keep-alive・圧縮・HTTPキャッシュ）
+        # 並列取得時にコネクションが不足しないようプールサイズを確保
+        self.session = create_session(timeout=timeout, max_retries=max_retries, backoff_factor=backoff_factor,
+                                      pool_size=max(DEFAULT_POOL_SIZE, self.fetcher.max_workers),
+                                      http_cache=self.http_cache)
         
     def _make_request(self, url: str, method: str = 'GET', **kwargs) -> Optional[requests.Response]:
         """HTTPリクエストを送信する共通メソッド"""
         try:
-            response = self.session.request(
-                method=method,
-                url=url,
-                timeout=self.timeout,
-                **kwargs
-            )
+            response = self._cached_response(url) if method == 'GET' else None
+            if response is None:
+                # ホストごとの同時実行数・リクエスト間隔を守る
+                with self.fetcher.budget.slot(url):
+                    response = self.session.request(
+                        method=method,
+                        url=url,
+                        timeout=self.timeout,
+                        **kwargs
+                    )
             response.raise_for_status()
             return response
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed for {url}: {str(e)}")
             return None
 
+    def _cached_response(self, url: str) -> Optional[requests.Response]:
+        """有効期限内のHTTPキャッシュがあれば返す（サーバーにアクセスしないので礼儀予算を使わない）"""
+        if self.http_cache is None:
+            return None
+        return self.http_cache.cached_response(url)
+
+    def log_cache_stats(self):
+        """HTTPキャッシュのヒット数・再検証数・ミス数をログに出力"""
+        if self.http_cache is None:
+            return
+        stats = self.http_cache.stats()
+        logger.info(f"HTTPキャッシュ: ヒット {stats['hits']}件 / 再検証(304) {stats['revalidated']}件 / "
+                    f"ミス {stats['misses']}件 / 削除 {stats['evictions']}件 / {stats['bytes'] / 1024 / 1024:.1f}MB")
+
+    def close(self):
+        """解析プロセスとHTTPセッションを終了する"""
+        self.parse_pool.close()
+        self.session.close()
+
+    def log_fingerprint_stats(self):
+        """ページハッシュによる新規・変更あり・変更なしの件数をログに出力"""
+        if self.fingerprints is None:
+            return
+        stats = self.fingerprints.stats()
+        logger.info(f"詳細ページ: 新規 {stats['new']}件 / 変更あり {stats['changed']}件 / "
+                    f"変更なし {stats['unchanged']}件（解析を省略）")
+
+    def page_unchanged(self, detail_url: str) -> bool:
+        """直前に取得した詳細ページが前回と同じ内容で、抽出結果を使い回したか"""
+        return self.fingerprints is not None and self.fingerprints.status(detail_url) == UNCHANGED
+
     def get_auction_date(self) -> str:
         """ページから開催日を取得"""
         response = self._make_request(self.base_url)
@@ -95,7 +155,7 @@ class ImprovedRakutenScraper:
             return datetime.now().strftime("%Y-%m-%d")
         
         try:
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content, self.html_parser)
             
             # 開催日を探す（例: "2023年11月15日(水)"）
             date_pattern = r'\d{4}年\d{1,2}月\d{1,2}日\([月火水木金土日]\)'
@@ -113,17 +173,65 @@ class ImprovedRakutenScraper:
         # 日付が見つからないかエラーが発生した場合は現在の日付を使用
         return datetime.now().strftime('%Y-%m-%d')
 
-    def scrape_horse_list(self) -> List[Dict]:
-        """トップページから馬のリストを取得"""
+    def scrape_horse_list(self, checkpoint: Optional[RunCheckpoint] = None) -> List[Dict]:
+        """トップページから馬のリストを取得
+        
+        Args:
+            checkpoint: 途中再開用のチェックポイント（再開時は保存済みのURLキューを使い、未完了の馬だけを取得する）
+        """
         logger.info("馬リストの取得を開始します...")
         horses = []
         
+        if checkpoint and checkpoint.queue is not None:
+            horse_links = checkpoint.queue
+            logger.info(f"チェックポイントの馬リストを使用します（完了済み {len(checkpoint.completed)}/{len(horse_links)}頭）")
+        else:
+            horse_links = self.find_horse_links()
+            if horse_links is None:
+                return horses
+            if checkpoint and horse_links:
+                checkpoint.start(horse_links, meta=checkpoint.meta)
+        
+        if not horse_links:
+            logger.warning("馬のリンクが見つかりませんでした")
+            return horses
+            
+        # 詳細ページを並列に取得し、完了した順に処理する（チェックポイントの完了分は取得しない）
+        order = {link['url']: i for i, link in enumerate(horse_links)}
+        pending = checkpoint.pending() if checkpoint else horse_links
+        if checkpoint:
+            horses.extend(horse for horse in checkpoint.completed.values() if horse)
+        with tqdm(total=len(horse_links), initial=len(horse_links) - len(pending),
+                  desc="馬の詳細を取得中", unit="頭") as progress:
+            for link, detail_data in self.iter_horse_details(pending):
+                progress.update(1)
+                if detail_data and detail_data.get('name'):
+                    # link['text']での上書きをやめ、scrape_horse_detailで取得した名前を使用
+                    detail_data['detail_url'] = link['url']
+                    horses.append(detail_data)
+                    if checkpoint:
+                        checkpoint.record(link['url'], detail_data)
+                    logger.debug(f"取得成功: {detail_data['name']}")
+                else:
+                    logger.warning(f"詳細データの取得に失敗: {link['url']}")
+        
+        # 完了順ではなくページ上の掲載順に並べ直す
+        horses.sort(key=lambda horse: order.get(horse['detail_url'], len(order)))
+        
+        logger.info(f"合計{len(horses)}頭の馬の情報を取得しました")
+        self.log_pattern_stats()
+        self.log_cache_stats()
+        self.log_fingerprint_stats()
+        return horses
+    
+    def find_horse_links(self) -> Optional[List[Dict]]:
+        """トップページから馬の詳細ページへのリンクを集める（取得に失敗した場合は None）"""
         response = self._make_request(self.base_url)
         if not response:
             logger.error("トップページの取得に失敗しました")
-            return horses
+            return None
             
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = make_soup(response.content, self.html_parser)
         
         # 馬のリンクを探す
         horse_links = []
@@ -146,93 +254,131 @@ class ImprovedRakutenScraper:
                     })
         
         logger.info(f"馬のリンクを{len(horse_links)}個発見")
+        return horse_links
+    
+    def log_pattern_stats(self):
+        """抽出パターンごとのヒット数・ミス数をログに出力（どのフォールバックが使われたかの確認用）"""
+        for name, counts in DETAIL_PATTERNS.stats().items():
+            if counts['hits'] or counts['misses']:
+                logger.info(f"抽出パターン {name}: ヒット {counts['hits']}件 / ミス {counts['misses']}件")
+    
+    def iter_horse_details(self, links: Iterable[Dict], ordered: bool = False):
+        """詳細ページを並列に取得し、完了した順に (link, detail_data) を返す
         
-        if not horse_links:
-            logger.warning("馬のリンクが見つかりませんでした")
-            return horses
-            
-        # 進行状況表示用にtqdmを使用
-        for link in tqdm(horse_links, desc="馬の詳細を取得中", unit="頭"):
-            logger.debug(f"処理中: {link['text']} - {link['url']}")
+        取得はスレッド、解析は parse_pool のプロセスで行う。解析結果を待つ間は
+        GILも礼儀予算の枠も使わないため、他のスレッドは取得を続けられる。
+        
+        Args:
+            links: 'url' キーを持つリンク情報のリスト
+            ordered: True の場合は links の順に返す（先行して取得するのは一定件数まで）
             
-            try:
-                detail_data = self.scrape_horse_detail(link['url'])
-                if detail_data and detail_data.get('name'):
-                    # link['text']での上書きをやめ、scrape_horse_detailで取得した名前を使用
-                    detail_data['detail_url'] = link['url']
-                    horses.append(detail_data)
-                    logger.debug(f"取得成功: {detail_data['name']}")
-                else:
-                    logger.warning(f"詳細データの取得に失敗: {link['url']}")
-                
-                # サーバーに優しくするために少し待機
-                time.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"馬の詳細取得中にエラーが発生しました ({link['text']}): {str(e)}")
-                continue
-                
-        logger.info(f"合計{len(horses)}頭の馬の情報を取得しました")
-        return horses
+        Yields:
+            Tuple[Dict, Optional[Dict]]: リンク情報と取得結果（失敗時はNone）
+        """
+        imap = self.fetcher.imap if ordered else self.fetcher.imap_unordered
+        for link, detail_data, error in imap(lambda link: self.scrape_horse_detail(link['url']), links):
+            if error:
+                logger.error(f"馬の詳細取得中にエラーが発生しました ({link.get('text', link['url'])}): {str(error)}")
+                detail_data = None
+            yield link, detail_data
     
     def scrape_horse_detail(self, detail_url: str) -> Optional[Dict]:
         """個別ページから詳細情報を取得"""
         try:
-            response = self.session.get(detail_url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            page_text = soup.get_text()
-            
-            detail_data = {}
-            
-            # 馬名、性別、年齢
-            detail_data.update(self._extract_name_sex_age(page_text))
-            
-            # 落札価格（税込価格を取得）
-            detail_data['sold_price'] = self._extract_sold_price(page_text)
-            
-            # 血統情報を抽出
-            print("\n[デバッグ] 血統情報抽出を開始します...")
-            pedigree_data = self._extract_pedigree(page_text)
-            print(f"[デバッグ] 抽出された血統情報: {pedigree_data}")
-            detail_data.update(pedigree_data)
-            print(f"[デバッグ] 更新後のdetail_data: sire='{detail_data.get('sire')}', dam='{detail_data.get('dam')}', damsire='{detail_data.get('damsire')}'")
-            
-            # 馬体重
-            detail_data['weight'] = self._extract_weight(page_text)
-            
-            # 成績
-            detail_data['race_record'] = self._extract_race_record(page_text)
+            content = self.fetch_horse_detail(detail_url)
             
-            # JBIS URLを取得
-            jbis_url = self._extract_jbis_url(soup)
-            
-            # 獲得賞金（JBIS URLを渡して最新情報を取得）
-            detail_data.update(self._extract_prize_money(page_text, jbis_url))
-            
-            # コメント
-            detail_data['comment'] = self._extract_comment(page_text)
-            
-            # 疾病タグ
-            detail_data['disease_tags'] = self._extract_disease_tags(detail_data.get('comment', ''))
-            
-            # 馬体画像
-            detail_data['primary_image'] = self._extract_primary_image(soup)
-            
-            # 販売申込者
-            detail_data['seller'] = self._extract_seller(page_text)
-            
-            # JBIS URLを抽出
-            detail_data['jbis_url'] = self._extract_jbis_url(soup)
+            if self.fingerprints is None:
+                return self.parse_detail_page(content)
             
+            # 前回と同じ内容のページは解析せず、前回の抽出結果を使う
+            digest = page_hash(content)
+            status, detail_data = self.fingerprints.lookup(detail_url, digest, DETAIL_FIELDS)
+            if detail_data is None:
+                detail_data = self.parse_detail_page(content)
+                self.fingerprints.remember(detail_url, digest, detail_data)
+            log.debug('detail.fingerprint', 'ページの状態: %s', status, url=detail_url, status=status)
             return detail_data
             
         except Exception as e:
-            print(f"詳細情報の取得に失敗: {e}")
+            log.warning('detail.failed', '詳細情報の取得に失敗: %s', e, url=detail_url)
             return None
     
-    def _extract_name_sex_age(self, page_text: str) -> Dict:
+    def fetch_horse_detail(self, detail_url: str) -> bytes:
+        """取得段: 詳細ページのHTMLを取得する（HTTPエラーは例外を送出）"""
+        response = self._cached_response(detail_url)
+        if response is None:
+            with self.fetcher.budget.slot(detail_url):
+                response = self.session.get(detail_url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.content
+    
+    def parse_detail_page(self, content: bytes) -> Dict:
+        """解析段: 詳細ページのHTMLから詳細情報を抽出する
+        
+        parse_pool がプロセスを使う場合、HTMLの解析は別プロセスで行い、
+        ネットワークアクセスが必要な最新賞金（JBIS）の取得だけをこのスレッドで行う。
+        """
+        if self.parse_pool.in_process:
+            return self.parse_horse_detail(content)
+        detail_data, pattern_stats = self.parse_pool.submit(content).result()
+        DETAIL_PATTERNS.merge_stats(pattern_stats)
+        if detail_data.get('jbis_url'):
+            latest_prize = self._extract_jbis_prize_money(detail_data['jbis_url'])
+            detail_data['total_prize_latest'] = latest_prize if latest_prize > 0 else detail_data['total_prize_start']
+        return detail_data
+    
+    def parse_horse_detail(self, content, fetch_latest_prize: bool = True) -> Dict:
+        """詳細ページのHTMLから詳細情報を抽出
+        
+        ツリーとページテキストは DetailPageContext で1度だけ構築し、
+        各抽出処理はそのコンテキストを参照する。
+        fetch_latest_prize が False の場合はJBISにアクセスせず、最新賞金はオークション時点の賞金とする。
+        """
+        return self.extract_horse_detail(DetailPageContext.from_html(content, self.html_parser), fetch_latest_prize)
+    
+    def extract_horse_detail(self, ctx: DetailPageContext, fetch_latest_prize: bool = True) -> Dict:
+        """構築済みの解析コンテキストから詳細情報を抽出"""
+        detail_data = {}
+        
+        # 馬名、性別、年齢
+        detail_data.update(self._extract_name_sex_age(ctx))
+        
+        # 落札価格（税込価格を取得）
+        detail_data['sold_price'] = self._extract_sold_price(ctx)
+        
+        # 血統情報を抽出
+        detail_data.update(self._extract_pedigree(ctx))
+        
+        # 馬体重
+        detail_data['weight'] = self._extract_weight(ctx)
+        
+        # 成績
+        detail_data['race_record'] = self._extract_race_record(ctx)
+        
+        # JBIS URLを取得（1ページにつき1度だけ抽出）
+        jbis_url = self._extract_jbis_url(ctx)
+        
+        # 獲得賞金（JBIS URLを渡して最新情報を取得）
+        detail_data.update(self._extract_prize_money(ctx, jbis_url if fetch_latest_prize else None))
+        
+        # コメント
+        detail_data['comment'] = self._extract_comment(ctx)
+        
+        # 疾病タグ
+        detail_data['disease_tags'] = self._extract_disease_tags(detail_data.get('comment', ''))
+        
+        # 馬体画像
+        detail_data['primary_image'] = self._extract_primary_image(ctx)
+        
+        # 販売申込者
+        detail_data['seller'] = self._extract_seller(ctx)
+        
+        # JBIS URL
+        detail_data['jbis_url'] = jbis_url
+        
+        return detail_data
+    
+    def _extract_name_sex_age(self, ctx: DetailPageContext) -> Dict:
         """馬名、性別、年齢を解析
         
         フォーマット例:
@@ -243,20 +389,19 @@ class ImprovedRakutenScraper:
         
         # パターン: 馬名 + スペース + 性別 + 年齢 + "歳" + 任意の文字
         # 馬名にスペースや全角スペースが含まれる場合もマッチするように修正
-        pattern = r'([^\n\r\t]+?)\s+([牡牝セ])\s*(\d+)歳'
-        match = re.search(pattern, page_text)
+        match = ctx.match('name_sex_age')
         
         if match:
             # 馬名を正規化して保存
-            result['name'] = self._clean_horse_name(match.group(1).strip())
-            result['sex'] = match.group(2).strip()
+            result['name'] = self._clean_horse_name(match['name'].strip())
+            result['sex'] = match['sex'].strip()
             try:
-                result['age'] = int(match.group(3).strip())
+                result['age'] = int(match['age'].strip())
             except (ValueError, AttributeError) as e:
                 raise ValueError(f"年齢の抽出に失敗しました: {e}")
         else:
             # デバッグ用: マッチしなかった場合のログ
-            print(f"性別・年齢の抽出に失敗: {page_text[:100]}...")
+            log.debug('name_sex_age.missing', '性別・年齢の抽出に失敗: %.100s...', ctx.text)
             
             # 必須フィールドが取得できない場合はエラーを投げる
             if 'name' not in result:
@@ -268,18 +413,18 @@ class ImprovedRakutenScraper:
         
         return result
     
-    def _extract_sold_price(self, page_text: str) -> str:
+    def _extract_sold_price(self, ctx: DetailPageContext) -> str:
         """落札価格を抽出（税込価格）"""
         # 現在価格の税込価格を取得（例: "2,000,000円(税込 2,200,000円)"）
-        price_match = re.search(r'(\d{1,3}(?:,\d{3})*)円\(税込\s*(\d{1,3}(?:,\d{3})*)円\)', page_text)
+        price_match = ctx.match('sold_price')
         if price_match:
             # 税込価格を使用
-            return price_match.group(2).replace(',', '')
+            return price_match['price_with_tax'].replace(',', '')
         
         # フォールバック: 単純な税込価格パターン
-        price_match = re.search(r'税込\s*(\d{1,3}(?:,\d{3})*)円', page_text)
+        price_match = ctx.match('sold_price_with_tax')
         if price_match:
-            return price_match.group(1).replace(',', '')
+            return price_match['price_with_tax'].replace(',', '')
         
         return ''
     
@@ -299,22 +444,22 @@ class ImprovedRakutenScraper:
         original_name = name
         
         # 1. 不要な接頭辞を削除（父：、母：、母父：など）
-        name = re.sub(r'^\s*(父|母|母の?父|母父)[：:]?\s*', '', name, flags=re.IGNORECASE)
+        name = NAME_LABEL_PATTERN.sub('', name)
         
         # 2. 不要な文字や記号を削除（改行やタブはスペースに置換）
-        name = re.sub(r'[\n\r\t]', ' ', name)
+        name = NAME_CONTROL_CHARS_PATTERN.sub(' ', name)
         
         # 3. 括弧内の情報を削除（例：「（牡1999）」など）
-        name = re.sub(r'\s*[(（][^)）]*[)）]', '', name)
+        name = NAME_PARENTHESES_PATTERN.sub('', name)
         
         # 4. 特殊文字や不要な記号を削除（「...」は削除しない）
-        name = re.sub(r'[\*\#\@\!\?\|\/\\]', '', name)
+        name = NAME_SYMBOLS_PATTERN.sub('', name)
         
         # 5. 先頭と末尾の空白を削除
         name = name.strip()
         
         # 6. 複数スペースを1つに置換
-        name = re.sub(r'\s+', ' ', name)
+        name = WHITESPACE_PATTERN.sub(' ', name)
         
         # 7. 元の名前に「...」が含まれていて、処理後に消えている場合は元に戻す
         if '...' in original_name and '...' not in name:
@@ -322,11 +467,11 @@ class ImprovedRakutenScraper:
         
         # デバッグ用に変更前後の名前を出力
         if name != original_name.strip():
-            print(f"[デバッグ] 名前を正規化: '{original_name}' -> '{name}'")
+            log.debug('name.normalized', "名前を正規化: '%s' -> '%s'", original_name, name)
             
         return name
 
-    def _extract_pedigree(self, page_text: str) -> Dict:
+    def _extract_pedigree(self, ctx: DetailPageContext) -> Dict:
         """血統情報を抽出・正規化
         
         Returns:
@@ -340,44 +485,32 @@ class ImprovedRakutenScraper:
         }
         
         try:
-            # デバッグ用: ページテキストの関連部分を表示
-            print(f"\n[デバッグ] 血統情報抽出開始 ===================")
-            
-            # 血統情報が含まれていそうな部分を抽出（「父：」から始まり「母の父：」までの間のテキスト）
-            pedigree_section = re.search(r'父[：:].*?(?:母の?父|母父)[：:].*?[\n\r]', page_text, re.DOTALL)
-            if pedigree_section:
-                print(f"[デバッグ] 血統情報セクション: {pedigree_section.group(0)[:200]}...")
-            else:
-                print("[デバッグ] 血統情報セクションが見つかりませんでした")
+            # デバッグ用: 血統情報が含まれていそうな部分（「父：」から始まり「母の父：」の行末まで）
+            if log.is_enabled_for(logging.DEBUG):
+                pedigree_section = ctx.pedigree_section
+                if pedigree_section:
+                    log.debug('pedigree.section', '血統情報セクション: %.200s...', pedigree_section)
+                else:
+                    log.debug('pedigree.section_missing', '血統情報セクションが見つかりませんでした')
             
             try:
-                # 血統情報を抽出するためのパターン
+                # 血統情報を抽出するためのパターン（extractors.rakuten_detail に登録済み）
                 # 1. まず「父：XXX 母：YYY 母の父：ZZZ」の形式で一度に抽出を試みる
-                full_pattern = r'父[：:]([^\n\r\s][^\n\r：:]*)[\s\u3000]*母[：:]([^\n\r\s][^\n\r：:]*)[\s\u3000]*(?:母の?父|母父)[：:]([^\n\r\s][^\n\r：:]*)'
-                full_match = re.search(full_pattern, page_text)
+                full_match = ctx.match('pedigree')
                 
                 if full_match:
                     # 完全な形式でマッチした場合
-                    result['sire'] = self._clean_horse_name(full_match.group(1).strip())
-                    result['dam'] = self._clean_horse_name(full_match.group(2).strip())
-                    result['damsire'] = self._clean_horse_name(full_match.group(3).strip())
-                    print(f"[デバッグ] 完全な形式で血統情報を抽出: sire={result['sire']}, dam={result['dam']}, damsire={result['damsire']}")
+                    for key in ('sire', 'dam', 'damsire'):
+                        result[key] = self._clean_horse_name(full_match[key].strip())
+                    log.debug('pedigree.full_match', '完全な形式で血統情報を抽出: sire=%s, dam=%s, damsire=%s',
+                              result['sire'], result['dam'], result['damsire'])
                 else:
-                    # 個別に抽出するパターン
-                    patterns = [
-                        # 父を抽出
-                        (r'父[：:]([^\n\r\s][^\n\r：:]*)', 'sire'),
-                        # 母を抽出
-                        (r'母[：:]([^\n\r\s][^\n\r：:]*)', 'dam'),
-                        # 母の父を抽出（「母の父：」または「母父：」の形式）
-                        (r'(?:母の?父|母父)[：:]([^\n\r\s][^\n\r：:]*)', 'damsire')
-                    ]
-                    
-                    for pattern, key in patterns:
-                        match = re.search(pattern, page_text)
+                    # 個別に抽出する（父、母、母の父の順）
+                    for key in ('sire', 'dam', 'damsire'):
+                        match = ctx.match(key)
                         if match and not result.get(key):
-                            result[key] = self._clean_horse_name(match.group(1).strip())
-                            print(f"[デバッグ] {key} を抽出: {result[key]}")
+                            result[key] = self._clean_horse_name(match[key].strip())
+                            log.debug('pedigree.field_match', '%s を抽出: %s', key, result[key])
                     
                     # 母の父がまだ見つからず、母が抽出できている場合は、母の情報から抽出を試みる
                     if not result.get('damsire') and result.get('dam'):
@@ -387,110 +520,69 @@ class ImprovedRakutenScraper:
                             result['dam'] = self._clean_horse_name(parts[0].strip())
                             if len(parts) > 1:
                                 result['damsire'] = self._clean_horse_name(parts[1].strip())
-                                print(f"[デバッグ] 母の情報からdamsireを抽出: {result['damsire']}")
+                                log.debug('pedigree.damsire_from_dam', '母の情報からdamsireを抽出: %s', result['damsire'])
                         # 母の情報に「（母父：XXX）」が含まれている場合
                         elif '（母父：' in result['dam'] or '(母父：' in result['dam']:
-                            dam_parts = re.split(r'[（(]母父[：:]', result['dam'])
+                            dam_parts = DAM_SIRE_NOTE_PATTERN.split(result['dam'])
                             if len(dam_parts) > 1:
                                 result['dam'] = self._clean_horse_name(dam_parts[0].strip())
                                 damsire_part = dam_parts[1].replace('）', '').replace(')', '').strip()
                                 result['damsire'] = self._clean_horse_name(damsire_part)
-                                print(f"[デバッグ] 母の情報からdamsireを抽出: {result['damsire']}")
+                                log.debug('pedigree.damsire_from_dam', '母の情報からdamsireを抽出: %s', result['damsire'])
             except Exception as e:
-                print(f"[警告] 血統情報の抽出中にエラーが発生しました: {str(e)}")
+                log.warning('pedigree.error', '血統情報の抽出中にエラーが発生しました: %s', e)
             
             # 互換性のため dam_sire にも damsire と同じ値を設定
             if result['damsire'] and not result['dam_sire']:
                 result['dam_sire'] = result['damsire']
             
             # 結果をログに出力
-            print(f"[デバッグ] 抽出結果 - sire: '{result['sire']}'")
-            print(f"[デバッグ] 抽出結果 - dam: '{result['dam']}'")
-            print(f"[デバッグ] 抽出結果 - damsire: '{result['damsire']}'")
+            log.debug('pedigree.extracted', "抽出結果 - sire: '%s', dam: '%s', damsire: '%s'",
+                      result['sire'], result['dam'], result['damsire'],
+                      sire=result['sire'], dam=result['dam'], damsire=result['damsire'])
             
             # 必須フィールドの検証
             if not any([result['sire'], result['dam'], result['damsire']]):
-                print("[警告] 血統情報を抽出できませんでした")
-                print(f"[デバッグ] ページテキストの先頭500文字: {page_text[:500]}...")
+                log.warning('pedigree.missing', '血統情報を抽出できませんでした')
+                log.debug('pedigree.page_head', 'ページテキストの先頭500文字: %.500s...', ctx.text)
             
             return result
             
         except Exception as e:
-            print(f"[エラー] 血統情報の抽出中にエラーが発生しました: {str(e)}")
+            log.error('pedigree.error', '血統情報の抽出中にエラーが発生しました: %s', e)
             return result
-            
-        # パターン2: 個別に抽出（フォールバック）
-        patterns = {
-            'sire': [
-                r'父[：:]([^\n\r]+?)(?=\s*(?:母|$))',  # 母または行末まで
-                r'父[：:]([^\n\r]+)'  # フォールバック
-            ],
-            'dam': [
-                r'母[：:]([^\n\r]+?)(?=\s*(?:母の?父|母父|$))',  # 母の父または行末まで
-                r'母[：:]([^\n\r]+)'  # フォールバック
-            ],
-            'damsire': [
-                r'(?:母の?父|母父)[：:]([^\n\r]+?)(?=[\s\n\r]|$)',  # 空白か改行まで
-                r'(?:母の?父|母父)[：:]([^\n\r]+)'  # フォールバック
-            ]
-        }
-        
-        # 各フィールドに対してパターンマッチングを試みる
-        for field, pattern_list in patterns.items():
-            for pattern in pattern_list:
-                match = re.search(pattern, page_text, re.DOTALL)
-                if match:
-                    raw_value = match.group(1).strip()
-                    value = self._clean_horse_name(raw_value)
-                    if value:  # 空でないことを確認
-                        result[field] = value
-                        # dam_sire も damsire として設定（互換性のため）
-                        if field == 'damsire':
-                            result['dam_sire'] = value
-                        print(f"[デバッグ] {field} を抽出: 生値='{raw_value}', 正規化後='{value}'")
-                        break  # マッチしたら次のフィールドへ
-        
-        # damsireが見つからない場合のフォールバック
-        if not result['damsire'] and (result['sire'] or result['dam']):
-            print(f"[デバッグ] damsireが見つからないため、空文字を設定します")
-            result['damsire'] = ''  # 空文字を設定
-            result['dam_sire'] = ''  # 互換性のため
-        
-        print(f"[デバッグ] 最終的な血統情報: sire='{result['sire']}', dam='{result['dam']}', damsire='{result['damsire']}'")
-        print("========================================")
-        return result
     
-    def _extract_weight(self, page_text: str) -> Optional[int]:
+    def _extract_weight(self, ctx: DetailPageContext) -> Optional[int]:
         """馬体重を抽出"""
         # "最終出走馬体重：XXXkg" を探す
-        match = re.search(r'最終出走馬体重[：:]\s*(\d+)kg', page_text)
+        match = ctx.match('weight')
         if match:
-            return int(match.group(1))
+            return int(match['weight'])
         return None
     
-    def _extract_race_record(self, page_text: str) -> str:
+    def _extract_race_record(self, ctx: DetailPageContext) -> str:
         """成績を抽出"""
         # "通算成績：24戦4勝［4-6-2-12］" を探す
-        match = re.search(r'通算成績[：:]\s*(\d+戦\d+勝［\d+-\d+-\d+-\d+］)', page_text)
+        match = ctx.match('race_record')
         if match:
-            return match.group(1).strip()
+            return match['race_record'].strip()
         return ""
     
     def _extract_jbis_prize_money(self, jbis_url: str) -> float:
         """JBISから現在の賞金情報を取得"""
         if not jbis_url:
-            print("JBIS URLが指定されていないため、賞金情報を取得できません")
+            log.debug('jbis.no_url', 'JBIS URLが指定されていないため、賞金情報を取得できません')
             return 0.0
             
         try:
             # JBISページにリクエスト
             response = self._make_request(jbis_url, method='GET')
             if not response or not response.ok:
-                print(f"JBISページの取得に失敗しました: {jbis_url}")
+                log.warning('jbis.fetch_failed', 'JBISページの取得に失敗しました: %s', jbis_url)
                 return 0.0
                 
             # 基本情報ページから賞金情報を抽出
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(response.text, self.html_parser)
             
             # 総賞金を探す（複数のパターンを試す）
             prize_patterns = [
@@ -508,18 +600,18 @@ class ImprovedRakutenScraper:
                     except (ValueError, TypeError):
                         continue
             
-            print(f"JBISから賞金情報を抽出できませんでした: {jbis_url}")
+            log.warning('jbis.prize_missing', 'JBISから賞金情報を抽出できませんでした: %s', jbis_url)
             return 0.0
             
         except Exception as e:
-            print(f"JBISからの賞金取得中にエラーが発生しました: {str(e)}")
+            log.error('jbis.error', 'JBISからの賞金取得中にエラーが発生しました: %s', e, url=jbis_url)
             return 0.0
 
-    def _extract_prize_money(self, page_text: str, jbis_url: str = None) -> Dict:
+    def _extract_prize_money(self, ctx: DetailPageContext, jbis_url: str = None) -> Dict:
         """賞金情報を抽出
         
         Args:
-            page_text: ページのテキスト
+            ctx: 詳細ページの解析コンテキスト
             jbis_url: JBISのURL（オプション、指定すると最新の賞金情報を取得）
             
         Returns:
@@ -533,15 +625,15 @@ class ImprovedRakutenScraper:
         # オークション時点の賞金を抽出
         try:
             # 中央・地方・総獲得賞金の全パターンをカバー
-            central_prize_match = re.search(r'中央獲得賞金[：:]\s*([\d,.]+)万?円', page_text)
-            local_prize_match = re.search(r'地方獲得賞金[：:]\s*([\d,.]+)万?円', page_text)
-            total_prize_match = re.search(r'総獲得賞金[：:]\s*([\d,.]+)万?円', page_text)
+            total_prize_match = ctx.match('total_prize')
             
             if total_prize_match:
-                result['total_prize_start'] = float(total_prize_match.group(1).replace(',', ''))
+                result['total_prize_start'] = float(total_prize_match['prize'].replace(',', ''))
             else:
-                central = float(central_prize_match.group(1).replace(',', '')) if central_prize_match else 0.0
-                local = float(local_prize_match.group(1).replace(',', '')) if local_prize_match else 0.0
+                central_prize_match = ctx.match('central_prize')
+                local_prize_match = ctx.match('local_prize')
+                central = float(central_prize_match['prize'].replace(',', '')) if central_prize_match else 0.0
+                local = float(local_prize_match['prize'].replace(',', '')) if local_prize_match else 0.0
                 result['total_prize_start'] = central + local
                 
             # 最新の賞金情報をJBISから取得
@@ -551,22 +643,20 @@ class ImprovedRakutenScraper:
             else:
                 result['total_prize_latest'] = result['total_prize_start']
                 
-            print(f"[デバッグ] 賞金情報 - オークション時: {result['total_prize_start']}万円, 最新: {result['total_prize_latest']}万円")
+            log.debug('prize.extracted', '賞金情報 - オークション時: %s万円, 最新: %s万円',
+                      result['total_prize_start'], result['total_prize_latest'], **result)
                 
         except (ValueError, TypeError, AttributeError) as e:
-            print(f"賞金情報の抽出に失敗: {e}")
+            log.warning('prize.error', '賞金情報の抽出に失敗: %s', e)
             result['total_prize_start'] = 0.0
             result['total_prize_latest'] = 0.0
             
         return result
     
-    def _extract_comment(self, page_text: str) -> str:
+    def _extract_comment(self, ctx: DetailPageContext) -> str:
         """コメントを抽出"""
-        # "本馬について" の後のテキストを探す
-        comment_match = re.search(r'本馬について(.+?)(?=\n\n|\n販売申込者|$)', page_text, re.DOTALL)
-        if comment_match:
-            return comment_match.group(1).strip()
-        return ""
+        # "本馬について" の後のテキスト
+        return ctx.comment_section
     
     def _extract_disease_tags(self, comment: str) -> str:
         """疾病タグを抽出"""
@@ -582,64 +672,58 @@ class ImprovedRakutenScraper:
         
         return ','.join(found_diseases) if found_diseases else "なし"
     
-    def _extract_primary_image(self, soup) -> str:
+    def _extract_primary_image(self, ctx: DetailPageContext) -> str:
         """馬体画像のURLを抽出"""
         try:
-            # 画像要素を探す
-            image_elements = soup.find_all('img')
-            for img in image_elements:
-                src = img.get('src', '')
-                if src and isinstance(src, str) and 'horse' in src.lower() and ('jpg' in src.lower() or 'jpeg' in src.lower() or 'png' in src.lower()):
+            # 画像のsrc一覧から探す
+            for src in ctx.image_srcs:
+                lower_src = src.lower()
+                if 'horse' in lower_src and ('jpg' in lower_src or 'jpeg' in lower_src or 'png' in lower_src):
                     return src
             
             return ""
         except Exception as e:
-            print(f"馬体画像の抽出に失敗: {e}")
+            log.warning('image.error', '馬体画像の抽出に失敗: %s', e)
             return ""
     
-    def _extract_seller(self, page_text: str) -> str:
+    def _extract_seller(self, ctx: DetailPageContext) -> str:
         """販売申込者を抽出
         
         Returns:
             str: 販売者名（「インボイス登録あり」のテキストは削除）
         """
-        seller_match = re.search(r'販売申込者[：:]\s*([^\n]+)', page_text)
-        if seller_match:
-            seller = seller_match.group(1).strip()
+        seller = ctx.seller_line
+        if seller:
             # 「（インボイス登録あり）」を削除
-            seller = re.sub(r'\s*[(（]インボイス登録あり[)）]', '', seller)
+            seller = INVOICE_NOTE_PATTERN.sub('', seller)
             return seller.strip()
         return ""
     
-    def _extract_jbis_url(self, soup) -> str:
+    def _extract_jbis_url(self, ctx: DetailPageContext) -> str:
         """JBIS URLを抽出し、基本情報ページのURLに正規化して返す"""
         try:
             # 1. まず「基本情報」というテキストを含むリンクを探す
-            info_links = []
-            for link in soup.find_all('a', href=True):
-                if '基本情報' in link.get_text():
-                    info_links.append(link.get('href', ''))
+            info_links = [href for href, text in ctx.anchors if '基本情報' in text]
             
             # 2. 基本情報リンクからJBISのURLを抽出
             for href in info_links:
                 if 'jbis.or.jp' in href and 'horse' in href:
                     normalized_url = self._normalize_jbis_url(href)
-                    print(f"基本情報ページからJBIS URLを抽出: {normalized_url}")
+                    log.debug('jbis_url.info_link', '基本情報ページからJBIS URLを抽出: %s', normalized_url)
                     return normalized_url
             
             # 3. 基本情報リンクが見つからない場合は、直接JBISリンクを探す
-            for link in soup.find_all('a', href=True):
-                href = link.get('href', '')
+            for href, _ in ctx.anchors:
                 if 'jbis.or.jp' in href and 'horse' in href:
                     normalized_url = self._normalize_jbis_url(href)
-                    print(f"直接JBISリンクから抽出: {normalized_url}")
+                    log.debug('jbis_url.direct_link', '直接JBISリンクから抽出: %s', normalized_url)
                     return normalized_url
             
-            print("警告: JBISの基本情報ページへのリンクが見つかりませんでした")
+            log.warning('jbis_url.missing', 'JBISの基本情報ページへのリンクが見つかりませんでした')
             return ""
             
         except Exception as e:
-            print(f"JBIS URLの抽出に失敗: {e}")
+            log.warning('jbis_url.error', 'JBIS URLの抽出に失敗: %s', e)
             return ""
 
     def _normalize_jbis_url(self, jbis_url: str) -> str:
@@ -674,7 +758,8 @@ class ImprovedRakutenScraper:
         # 基本情報ページのURLを構築
         return f"https://www.jbis.or.jp/horse/{horse_id}/"
 
-    def scrape_all_horses(self, auction_date: str = None) -> List[Dict]:
+    def scrape_all_horses(self, auction_date: str = None,
+                          checkpoint: Optional[RunCheckpoint] = None) -> List[Dict]:
         """全馬の情報を取得"""
         if not auction_date:
             auction_date = self.get_auction_date()
@@ -682,7 +767,7 @@ class ImprovedRakutenScraper:
         print(f"オークション日: {auction_date}")
         
         # 馬のリストを取得
-        horses = self.scrape_horse_list()
+        horses = self.scrape_horse_list(checkpoint)
         print(f"{len(horses)}頭の馬を発見しました。")
         
         # オークション日を追加
@@ -691,26 +776,46 @@ class ImprovedRakutenScraper:
         
         return horses
 
-def save_scraped_data(horse_data: Dict[str, Any], data_dir: str = 'static-frontend/public/data') -> Tuple[bool, str]:
+# 解析プロセスごとのスクレイパー（_init_parse_worker で作成）
+_parse_worker: Optional[ImprovedRakutenScraper] = None
+
+
+def _init_parse_worker(html_parser: str) -> None:
+    """解析プロセスの初期化（プロセスごとに1度だけ抽出用のスクレイパーを作る）"""
+    global _parse_worker
+    _parse_worker = ImprovedRakutenScraper(html_parser=html_parser, fetcher=ConcurrentFetcher(max_workers=1),
+                                           parse_workers=0)
+
+
+def _parse_detail_in_worker(content: bytes) -> Tuple[Dict, Dict[str, Dict[str, int]]]:
+    """解析プロセスで詳細ページを解析し、抽出結果とこのページでの抽出パターンのヒット数を返す"""
+    DETAIL_PATTERNS.reset_stats()
+    detail_data = _parse_worker.parse_horse_detail(content, fetch_latest_prize=False)
+    return detail_data, DETAIL_PATTERNS.stats()
+
+
+def save_scraped_data(horse_data: Dict[str, Any], data_dir: str = 'static-frontend/public/data',
+                      store: Optional[HorseDataStore] = None) -> Tuple[bool, str]:
     """スクレイピングしたデータをhorses.jsonとauction_history.jsonに保存
     
     Args:
         horse_data: スクレイピングした馬のデータ
         data_dir: データを保存するディレクトリ
+        store: まとめ保存用のストア（指定した場合はメモリ上に反映し、ファイルへの書き出しは store.compact() で行う）
         
     Returns:
         Tuple[bool, str]: (成功可否, メッセージ)
     """
     try:
         # 必須フィールドのバリデーション
-        print("\n[デバッグ] 必須フィールドのバリデーションを開始します...")
         required_fields = ['name', 'sex', 'age', 'sire', 'dam', 'seller', 'auction_date']
         missing_fields = [field for field in required_fields if not horse_data.get(field)]
         
         # 各フィールドの値をデバッグ出力
-        print("[デバッグ] 現在のフィールド値:")
-        for field in required_fields + ['damsire']:
-            print(f"  - {field}: '{horse_data.get(field, 'N/A')}' (型: {type(horse_data.get(field))})")
+        if log.is_enabled_for(logging.DEBUG):
+            values = {field: horse_data.get(field, 'N/A') for field in required_fields + ['damsire']}
+            log.debug('save.validate', '必須フィールドのバリデーション: %s', horse_data.get('name', 'N/A'),
+                      values=values, missing=missing_fields)
         
         if missing_fields:
             return False, f"必須フィールドが不足しています: {', '.join(missing_fields)}"
@@ -721,13 +826,10 @@ def save_scraped_data(horse_data: Dict[str, Any], data_dir: str = 'static-fronte
             horse_data['dam_sire'] = ''  # 互換性のため
 
         # 馬情報を準備
-        print(f"\n[デバッグ] 馬情報を準備中: {horse_data.get('name', 'N/A')}")
-        print(f"[デバッグ] disease_tags の型: {type(horse_data.get('disease_tags'))}, 値: {horse_data.get('disease_tags')}")
-        
         # disease_tags が文字列の場合はリストに変換
         disease_tags = horse_data.get('disease_tags', [])
         if isinstance(disease_tags, str):
-            print(f"[警告] disease_tags が文字列です。リストに変換します: {disease_tags}")
+            log.debug('save.disease_tags_str', 'disease_tags が文字列です。リストに変換します: %s', disease_tags)
             # カンマ区切りの文字列をリストに変換
             disease_tags = [tag.strip() for tag in disease_tags.split(',') if tag.strip()]
         
@@ -753,10 +855,10 @@ def save_scraped_data(horse_data: Dict[str, Any], data_dir: str = 'static-fronte
             'created_at': datetime.now().isoformat(),
             'updated_at': datetime.now().isoformat()
         }
-        print(f"[デバッグ] 保存する馬情報: {json.dumps(horse_info, ensure_ascii=False, indent=2)}")
+        log.debug('save.horse_info', '保存する馬情報: %s', horse_info['name'], horse=horse_info)
 
         # 馬情報を保存
-        horse_id = save_horse(horse_info, data_dir)
+        horse_id = store.save_horse(horse_info) if store else save_horse(horse_info, data_dir)
 
         # オークション履歴を準備
         auction_info = {
@@ -772,14 +874,21 @@ def save_scraped_data(horse_data: Dict[str, Any], data_dir: str = 'static-fronte
         }
 
         # オークション履歴を保存
-        save_auction_history(auction_info, data_dir)
+        if store:
+            store.save_auction_history(auction_info)
+        else:
+            save_auction_history(auction_info, data_dir)
 
         return True, f"{horse_data['name']} のデータを保存しました"
     except Exception as e:
         return False, f"データの保存中にエラーが発生しました: {str(e)}"
 
-def scrape_from_history_urls():
-    """horses_history.jsonのURLリストからスクレイピングし、horses.jsonとauction_history.jsonに保存する"""
+def scrape_from_history_urls(resume: bool = False):
+    """horses_history.jsonのURLリストからスクレイピングし、horses.jsonとauction_history.jsonに保存する
+    
+    Args:
+        resume: True の場合は前回中断した実行のチェックポイントから再開する
+    """
     print("スクレイピングを開始します...")
     
     # データディレクトリのパスを設定
@@ -838,21 +947,49 @@ def scrape_from_history_urls():
             print(f"- {name}")
         print("------------------------------------")
 
-    # スクレイピングの実行
-    scraper = ImprovedRakutenScraper()
+    # スクレイピングの実行（内容が前回と同じページは解析・保存を省略する）
+    scraper = ImprovedRakutenScraper(fingerprints=PageFingerprintStore.from_env(EXTRACTOR_VERSION))
+    store = HorseDataStore(data_dir)
     success_count = 0
     failed_count = 0
+    unchanged_count = 0
+    
+    # 前回の実行を再開する場合は、保存済みのURLキューのうち未完了のものだけを取得する
+    checkpoint = RunCheckpoint.for_run('history_urls', resume=resume)
+    if checkpoint.queue is None:
+        checkpoint.start([{'url': url} for url in url_list])
+    links = checkpoint.pending()
+    done = len(checkpoint.queue) - len(links)
+    if done:
+        print(f"前回の実行で取得済みの{done}件を反映し、残り{len(links)}件を取得します")
+        # 取得済みの結果も保存し直す（同じ馬・同じ開催日の記録は上書きされる）
+        for horse in checkpoint.completed.values():
+            if horse is None:
+                unchanged_count += 1
+                continue
+            success, message = save_scraped_data(horse, data_dir, store)
+            if success:
+                success_count += 1
+            else:
+                failed_count += 1
     
-    for i, url in enumerate(url_list, 1):
-        print(f"({i}/{len(url_list)}) {url}")
+    # 詳細ページを並列に取得し、取得できたものから順に保存する
+    for i, (link, horse) in enumerate(scraper.iter_horse_details(links), done + 1):
+        url = link['url']
+        print(f"({i}/{len(checkpoint.queue)}) {url}")
         try:
-            # 馬の詳細情報をスクレイピング
-            horse = scraper.scrape_horse_detail(url)
             if not horse:
                 print(f"  → エラー: データを取得できませんでした")
                 failed_count += 1
                 continue
                 
+            # 前回と同じ内容のページは保存済みなので、マージ・保存しない
+            if scraper.page_unchanged(url):
+                print(f"  → 変更なし: {horse.get('name', '')}")
+                checkpoint.record(url, None)
+                unchanged_count += 1
+                continue
+                
             # 詳細URLを設定
             horse["detail_url"] = url
             
@@ -861,28 +998,50 @@ def scrape_from_history_urls():
                 horse["auction_date"] = datetime.now().strftime("%Y-%m-%d")
             
             # データを保存
-            success, message = save_scraped_data(horse, data_dir)
+            success, message = save_scraped_data(horse, data_dir, store)
             if success:
+                checkpoint.record(url, horse)
                 print(f"  → 成功: {message}")
                 success_count += 1
             else:
                 print(f"  → エラー: {message}")
                 failed_count += 1
+                # 保存できなかったページは次回も解析し直す
+                if scraper.fingerprints is not None:
+                    scraper.fingerprints.forget(url)
                 
         except Exception as e:
             print(f"  → 例外が発生しました: {str(e)}")
             failed_count += 1
-            
-        time.sleep(1)  # サーバーに負荷をかけないように1秒待機
+            if scraper.fingerprints is not None:
+                scraper.fingerprints.forget(url)
+    
+    # まとめてファイルに書き出し、ページハッシュを保存してチェックポイントを削除する
+    store.compact()
+    if scraper.fingerprints is not None:
+        scraper.fingerprints.save()
+    checkpoint.finish()
+    
+    scraper.close()
     
     # 結果を表示
     print("\n===== スクレイピング結果 =====")
     print(f"成功: {success_count}件")
+    print(f"変更なし: {unchanged_count}件")
     print(f"失敗: {failed_count}件")
+    if scraper.fingerprints is not None:
+        stats = scraper.fingerprints.stats()
+        print(f"詳細ページ: 新規 {stats['new']}件 / 変更あり {stats['changed']}件 / 変更なし {stats['unchanged']}件")
     print("===========================\n")
+    scraper.log_pattern_stats()
+    scraper.log_cache_stats()
 
-def main():
-    """メイン実行関数"""
+def main(resume: bool = False):
+    """メイン実行関数
+    
+    Args:
+        resume: True の場合は前回中断した実行のチェックポイントから再開する
+    """
     scraper = None
     exit_code = 1  # デフォルトはエラー終了
     
@@ -897,18 +1056,22 @@ def main():
         # スクレイパーを初期化（タイムアウト30秒、最大3回リトライ）
         scraper = ImprovedRakutenScraper(timeout=30, max_retries=3)
         
-        # オークション日を取得
+        # 取得済みの馬はチェックポイントに記録し、中断しても --resume で続きから再開できるようにする
+        checkpoint = RunCheckpoint.for_run('horse_list', resume=resume)
+        
+        # オークション日を取得（再開時は前回の実行と同じ開催日を使う）
         logger.info("オークション情報を取得中...")
-        auction_date = scraper.get_auction_date()
+        auction_date = checkpoint.meta.get('auction_date') or scraper.get_auction_date()
         if not auction_date:
             logger.error("オークション日を取得できませんでした")
             return 1
             
         logger.info(f"オークション日: {auction_date}")
+        checkpoint.meta['auction_date'] = auction_date
         
         # 全馬の情報を取得
         logger.info("馬の情報を取得中...")
-        horses = scraper.scrape_all_horses(auction_date)
+        horses = scraper.scrape_all_horses(auction_date, checkpoint)
         
         if not horses:
             logger.error("馬の情報を取得できませんでした")
@@ -919,6 +1082,7 @@ def main():
         
         success_count = 0
         fail_count = 0
+        store = HorseDataStore(data_dir)
         
         # 各馬の情報を保存（進捗表示付き）
         for horse in tqdm(horses, desc="データを保存中", unit="件"):
@@ -926,7 +1090,7 @@ def main():
             logger.debug(f"処理中: {horse_name}")
             
             try:
-                success, message = save_scraped_data(horse, data_dir)
+                success, message = save_scraped_data(horse, data_dir, store)
                 if success:
                     success_count += 1
                     logger.debug(f"保存成功: {horse_name}")
@@ -934,14 +1098,15 @@ def main():
                     fail_count += 1
                     logger.warning(f"保存失敗: {horse_name} - {message}")
                 
-                # サーバーに優しくするために少し待機
-                time.sleep(0.5)
-                
             except Exception as e:
                 fail_count += 1
                 logger.error(f"保存中にエラーが発生しました ({horse_name}): {str(e)}")
                 continue
-        
+
+        # まとめてファイルに書き出す（中断した場合はジャーナルから次回復元される）
+        store.compact()
+        checkpoint.finish()
+
         # 結果をログに記録
         logger.info("\n===== 処理完了 =====")
         logger.info(f"成功: {success_count}件")
@@ -960,7 +1125,7 @@ def main():
         # リソースのクリーンアップ
         if scraper and hasattr(scraper, 'session'):
             try:
-                scraper.session.close()
+                scraper.close()
                 logger.info("セッションをクローズしました")
             except Exception as e:
                 logger.error(f"セッションのクローズ中にエラーが発生しました: {str(e)}")
@@ -969,5 +1134,9 @@ def main():
         return exit_code
 
 if __name__ == "__main__":
+    import argparse
     import sys
-    sys.exit(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='楽天競馬オークションの馬情報を取得して保存する')
+    parser.add_argument('--resume', action='store_true', help='前回中断した実行をチェックポイントから再開する')
+    args = parser.parse_args()
+    sys.exit(main(resume=args.resume))
\ No newline at end of file
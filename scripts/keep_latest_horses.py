@@ -1,7 +1,13 @@
 import json
 import os
+import sys
 from datetime import datetime
 
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.scrapers.history_aggregates import AGGREGATES_KEY, HistoryAggregates
+
 def keep_latest_horses(input_file, output_file, num_horses=9):
     # 入力ファイルを読み込む
     with open(input_file, 'r', encoding='utf-8') as f:
@@ -13,10 +19,18 @@ def keep_latest_horses(input_file, output_file, num_horses=9):
     # 最新のn頭を取得（IDが大きい順）
     latest_horses = sorted(horses, key=lambda x: x.get('id', 0), reverse=True)[:num_horses]
     
+    # 集計値から残さない馬の寄与分を差し引く（集計値がない古いファイルは全馬から集計する）
+    aggregates = HistoryAggregates.load(data)
+    kept_ids = {id(horse) for horse in latest_horses}
+    for horse in horses:
+        if id(horse) not in kept_ids:
+            aggregates.remove(horse)
+    data[AGGREGATES_KEY] = aggregates.to_dict()
+    
     # メタデータを更新
     data['metadata'] = {
         'last_updated': datetime.now().isoformat(),
-        'total_horses': len(latest_horses),
+        **aggregates.metadata(),
         'description': f'Latest {num_horses} horses only',
         'original_horses': len(horses)
     }
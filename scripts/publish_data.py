@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+静的フロントエンド向けのJSONを公開用に書き換えるスクリプト
+- horses_history.json / horses.json / auction_history.json を空白なしの形式にし、
+  .gz / .br の事前圧縮版を隣に作る
+- 公開前後のサイズを表示する
+- スクレイピング・更新スクリプトの実行後、コミットする前に実行する
+
+使用例:
+  python3 scripts/publish_data.py
+  # 列形式（<名前>.columnar.json）も作る
+  python3 scripts/publish_data.py --columnar
+  # 開発用にインデント付きのコピーを data/pretty に書き出す
+  python3 scripts/publish_data.py --pretty
+"""
+
+import argparse
+import os
+import sys
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from backend.scrapers.data_publish import (
+    DEFAULT_DATA_DIR,
+    DEFAULT_PRETTY_DIR,
+    PUBLISH_FILES,
+    brotli,
+    format_report,
+    publish_data,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='静的フロントエンド向けのJSONを公開用に書き換える')
+    parser.add_argument('files', nargs='*', default=list(PUBLISH_FILES),
+                        help=f"対象のファイル名（既定: {' '.join(PUBLISH_FILES)}）")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='対象のディレクトリ')
+    parser.add_argument('--columnar', action='store_true', help='列形式の <名前>.columnar.json も作る')
+    parser.add_argument('--pretty', nargs='?', const=DEFAULT_PRETTY_DIR, metavar='DIR',
+                        help=f'インデント付きのコピーを書き出す（既定: {DEFAULT_PRETTY_DIR}）')
+    args = parser.parse_args()
+
+    print("=== JSON公開処理 ===")
+    if brotli is None:
+        print("brotli がインストールされていないため、.br は作成しません（pip install brotli）")
+    reports = publish_data(args.data_dir, args.files, columnar=args.columnar, pretty_dir=args.pretty)
+    if not reports:
+        print("❌ 公開するファイルがありません")
+        sys.exit(1)
+    print(format_report(reports))
+    if args.pretty:
+        print(f"インデント付きのコピー: {args.pretty}")
+
+
+if __name__ == '__main__':
+    main()
@@ -48,11 +48,11 @@ def run_script(script_name: str, script_func, *args, **kwargs) -> bool:
         logger.error(traceback.format_exc())
         return False
 
-def run_auction_scraper() -> bool:
-    """オークションデータのスクレイピングを実行"""
+def run_auction_scraper(resume: bool = False) -> bool:
+    """オークションデータのスクレイピングを実行（resume=True の場合は前回中断した実行のチェックポイントから再開する）"""
     try:
         from improved_scraper import main as auction_main
-        return auction_main() == 0  # main() は 0 を返すと成功
+        return auction_main(resume=resume) == 0  # main() は 0 を返すと成功
     except ImportError as e:
         logger.error("improved_scraper.py のインポートに失敗しました")
         logger.error(traceback.format_exc())
@@ -69,8 +69,12 @@ def run_jbis_updater() -> bool:
         logger.error(traceback.format_exc())
         return False
 
-def main() -> int:
-    """メイン実行関数"""
+def main(resume: bool = False) -> int:
+    """メイン実行関数
+    
+    Args:
+        resume: True の場合はオークションデータのスクレイピングをチェックポイントから再開する
+    """
     logger.info("=== SaraokuDB データ更新処理を開始します ===")
     start_time = datetime.now()
     
@@ -83,7 +87,8 @@ def main() -> int:
     # 1. オークションデータのスクレイピング
     results['auction_scraper'] = run_script(
         "オークションデータスクレイピング",
-        run_auction_scraper
+        run_auction_scraper,
+        resume
     )
     
     # 2. JBIS賞金情報の更新
@@ -109,4 +114,9 @@ def main() -> int:
     return 0 if all(results.values()) else 1
 
 if __name__ == "__main__":
-    sys.exit(main())
+    import argparse
+    parser = argparse.ArgumentParser(description='SaraokuDB のデータを更新する')
+    parser.add_argument('--resume', action='store_true',
+                        help='オークションデータのスクレイピングを前回中断した実行のチェックポイントから再開する')
+    args = parser.parse_args()
+    sys.exit(main(resume=args.resume))
@@ -1,7 +1,6 @@
 import sys
 import os
 import json
-import requests
 from pathlib import Path
 from datetime import datetime
 from bs4 import BeautifulSoup
@@ -10,15 +9,16 @@ from bs4 import BeautifulSoup
 sys.path.append(str(Path(__file__).parent.parent))
 
 from backend.scrapers.rakuten_scraper import RakutenAuctionScraper
+from backend.scrapers.http_client import get_session
 
 def fetch_page(url):
-    """シンプルにrequestsでページを取得"""
+    """共通HTTPクライアントでページを取得"""
     headers = {
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
         'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
     }
-    response = requests.get(url, headers=headers, timeout=30)
+    response = get_session().get(url, headers=headers, timeout=30)
     response.raise_for_status()
     return response.text
 
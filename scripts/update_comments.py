@@ -7,29 +7,34 @@
 import json
 import os
 import sys
-import requests
-from bs4 import BeautifulSoup
 import time
 from typing import Dict, List
 
-# スクレイパーのパスを追加
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend', 'scrapers'))
-from rakuten_scraper import RakutenAuctionScraper
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from backend.scrapers.history_stream import HistoryReader, HistoryWriter, count_horses
+from backend.scrapers.page_fingerprint import PageFingerprintStore, page_hash
+from backend.scrapers.parse_context import DetailPageContext
+from scripts.improved_scraper import EXTRACTOR_VERSION, ImprovedRakutenScraper
 
-def update_comments():
-    """既存データのコメントを更新"""
-    # プロジェクトルートからの絶対パスを使用
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(script_dir)
-    history_file = os.path.join(project_root, "static-frontend", "public", "data", "horses_history.json")
+def update_comments(history_file: str = None):
+    """既存データのコメントを更新
+    
+    Args:
+        history_file: 対象の horses_history.json（省略時は static-frontend/public/data/horses_history.json）
+    """
+    if history_file is None:
+        # プロジェクトルートからの絶対パスを使用
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        project_root = os.path.dirname(script_dir)
+        history_file = os.path.join(project_root, "static-frontend", "public", "data", "horses_history.json")
     
     print(f"=== コメントデータ更新開始 ===")
     print(f"対象ファイル: {history_file}")
     
-    # 既存データを読み込み
+    # 頭数を数える（馬は更新時に1頭ずつ読み込む）
     try:
-        with open(history_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        total_horses = count_horses(history_file)
     except FileNotFoundError:
         print(f"エラー: ファイルが見つかりません: {history_file}")
         return False
@@ -37,93 +42,125 @@ def update_comments():
         print(f"エラー: JSONの読み込みに失敗しました: {e}")
         return False
     
-    horses = data.get('horses', [])
-    print(f"総馬数: {len(horses)}頭")
+    print(f"総馬数: {total_horses}頭")
     
-    # スクレイパーインスタンスを作成
-    scraper = RakutenAuctionScraper()
+    # スクレイパーインスタンスを作成（HTMLパーサーは SCRAPER_HTML_PARSER で選択）
+    scraper = ImprovedRakutenScraper()
+    # 内容が前回と同じページは解析せず、前回抽出したコメントを使う
+    fingerprints = PageFingerprintStore.from_env(EXTRACTOR_VERSION)
     
     # 各馬のコメントデータを更新
     updated_count = 0
     failed_count = 0
     already_has_comment_count = 0
+    unchanged_count = 0
     
-    for i, horse in enumerate(horses):
-        horse_name = horse.get('name', 'Unknown')
-        detail_url = horse.get('detail_url')
+    reader = HistoryReader(history_file)
+    writer = HistoryWriter(history_file, reader.header, as_list=reader.is_list)
+    with reader:
+        for i, horse in enumerate(reader):
+            try:
+                horse_name = horse.get('name', 'Unknown')
+                detail_url = horse.get('detail_url')
         
-        print(f"\n{i+1}/{len(horses)}. {horse_name}:")
+                print(f"\n{i+1}/{total_horses}. {horse_name}:")
         
-        if not detail_url:
-            print("   ❌ detail_urlが存在しません")
-            failed_count += 1
-            continue
+                if not detail_url:
+                    print("   ❌ detail_urlが存在しません")
+                    failed_count += 1
+                    continue
         
-        # 履歴内の全てのエントリでコメントを確認・更新
-        history = horse.get('history', [])
-        entry_updated = False
+                # 履歴内の全てのエントリでコメントを確認・更新
+                history = horse.get('history', [])
+                entry_updated = False
         
-        for j, entry in enumerate(history):
-            current_comment = entry.get('comment', '')
+                for j, entry in enumerate(history):
+                    current_comment = entry.get('comment', '')
             
-            # 最初の3頭は強制的に更新、それ以外は既存コメントがあればスキップ
-            if i < 3:  # 最初の3頭は強制更新
-                print(f"   🔄 強制更新モード（最初の3頭）")
-            elif current_comment and len(current_comment.strip()) > 10:
-                if not entry_updated:
-                    print(f"   ✅ 既にコメントが存在します（{len(current_comment)}文字）")
-                    already_has_comment_count += 1
-                    entry_updated = True
-                continue
+                    # 最初の3頭は強制的に更新、それ以外は既存コメントがあればスキップ
+                    if i < 3:  # 最初の3頭は強制更新
+                        print(f"   🔄 強制更新モード（最初の3頭）")
+                    elif current_comment and len(current_comment.strip()) > 10:
+                        if not entry_updated:
+                            print(f"   ✅ 既にコメントが存在します（{len(current_comment)}文字）")
+                            already_has_comment_count += 1
+                            entry_updated = True
+                        continue
             
-            try:
-                # ページを取得してコメントを抽出
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-                response = requests.get(detail_url, headers=headers, timeout=10)
-                response.raise_for_status()
+                    try:
+                        # ページを取得してコメントを抽出
+                        headers = {
+                            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+                        }
+                        # スクレイパーのセッション（HTTPキャッシュ付き）で取得する
+                        response = scraper.session.get(detail_url, headers=headers, timeout=10)
+                        response.raise_for_status()
                 
-                soup = BeautifulSoup(response.content, 'html.parser')
-                extracted_comment = scraper._extract_comment(soup)
+                        cached = None
+                        if fingerprints is not None:
+                            digest = page_hash(response.content)
+                            _, cached = fingerprints.lookup(detail_url, digest, ('comment',))
+                        if cached is not None:
+                            extracted_comment = cached['comment']
+                        else:
+                            ctx = DetailPageContext.from_html(response.content, scraper.html_parser)
+                            extracted_comment = scraper._extract_comment(ctx)
+                            if fingerprints is not None:
+                                fingerprints.remember(detail_url, digest, {'comment': extracted_comment})
                 
-                if extracted_comment and len(extracted_comment.strip()) > 0:
-                    entry['comment'] = extracted_comment
-                    if not entry_updated:
-                        print(f"   ✅ コメント更新成功（{len(extracted_comment)}文字）")
-                        updated_count += 1
-                        entry_updated = True
-                else:
-                    if not entry_updated:
-                        print("   ❌ コメントが抽出できませんでした")
-                        failed_count += 1
-                        entry_updated = True
+                        if cached is not None and extracted_comment == current_comment:
+                            # ページもコメントも前回と同じなので書き換えない
+                            if not entry_updated:
+                                print("   ⏭️ ページに変更がありません")
+                                unchanged_count += 1
+                                entry_updated = True
+                        elif extracted_comment and len(extracted_comment.strip()) > 0:
+                            entry['comment'] = extracted_comment
+                            if not entry_updated:
+                                print(f"   ✅ コメント更新成功（{len(extracted_comment)}文字）")
+                                updated_count += 1
+                                entry_updated = True
+                        else:
+                            if not entry_updated:
+                                print("   ❌ コメントが抽出できませんでした")
+                                failed_count += 1
+                                entry_updated = True
                 
-                # レート制限のため少し待機
-                time.sleep(1)
+                        # レート制限のため少し待機（キャッシュから返した場合はサーバーにアクセスしていない）
+                        if not getattr(response, 'from_cache', False):
+                            time.sleep(1)
                 
-            except Exception as e:
-                if not entry_updated:
-                    print(f"   ❌ エラー: {e}")
-                    failed_count += 1
-                    entry_updated = True
+                    except Exception as e:
+                        if not entry_updated:
+                            print(f"   ❌ エラー: {e}")
+                            failed_count += 1
+                            entry_updated = True
+            finally:
+                # 更新の有無にかかわらず1頭ずつ書き出す
+                writer.write(horse)
+        writer.trailer = reader.trailer
     
     print(f"\n=== 更新結果 ===")
     print(f"コメント更新成功: {updated_count}頭")
     print(f"既にコメント有り: {already_has_comment_count}頭")
+    print(f"変更なし: {unchanged_count}頭")
     print(f"更新失敗: {failed_count}頭")
+    if fingerprints is not None:
+        stats = fingerprints.stats()
+        print(f"詳細ページ: 新規 {stats['new']}件 / 変更あり {stats['changed']}件 / 変更なし {stats['unchanged']}件")
+        fingerprints.save()
     
     # 更新したデータを保存
     if updated_count > 0:
         try:
-            with open(history_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            writer.close()
             print(f"\n✅ データファイルを更新しました: {history_file}")
             return True
         except Exception as e:
             print(f"❌ ファイルの保存に失敗しました: {e}")
             return False
     else:
+        writer.discard()
         print("\n✅ 更新の必要がありませんでした")
         return True
 
@@ -1,14 +1,15 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
+import asyncio
 import sys
 import os
 import json
 import time
 import re
-from bs4 import BeautifulSoup
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 import requests
 
 # プロジェクトルートをパスに追加
@@ -17,25 +18,12 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 sys.path.append(os.path.join(project_root, 'backend'))
 
-try:
-    from backend.scrapers.rakuten_scraper import RakutenAuctionScraper
-except ImportError:
-    # --- フォールバック ---
-    # backend/scrapers/rakuten_scraper.py を動的に読み込む
-    try:
-        from backend.scrapers.rakuten_scraper import RakutenAuctionScraper
-    except ImportError:
-        # フォールバック: 直接インポート
-        import importlib.util
-        scraper_path = os.path.join(project_root, 'backend', 'scrapers', 'rakuten_scraper.py')
-        spec = importlib.util.spec_from_file_location("rakuten_scraper", scraper_path)
-        if spec and spec.loader:
-            rakuten_scraper = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(rakuten_scraper)
-            RakutenAuctionScraper = rakuten_scraper.RakutenAuctionScraper
-        else:
-            print("❌ rakuten_scraper.pyのロードに失敗しました。")
-            sys.exit(1)
+from backend.scrapers.adaptive_limiter import AdaptiveLimiter, parse_retry_after
+from backend.scrapers.history_aggregates import AGGREGATES_KEY, HistoryAggregates
+from backend.scrapers.history_stream import HistoryReader, HistoryWriter
+from backend.scrapers.html_parser import make_soup
+from backend.scrapers.http_client import create_session
+from backend.scrapers.refresh_schedule import is_due, record_check
 
 
 def normalize_jbis_url(jbis_url: str) -> str:
@@ -56,6 +44,42 @@ def normalize_jbis_url(jbis_url: str) -> str:
     
     return normalized_url
 
+def parse_jbis_prize(content) -> Optional[float]:
+    """JBISのページのHTMLから総賞金（万円）を取得する"""
+    soup = make_soup(content)
+
+    # 方法1: dtタグから総賞金を取得（最も確実）
+    total_prize_dt = soup.find('dt', string=re.compile(r'^\s*総賞金\s*$'))
+    if total_prize_dt:
+        dd = total_prize_dt.find_next_sibling('dd')
+        if dd:
+            prize_text = dd.get_text(strip=True)
+            # 数値を抽出（例: "9077.9万円" -> 9077.9）
+            prize_num_match = re.search(r'([\d,]+\.?\d*)', prize_text)
+            if prize_num_match:
+                try:
+                    prize_str = prize_num_match.group(1).replace(',', '')
+                    prize_value = float(prize_str)
+                    print(f"  - dtタグから賞金取得成功: {prize_value}万円")
+                    return prize_value
+                except ValueError:
+                    print(f"  - dtタグの賞金を数値変換できませんでした: {prize_text}")
+    
+    # 方法2: スペースを考慮した正規表現（dtタグが失敗した場合のフォールバック）
+    page_text = soup.get_text()
+    prize_match = re.search(r'総賞金\s*([\d,]+\.?\d*)\s*万円', page_text)
+    if prize_match:
+        try:
+            prize_str = prize_match.group(1).replace(',', '')
+            prize_value = float(prize_str)
+            print(f"  - 正規表現から賞金取得成功: {prize_value}万円")
+            return prize_value
+        except ValueError:
+            print(f"  - 正規表現の賞金を数値変換できませんでした: {prize_match.group(1)}")
+    
+    print(f"  - 賞金データが見つかりませんでした")
+    return None
+
 def get_jbis_prize(scraper_session, jbis_url: str) -> Optional[float]:
     """JBISのページから総賞金を取得する"""
     if not jbis_url or not jbis_url.startswith('http'):
@@ -71,39 +95,7 @@ def get_jbis_prize(scraper_session, jbis_url: str) -> Optional[float]:
         try:
             response = scraper_session.get(normalized_url, timeout=30)  # タイムアウトを30秒に延長
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # 方法1: dtタグから総賞金を取得（最も確実）
-            total_prize_dt = soup.find('dt', string=re.compile(r'^\s*総賞金\s*$'))
-            if total_prize_dt:
-                dd = total_prize_dt.find_next_sibling('dd')
-                if dd:
-                    prize_text = dd.get_text(strip=True)
-                    # 数値を抽出（例: "9077.9万円" -> 9077.9）
-                    prize_num_match = re.search(r'([\d,]+\.?\d*)', prize_text)
-                    if prize_num_match:
-                        try:
-                            prize_str = prize_num_match.group(1).replace(',', '')
-                            prize_value = float(prize_str)
-                            print(f"  - dtタグから賞金取得成功: {prize_value}万円")
-                            return prize_value
-                        except ValueError:
-                            print(f"  - dtタグの賞金を数値変換できませんでした: {prize_text}")
-            
-            # 方法2: スペースを考慮した正規表現（dtタグが失敗した場合のフォールバック）
-            page_text = soup.get_text()
-            prize_match = re.search(r'総賞金\s*([\d,]+\.?\d*)\s*万円', page_text)
-            if prize_match:
-                try:
-                    prize_str = prize_match.group(1).replace(',', '')
-                    prize_value = float(prize_str)
-                    print(f"  - 正規表現から賞金取得成功: {prize_value}万円")
-                    return prize_value
-                except ValueError:
-                    print(f"  - 正規表現の賞金を数値変換できませんでした: {prize_match.group(1)}")
-            
-            print(f"  - 賞金データが見つかりませんでした")
-            return None
+            return parse_jbis_prize(response.content)
         except requests.exceptions.RequestException as e:
             print(f"  - ページ取得エラー ({normalized_url}) - 試行 {attempt + 1}/{retries}: {e}")
             if attempt < retries - 1:
@@ -117,6 +109,75 @@ def get_jbis_prize(scraper_session, jbis_url: str) -> Optional[float]:
             return None
     return None
 
+async def fetch_jbis_prize(session, limiter: AdaptiveLimiter, jbis_url: str, retries: int = 3) -> Optional[float]:
+    """JBISのページから総賞金を取得する（asyncio版）
+
+    リクエストはリミッターの枠内で別スレッドから送り、429/5xx・通信エラーは
+    リミッターに伝えて間隔を広げてから再試行する。
+    """
+    if not jbis_url or not jbis_url.startswith('http'):
+        return None
+    normalized_url = normalize_jbis_url(jbis_url)
+    loop = asyncio.get_running_loop()
+
+    for attempt in range(retries):
+        async with limiter.slot():
+            started = loop.time()
+            try:
+                response = await asyncio.to_thread(session.get, normalized_url, timeout=30)
+            except requests.exceptions.RequestException as e:
+                print(f"  - ページ取得エラー ({normalized_url}) - 試行 {attempt + 1}/{retries}: {e}")
+                limiter.record_throttle()
+                continue
+            latency = loop.time() - started
+
+        if response.status_code == 429 or response.status_code >= 500:
+            print(f"  - サーバーが混雑しています ({normalized_url}) - 試行 {attempt + 1}/{retries}: {response.status_code}")
+            limiter.record_throttle(parse_retry_after(response.headers.get('Retry-After')))
+            continue
+        if not getattr(response, 'from_cache', False):
+            limiter.record_success(latency)
+        try:
+            response.raise_for_status()
+            return parse_jbis_prize(response.content)
+        except Exception as e:
+            print(f"  - 予期せぬエラー ({normalized_url}): {e}")
+            return None
+    print(f"  - {retries}回のリトライに失敗しました。")
+    return None
+
+async def refresh_prizes(targets: List[Tuple[int, str, str]], session=None,
+                         limiter: Optional[AdaptiveLimiter] = None) -> Dict[int, Optional[float]]:
+    """複数の馬のJBIS賞金を同時実行数を調整しながら取得する
+
+    Args:
+        targets: (番号, 馬名, JBIS URL) のリスト
+        session: 取得に使うセッション（省略時は共通HTTPクライアントで作成）
+        limiter: 適応型レートリミッター（省略時は環境変数から作成）
+
+    Returns:
+        Dict[int, Optional[float]]: 番号 → 総賞金（取得できなかった場合は None）
+    """
+    limiter = limiter or AdaptiveLimiter.from_env()
+    if session is None:
+        # 429/5xx はリミッターで扱うため、セッション側ではリトライしない
+        session = create_session(max_retries=0, pool_size=limiter.maximum,
+                                 host_pool_sizes={'www.jbis.or.jp': limiter.maximum})
+    total = len(targets)
+    results: Dict[int, Optional[float]] = {}
+
+    async def refresh(number: int, horse_name: str, jbis_url: str) -> None:
+        prize = await fetch_jbis_prize(session, limiter, jbis_url)
+        results[number] = prize
+        status = f"{prize}万円" if prize is not None else "取得できませんでした"
+        print(f"  {len(results)}/{total}: {horse_name} - {status}")
+
+    await asyncio.gather(*(refresh(*target) for target in targets))
+    stats = limiter.stats()
+    print(f"  リクエスト {stats['requests']}件 / 混雑 {stats['throttled']}件 / "
+          f"最大同時実行数 {stats['peak_in_flight']} / 最終の同時実行数 {stats['limit']}・間隔 {stats['interval']}秒")
+    return results
+
 def get_horse_name(horse_data):
     """馬データから名前を取得する。トップレベル、もしくは履歴から取得"""
     if horse_data.get('name'):
@@ -127,7 +188,12 @@ def get_horse_name(horse_data):
     return '名前不明'
 
 
-def main():
+def main(check_all: bool = False):
+    """JBIS賞金を更新する
+
+    Args:
+        check_all: True の場合は確認日に関係なく全ての馬を確認する
+    """
     print("=== JBISデータ更新スクリプト (履歴ファイル版) ===")
     
     json_path = "static-frontend/public/data/horses_history.json"
@@ -135,48 +201,69 @@ def main():
         print(f"❌ JSONファイルが見つかりません: {json_path}")
         return
     
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # JBIS URLがあり、確認日を迎えた馬を集める（馬は1頭ずつ読み込み、全体はメモリに載せない）
+    targets = []
+    not_due_count = 0
+    today = datetime.now().date()
+    with HistoryReader(json_path) as reader:
+        for i, horse in enumerate(reader):
+            if not horse.get('jbis_url'):
+                continue
+            if check_all or is_due(horse, today):
+                targets.append((i, get_horse_name(horse), horse['jbis_url']))
+            else:
+                not_due_count += 1
+        total_horses = reader.count
+    print(f"✅ {total_horses}頭の馬データを読み込みました（確認対象: {len(targets)}頭 / 確認日前: {not_due_count}頭）")
+    if not targets:
+        print("\n✅ 確認日を迎えた馬はいませんでした。")
+        return
     
-    horses = data.get('horses', [])
-    print(f"✅ {len(horses)}頭の馬データを読み込みました")
+    # 同時実行数を調整しながら並行して取得する
+    prizes = asyncio.run(refresh_prizes(targets))
     
-    scraper = RakutenAuctionScraper()
+    # 取得結果と次の確認日をまとめて書き戻す
     updated_count = 0
-    
-    for i, horse in enumerate(horses, 1):
-        jbis_url = horse.get('jbis_url')
-        horse_name = get_horse_name(horse)
-        print(f"  {i}/{len(horses)}: {horse_name} - JBIS賞金取得中...")
-        
-        if not jbis_url:
-            print("  - JBIS URLがありません。スキップします。")
-            continue
+    checked_count = 0
+    now = datetime.now()
+    with HistoryReader(json_path) as reader:
+        writer = HistoryWriter(json_path, reader.header, as_list=reader.is_list)
+        # 集計値があれば、賞金が変わった馬の成長率の差分だけを反映する
+        stored = writer.header.get(AGGREGATES_KEY)
+        aggregates = HistoryAggregates(stored) if isinstance(stored, dict) else None
+        for i, horse in enumerate(reader):
+            prize = prizes.get(i)
+            if prize is not None:
+                # 賞金が更新されていれば書き換える
+                changed = horse.get('total_prize_latest') != prize
+                if changed:
+                    before = HistoryAggregates.contribution(horse)
+                    horse['total_prize_latest'] = prize
+                    if aggregates is not None:
+                        aggregates.update(before, HistoryAggregates.contribution(horse))
+                    horse['updated_at'] = now.isoformat()
+                    updated_count += 1
+                # 取得できた馬は次の確認日を決める（取得できなかった馬は次回も対象）
+                record_check(horse, changed, now)
+                checked_count += 1
+            writer.write(horse)
+        writer.trailer = reader.trailer
 
-        prize = get_jbis_prize(scraper.session, jbis_url)
-        
-        if prize is not None:
-            # 賞金が更新されていればフラグを立てる
-            if horse.get('total_prize_latest') != prize:
-                 horse['total_prize_latest'] = prize
-                 horse['updated_at'] = datetime.now().isoformat()
-                 updated_count += 1
-                 print(f"    -> 賞金を {prize} 万円に更新しました。")
-        else:
-            print("  - 賞金を取得できませんでした。")
-
-        # サーバー負荷軽減
-        time.sleep(1.5)
-
-    if updated_count > 0:
+    if checked_count > 0:
         # 更新されたJSONを保存
-        data['metadata']['last_updated'] = datetime.now().isoformat()
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        print(f"\n✅ {updated_count}頭のJBISデータを更新しました: {json_path}")
+        if updated_count > 0:
+            writer.header['metadata']['last_updated'] = now.isoformat()
+            if aggregates is not None:
+                writer.header[AGGREGATES_KEY] = aggregates.to_dict()
+        writer.close()
+        print(f"\n✅ {updated_count}頭のJBISデータを更新しました（確認 {checked_count}頭）: {json_path}")
     else:
+        writer.discard()
         print("\n✅ 更新が必要な馬はいませんでした。")
 
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='JBIS賞金を更新する（確認日を迎えた馬のみ）')
+    parser.add_argument('--all', action='store_true', help='確認日に関係なく全ての馬を確認する')
+    args = parser.parse_args()
+    main(check_all=args.all)
\ No newline at end of file
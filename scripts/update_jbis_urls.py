@@ -6,16 +6,17 @@ import os
 import json
 import time
 import re
-from bs4 import BeautifulSoup
 from datetime import datetime
 from typing import Optional, List
-import requests
 
 # プロジェクトルートをパスに追加
 project_root = os.path.dirname(os.path.dirname(__file__))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
+from backend.scrapers.html_parser import make_soup
+from backend.scrapers.http_client import get_session
+
 def search_jbis_url(session, horse_name: str, sire: str, dam: str) -> Optional[str]:
     """馬名、父、母を元にJBISで検索し、最も確からしいURLを返す"""
     try:
@@ -23,7 +24,7 @@ def search_jbis_url(session, horse_name: str, sire: str, dam: str) -> Optional[s
         params = {"sname": horse_name}
         response = session.post(search_url, data=params, timeout=20)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = make_soup(response.content)
         
         results = soup.select('table.tbl-data-04 tr:not(:first-child)')
         if not results:
@@ -71,10 +72,8 @@ def main():
     horses = data.get('horses', [])
     print(f"✅ {len(horses)}頭の馬データを読み込みました")
     
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    })
+    # 共通HTTPクライアント（接続を再利用する）
+    session = get_session()
     
     updated_count = 0
     